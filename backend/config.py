@@ -0,0 +1,154 @@
+import json
+import os
+
+# Model weights used by each task. Override per deployment with environment variables.
+MODEL_PATHS = {
+    "detect": os.getenv("DETECT_MODEL_PATH", "models/yolov8n.pt"),
+    "segment": os.getenv("SEGMENT_MODEL_PATH", "models/yolov8n-seg.pt"),
+    "pose": os.getenv("POSE_MODEL_PATH", "models/yolov8n-pose.pt"),
+}
+
+# Inference backend per task: "torch" (eager .pt), "onnx", "openvino" or "torchscript". Non-torch
+# backends are exported from the .pt weights on first use and cached in MODEL_EXPORT_DIR.
+# *_MODEL_INT8=1 serves INT8 weights: onnx uses onnxruntime dynamic quantization (weights only, no
+# calibration); openvino uses NNCF post-training static quantization calibrated on the images in
+# INT8_CALIBRATION_IMAGES (more images, ideally from the deployment's cameras, give better accuracy).
+MODEL_BACKENDS = {
+    "detect": os.getenv("DETECT_MODEL_BACKEND", "torch"),
+    "segment": os.getenv("SEGMENT_MODEL_BACKEND", "torch"),
+    "pose": os.getenv("POSE_MODEL_BACKEND", "torch"),
+}
+MODEL_INT8 = {
+    "detect": os.getenv("DETECT_MODEL_INT8", "0") == "1",
+    "segment": os.getenv("SEGMENT_MODEL_INT8", "0") == "1",
+    "pose": os.getenv("POSE_MODEL_INT8", "0") == "1",
+}
+INT8_CALIBRATION_IMAGES = os.getenv("INT8_CALIBRATION_IMAGES", "sample_images")
+MODEL_EXPORT_DIR = os.getenv("MODEL_EXPORT_DIR", "models/exported")
+EXPORT_IMGSZ = int(os.getenv("EXPORT_IMGSZ", "640"))
+
+# Upper bound for the memory held by loaded models before idle ones are evicted (LRU).
+MODEL_CACHE_MAX_MB = int(os.getenv("MODEL_CACHE_MAX_MB", "2048"))
+
+# Run a dummy inference right after loading so the first real request is not slow.
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+
+# Models loaded (and warmed up) in the background at API startup; GET /ready succeeds once they are.
+# Empty to load every model lazily on first use.
+STARTUP_TASKS = [task.strip() for task in os.getenv("STARTUP_TASKS", "detect,segment,pose").split(",") if task.strip()]
+
+# Micro-batching of concurrent image requests: largest batch and longest wait for a batch to fill.
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+# Pool running blocking work off the event loop. Requests beyond WORKER_POOL_SIZE + WORKER_QUEUE_SIZE
+# are rejected with 503 and a Retry-After header instead of piling up.
+WORKER_POOL_KIND = os.getenv("WORKER_POOL_KIND", "thread")
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", str(os.cpu_count() or 4)))
+WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", "32"))
+WORKER_RETRY_AFTER_S = int(os.getenv("WORKER_RETRY_AFTER_S", "1"))
+
+# Background video jobs: concurrent jobs, queued jobs and finished jobs kept for polling.
+VIDEO_JOB_WORKERS = int(os.getenv("VIDEO_JOB_WORKERS", "1"))
+VIDEO_JOB_QUEUE_SIZE = int(os.getenv("VIDEO_JOB_QUEUE_SIZE", "8"))
+VIDEO_JOB_HISTORY = int(os.getenv("VIDEO_JOB_HISTORY", "100"))
+
+# Uploads are copied to disk in chunks of this many bytes.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Capacity of the decode and encode queues around the video inference stage.
+VIDEO_QUEUE_SIZE = int(os.getenv("VIDEO_QUEUE_SIZE", "16"))
+
+# Frames sent to the model per call when processing videos, capped so one batch of decoded
+# frames stays under VIDEO_BATCH_MAX_MB.
+VIDEO_BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", "4"))
+VIDEO_BATCH_MAX_MB = int(os.getenv("VIDEO_BATCH_MAX_MB", "256"))
+
+# Split each video into frame-range segments processed by this many worker processes (1 = serial).
+# Segments are never shorter than VIDEO_SEGMENT_MIN_FRAMES.
+VIDEO_SEGMENT_WORKERS = int(os.getenv("VIDEO_SEGMENT_WORKERS", "1"))
+VIDEO_SEGMENT_MIN_FRAMES = int(os.getenv("VIDEO_SEGMENT_MIN_FRAMES", "100"))
+
+# Motion gating for fixed-camera video: frames whose downscaled difference to the last inferred
+# frame is below MOTION_THRESHOLD (mean abs diff, 0-255) reuse its detections, at most
+# MOTION_MAX_SKIP frames in a row.
+VIDEO_MOTION_GATING = os.getenv("VIDEO_MOTION_GATING", "0") == "1"
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "4.0"))
+MOTION_MAX_SKIP = int(os.getenv("MOTION_MAX_SKIP", "10"))
+
+# Tracking mode for video detection: run the detector every TRACK_KEYFRAME_INTERVAL frames and
+# carry boxes in between with an IoU tracker that assigns stable track IDs.
+VIDEO_TRACKING = os.getenv("VIDEO_TRACKING", "0") == "1"
+TRACK_KEYFRAME_INTERVAL = int(os.getenv("TRACK_KEYFRAME_INTERVAL", "5"))
+TRACK_IOU_THRESHOLD = float(os.getenv("TRACK_IOU_THRESHOLD", "0.3"))
+TRACK_MAX_MISSES = int(os.getenv("TRACK_MAX_MISSES", "2"))
+
+# Largest frame range returned by GET /videos/{id}/frames.
+MAX_FRAMES_PER_REQUEST = int(os.getenv("MAX_FRAMES_PER_REQUEST", "1000"))
+
+# Background database writer: records are committed in bulk once DB_WRITE_BATCH_SIZE are queued
+# or DB_FLUSH_INTERVAL_MS has passed.
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "64"))
+DB_FLUSH_INTERVAL_MS = float(os.getenv("DB_FLUSH_INTERVAL_MS", "50"))
+DB_WRITE_QUEUE_SIZE = int(os.getenv("DB_WRITE_QUEUE_SIZE", "10000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+# Default and largest page size of GET /detections.
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "500"))
+
+# Content-addressed cache of image results keyed by input bytes, task and model version:
+# RESULT_CACHE_ENTRIES results in memory, plus up to RESULT_CACHE_DISK_MB on disk in RESULT_CACHE_DIR.
+RESULT_CACHE = os.getenv("RESULT_CACHE", "1") == "1"
+RESULT_CACHE_ENTRIES = int(os.getenv("RESULT_CACHE_ENTRIES", "1024"))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "cache/results")
+RESULT_CACHE_DISK_MB = int(os.getenv("RESULT_CACHE_DISK_MB", "256"))
+
+# Detection history database, annotated images and per-job video outputs.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./detections.db")
+RESULTS_DIR = os.getenv("RESULTS_DIR", "results")
+VIDEO_RESULTS_DIR = os.getenv("VIDEO_RESULTS_DIR", "video_results")
+
+# Uploads of JSON-only image requests (render=false), kept so GET /render/{id} can draw them later.
+SOURCES_DIR = os.getenv("SOURCES_DIR", os.path.join(RESULTS_DIR, "sources"))
+
+# Largest deviation (pixels) allowed when simplifying segmentation mask polygons in responses (0 keeps every point).
+MASK_SIMPLIFY_EPSILON = float(os.getenv("MASK_SIMPLIFY_EPSILON", "1.0"))
+
+# Tiled inference for large images (?tiled=true): square tiles of TILE_SIZE pixels overlapping by TILE_OVERLAP
+# (fraction), run TILE_BATCH_SIZE at a time, plus a downscaled full-frame pass when TILE_FULL_FRAME is set so large
+# objects are kept. Same-class detections whose intersection over the smaller box reaches TILE_MATCH_THRESHOLD
+# are merged.
+TILE_SIZE = int(os.getenv("TILE_SIZE", "640"))
+TILE_OVERLAP = float(os.getenv("TILE_OVERLAP", "0.2"))
+TILE_BATCH_SIZE = int(os.getenv("TILE_BATCH_SIZE", "8"))
+TILE_FULL_FRAME = os.getenv("TILE_FULL_FRAME", "1") == "1"
+TILE_MATCH_THRESHOLD = float(os.getenv("TILE_MATCH_THRESHOLD", "0.6"))
+
+# Square input size the /analyze endpoint letterboxes an image to before running its models.
+ANALYZE_IMGSZ = int(os.getenv("ANALYZE_IMGSZ", "640"))
+
+# POST /batch/{task}: images per model call, decoded images buffered ahead of the model, and
+# concurrent batch streams (further requests get 503).
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "16"))
+BULK_PREFETCH = int(os.getenv("BULK_PREFETCH", "32"))
+BULK_MAX_STREAMS = int(os.getenv("BULK_MAX_STREAMS", "2"))
+
+# WebSocket streams (/ws/{task}): highest processing rate a client may request and JPEG quality
+# of the annotated frames sent back.
+STREAM_MAX_FPS = float(os.getenv("STREAM_MAX_FPS", "30"))
+STREAM_JPEG_QUALITY = int(os.getenv("STREAM_JPEG_QUALITY", "80"))
+
+# Opt-in sampling profiler: requests slower than PROFILE_SLOW_MS (0 = off) write the stacks sampled every
+# PROFILE_INTERVAL_MS while they ran to PROFILE_DIR, in collapsed flame graph format. One sampler thread
+# serves all requests and keeps the last PROFILE_WINDOW_S seconds, the longest span a profile covers.
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_WINDOW_S = float(os.getenv("PROFILE_WINDOW_S", "60"))
+
+# Preprocessing (contrast correction) applied before inference, as a spec like "gamma=1.8,clahe=2.0"
+# (steps: gamma, contrast, brightness, clahe, clahe_grid). PREPROCESS is the default for every request;
+# CAMERA_PREPROCESS maps camera names (the ?camera= parameter) to their own spec, e.g. {"yard": "clahe=2.5"}.
+PREPROCESS = os.getenv("PREPROCESS", "")
+CAMERA_PREPROCESS = json.loads(os.getenv("CAMERA_PREPROCESS", "{}"))
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy import Column, String, DateTime, JSON, Float, ForeignKey, Index, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 import uuid
 import datetime
 
@@ -8,11 +9,66 @@ Base = declarative_base()
 
 class Detection(Base):
     __tablename__ = "detections"
+    __table_args__ = (
+        # Keyset pagination of task-filtered history seeks straight to the task's newest rows
+        Index("ix_detections_task_timestamp_id", "task", "timestamp", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
-    filename = Column(String)
+    timestamp = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    filename = Column(String, index=True)
     class_names = Column(JSON)
     confidences = Column(JSON)
     bboxes = Column(JSON)
     result_path = Column(String)
+    # Mask polygons (segment) and keypoints (pose) of image detections
+    masks = Column(JSON)
+    keypoints = Column(JSON)
+    # Uploaded image kept for on-demand rendering of JSON-only requests
+    source_path = Column(String)
+    # Directory of per-frame columnar detections for videos (see backend/service/sidecar.py)
+    sidecar_path = Column(String)
+    task = Column(String)
+
+    objects = relationship("DetectionObject", back_populates="detection", cascade="all, delete-orphan")
+
+
+class DetectionObject(Base):
+    """
+    One detected object per row, so history queries can filter on class and confidence through indexes.
+    """
+    __tablename__ = "detection_objects"
+    __table_args__ = (
+        # Covers the per-detection EXISTS probe of class-filtered history queries
+        Index("ix_detection_objects_class_timestamp_detection", "class_name", "timestamp", "detection_id"),
+        Index("ix_detection_objects_filename", "filename"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    detection_id = Column(UUID(as_uuid=True), ForeignKey("detections.id"), nullable=False, index=True)
+    # Copied from the parent detection so the composite indexes cover the common filters
+    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+    filename = Column(String)
+    task = Column(String)
+    class_name = Column(String, nullable=False)
+    confidence = Column(Float)
+    x1 = Column(Float)
+    y1 = Column(Float)
+    x2 = Column(Float)
+    y2 = Column(Float)
+
+    detection = relationship("Detection", back_populates="objects")
+
+
+class DetectionRollup(Base):
+    """
+    Object counts and confidence sums per class, task and hour/day bucket, updated as detections are written.
+    """
+    __tablename__ = "detection_rollups"
+
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    task = Column(String, primary_key=True)
+    class_name = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(Float, nullable=False, default=0.0)
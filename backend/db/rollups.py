@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from backend.db.models import Detection, DetectionObject, DetectionRollup
+
+GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(timestamp, granularity: str):
+    """
+    Start of the hour or day bucket containing ``timestamp``.
+    """
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def _increments(objects):
+    totals = defaultdict(lambda: [0, 0.0])
+    for obj in objects:
+        if obj.timestamp is None:
+            continue
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(obj.timestamp, granularity), obj.task or "unknown", obj.class_name)
+            totals[key][0] += 1
+            totals[key][1] += obj.confidence or 0.0
+    return totals
+
+
+def _upsert(session, totals):
+    if not totals:
+        return
+    dialect = session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    rows = [
+        {
+            "granularity": granularity,
+            "bucket_start": start,
+            "task": task,
+            "class_name": class_name,
+            "count": count,
+            "confidence_sum": confidence_sum,
+        }
+        for (granularity, start, task, class_name), (count, confidence_sum) in totals.items()
+    ]
+    # Chunked to stay under SQLite's bound-parameter limit
+    for i in range(0, len(rows), 100):
+        statement = insert(DetectionRollup).values(rows[i:i + 100])
+        statement = statement.on_conflict_do_update(
+            index_elements=["granularity", "bucket_start", "task", "class_name"],
+            set_={
+                "count": DetectionRollup.count + statement.excluded.count,
+                "confidence_sum": DetectionRollup.confidence_sum + statement.excluded.confidence_sum,
+            },
+        )
+        session.execute(statement)
+
+
+def apply_rollups(session, records):
+    """
+    Add the objects of newly written detections to the rollups, in the same transaction.
+    """
+    objects = [obj for record in records if isinstance(record, Detection) for obj in record.objects]
+    _upsert(session, _increments(objects))
+
+
+def rebuild_rollups(session, chunk_size: int = 10000):
+    """
+    Recompute every rollup from ``detection_objects``. Run while no detections are being written.
+
+    Returns:
+        int: Number of objects aggregated.
+    """
+    session.execute(delete(DetectionRollup))
+    totals = defaultdict(lambda: [0, 0.0])
+    aggregated = 0
+    for obj in session.execute(select(DetectionObject).execution_options(yield_per=chunk_size)).scalars():
+        for key, (count, confidence_sum) in _increments([obj]).items():
+            totals[key][0] += count
+            totals[key][1] += confidence_sum
+        aggregated += 1
+    _upsert(session, totals)
+    session.commit()
+    return aggregated
@@ -0,0 +1,167 @@
+import logging
+import multiprocessing.util
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from backend.config import DB_WRITE_BATCH_SIZE, DB_FLUSH_INTERVAL_MS, DB_WRITE_QUEUE_SIZE
+from backend.db.rollups import apply_rollups
+from backend.db.session import SessionLocal
+from backend.service.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class DetectionWriter:
+    def __init__(self, session_factory=SessionLocal, batch_size: int = DB_WRITE_BATCH_SIZE,
+                 flush_interval_ms: float = DB_FLUSH_INTERVAL_MS, max_queue: int = DB_WRITE_QUEUE_SIZE,
+                 before_commit=()):
+        """
+        Background writer that commits detection records in bulk.
+
+        Records are queued by the request path and flushed in one transaction
+        once ``batch_size`` records are waiting or ``flush_interval_ms`` has
+        passed since the first one, so concurrent requests no longer serialize
+        on individual SQLite commits.
+
+        Args:
+            session_factory: SQLAlchemy session factory.
+            batch_size (int): Largest number of records per transaction.
+            flush_interval_ms (float): Longest time a record waits before being flushed.
+            max_queue (int): Queued records before ``submit`` blocks.
+            before_commit: Callables ``hook(session, records)`` run in each flush transaction.
+        """
+        self.session_factory = session_factory
+        self.before_commit = list(before_commit)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._records = 0
+        self._flushes = 0
+        self._errors = 0
+        self._flush_total = 0.0
+        self._flush_max = 0.0
+
+    def submit(self, record) -> Future:
+        """
+        Queue a record (or list of records) for insertion.
+
+        Returns:
+            Future: Resolves once the record is committed.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((record if isinstance(record, list) else [record], future))
+        return future
+
+    def flush(self):
+        """
+        Block until every record queued so far is committed.
+        """
+        if self._thread is not None:
+            self._queue.join()
+
+    def shutdown(self):
+        """
+        Flush pending records and stop the writer thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put((_STOP, None))
+            thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "records": self._records,
+                "flushes": self._flushes,
+                "errors": self._errors,
+                "mean_records_per_flush": round(self._records / self._flushes, 2) if self._flushes else 0.0,
+                "mean_flush_ms": round(1000 * self._flush_total / self._flushes, 3) if self._flushes else 0.0,
+                "max_flush_ms": round(1000 * self._flush_max, 3),
+            }
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+                # Flush on interpreter exit, including pool worker processes
+                multiprocessing.util.Finalize(self, self.shutdown, exitpriority=10)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            items = [self._queue.get()]
+            deadline = time.perf_counter() + self.flush_interval
+            while len(items) < self.batch_size and items[-1][0] is not _STOP:
+                remaining = deadline - time.perf_counter()
+                try:
+                    items.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batch = [item for item in items if item[0] is not _STOP]
+            stopping = len(batch) < len(items)
+            if batch:
+                self._write(batch)
+            for _ in items:
+                self._queue.task_done()
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        error = self._commit([record for records, _ in batch for record in records])
+        if error is None:
+            errors = [None] * len(batch)
+        elif len(batch) == 1:
+            errors = [error]
+        else:
+            # Retry each submitter in its own transaction so a bad record only fails its own request
+            errors = [self._commit(records) for records, _ in batch]
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage="db_commit")
+
+        with self._lock:
+            self._flushes += 1
+            self._flush_total += elapsed
+            self._flush_max = max(self._flush_max, elapsed)
+            self._records += sum(len(records) for (records, _), error in zip(batch, errors) if error is None)
+            self._errors += sum(error is not None for error in errors)
+        for (_, future), error in zip(batch, errors):
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    def _commit(self, records):
+        """
+        Insert records in one transaction.
+
+        Returns:
+            Exception | None: The error that rolled the transaction back, if any.
+        """
+        session = self.session_factory()
+        try:
+            session.add_all(records)
+            for hook in self.before_commit:
+                hook(session, records)
+            session.commit()
+            return None
+        except Exception as e:
+            # Rolling back detaches the records, so they can be added again on retry
+            session.rollback()
+            logger.exception("Failed to write %d detection records", len(records))
+            return e
+        finally:
+            session.close()
+
+
+# Rollups are updated in the same transaction as the detections they count
+writer = DetectionWriter(before_commit=[apply_rollups])
@@ -1,13 +1,58 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import datetime
+import functools
+import re
+import threading
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import FastAPI, Request, UploadFile, File, Header, HTTPException, Query, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from backend.models.detector import Detector
-from backend.models.segmentor import Segmentor
-from backend.models.pose_estimator import PoseEstimator
-from backend.service.detection_service import handle_image
-from backend.service.video_service import handle_video
-from starlette.responses import JSONResponse
+from backend.models.registry import registry
+from backend.service.batching import batching_stats
+from backend.service.detection_service import handle_image, render_detection
+from backend.service.analysis_service import handle_analyze, parse_tasks
+from backend.service.batch_service import stream_batch
+from backend.service.stream_service import run_stream
+from backend.service.encoding import NotAcceptableError, encode_analysis, encode_result, negotiate
+from backend.service.video_service import get_video_frames, handle_video, shutdown_segment_pool
+from backend.service.job_service import jobs
+from backend.service.metrics import (
+    CONTENT_TYPE, IN_FLIGHT, MODEL_MEMORY, MODELS_LOADED, QUEUE_DEPTH, REQUEST_SECONDS, REQUESTS, VIDEO_JOBS,
+    SamplingProfiler, metrics,
+)
+from backend.service.history_service import query_detections
+from backend.service.preprocessing import resolve_preprocess
+from backend.service.result_cache import result_cache
+from backend.service.startup import startup
+from backend.service.stats_service import query_stats
+from backend.service.workers import PoolSaturatedError, pool
+from backend.config import (
+    WORKER_RETRY_AFTER_S, MAX_FRAMES_PER_REQUEST, HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE, BULK_MAX_STREAMS,
+    STREAM_MAX_FPS, PROFILE_SLOW_MS, PROFILE_WINDOW_S,
+)
+from backend.db.session import init_db
+from backend.db.writer import writer
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Models load in the background; GET /ready reports when they are warm
+    startup.start()
+    yield
+    jobs.shutdown()
+    shutdown_segment_pool()
+    if profiler is not None:
+        profiler.stop()
+    pool.shutdown()
+    writer.shutdown()
 
-app = FastAPI(title="YOLO Multi-Model API")
+app = FastAPI(title="YOLO Multi-Model API", lifespan=lifespan)
+
+init_db()
+startup.record("import", time.perf_counter() - _import_started)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,65 +62,286 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-detector = Detector("models/yolov8n.pt")
-segmentor = Segmentor("models/yolov8n-seg.pt")
-pose_model = PoseEstimator("models/yolov8n-pose.pt")
+# One shared sampler for all requests; slow ones dump the samples taken while they ran
+profiler = SamplingProfiler(window_s=PROFILE_WINDOW_S) if PROFILE_SLOW_MS > 0 else None
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    if profiler is not None:
+        profiler.start()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        # Label by route template, so path parameters do not create new series
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUESTS.inc(method=request.method, route=route, status=status)
+        REQUEST_SECONDS.observe(elapsed, method=request.method, route=route)
+        if profiler is not None and 1000 * elapsed >= PROFILE_SLOW_MS:
+            stacks = profiler.window(start, start + elapsed)
+            if stacks:
+                # Written on a worker thread without waiting, so the event loop never blocks on it
+                name = f"{request.method}-{re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_')}"
+                asyncio.get_running_loop().run_in_executor(None, functools.partial(profiler.dump, name, stacks=stacks))
+
+
+def _collect_metrics():
+    for task, stats in batching_stats().items():
+        QUEUE_DEPTH.set(stats["queue_depth"], queue=f"batch_{task}")
+    QUEUE_DEPTH.set(writer.stats()["queue_depth"], queue="db_writer")
+    workers = pool.stats()
+    IN_FLIGHT.set(workers["in_flight"], pool="requests")
+    QUEUE_DEPTH.set(max(0, workers["in_flight"] - workers["max_workers"]), queue="requests")
+    video = jobs.stats()
+    IN_FLIGHT.set(video["in_flight"], pool="video_jobs")
+    for status in ("queued", "running", "completed", "failed", "cancelled"):
+        VIDEO_JOBS.set(video["jobs"].get(status, 0), status=status)
+    QUEUE_DEPTH.set(video["jobs"].get("queued", 0), queue="video_jobs")
+    models = registry.stats()
+    MODELS_LOADED.set(len(models["loaded"]))
+    MODEL_MEMORY.set(models["memory_mb"] * 1024 * 1024)
+
+metrics.add_collector(_collect_metrics)
+
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
-@app.post("/detect")
-async def detect(file: UploadFile = File(...)):
+@app.get("/ready")
+def ready():
+    return JSONResponse(content=startup.to_dict(), status_code=200 if startup.ready else 503)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+@app.get("/diagnostics")
+def diagnostics():
+    return {"models": registry.stats(), "batching": batching_stats(), "workers": pool.stats(),
+            "video_jobs": jobs.stats(), "db_writer": writer.stats(), "result_cache": result_cache.stats(),
+            "startup": startup.to_dict()}
+
+
+def _busy(e: PoolSaturatedError):
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(WORKER_RETRY_AFTER_S)})
+
+def _preprocess_spec(preprocess: Optional[str], camera: Optional[str]):
     try:
-        image_bytes = await file.read()
-        result = handle_image(image_bytes, task="detect", filename=file.filename)
-        return JSONResponse(content=result)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return resolve_preprocess(preprocess, camera)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/segment")
-async def segment(file: UploadFile = File(...)):
+async def _image_response(file: UploadFile, task: str, render: bool, accept: Optional[str], mask_format: str,
+                          tiled: bool = False, preprocess: str = ""):
     try:
+        media_type = negotiate(accept)
         image_bytes = await file.read()
-        result = handle_image(image_bytes, task="segment", filename=file.filename)
-        return JSONResponse(content=result)
+        result = await pool.run(handle_image, image_bytes, task, file.filename, render, tiled, preprocess)
+        content, headers = await pool.run(encode_result, result, media_type, mask_format)
+        return Response(content=content, media_type=media_type, headers=headers)
+    except NotAcceptableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except PoolSaturatedError as e:
+        raise _busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/detect")
+async def detect(file: UploadFile = File(...), render: bool = True, tiled: bool = False,
+                 preprocess: Optional[str] = None, camera: Optional[str] = None,
+                 accept: Optional[str] = Header(None)):
+    spec = _preprocess_spec(preprocess, camera)
+    return await _image_response(file, "detect", render, accept, "polygon", tiled, spec)
+
+@app.post("/segment")
+async def segment(file: UploadFile = File(...), render: bool = True, tiled: bool = False,
+                  preprocess: Optional[str] = None, camera: Optional[str] = None,
+                  accept: Optional[str] = Header(None),
+                  mask_format: str = Query("polygon", pattern="^(polygon|rle)$")):
+    spec = _preprocess_spec(preprocess, camera)
+    return await _image_response(file, "segment", render, accept, mask_format, tiled, spec)
+
 
 @app.post("/pose")
-async def pose_estimate(file: UploadFile = File(...)):
+async def pose_estimate(file: UploadFile = File(...), render: bool = True, tiled: bool = False,
+                        preprocess: Optional[str] = None, camera: Optional[str] = None,
+                        accept: Optional[str] = Header(None)):
+    spec = _preprocess_spec(preprocess, camera)
+    return await _image_response(file, "pose", render, accept, "polygon", tiled, spec)
+
+
+@app.post("/analyze")
+async def analyze(file: UploadFile = File(...), tasks: List[str] = Query(["detect", "segment", "pose"]),
+                  accept: Optional[str] = Header(None),
+                  mask_format: str = Query("polygon", pattern="^(polygon|rle)$")):
+    try:
+        tasks = parse_tasks(tasks)
+        media_type = negotiate(accept)
+        if media_type not in ("application/json", "application/msgpack"):
+            raise NotAcceptableError("Multi-task results are available as JSON or msgpack")
+    except NotAcceptableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         image_bytes = await file.read()
-        result = handle_image(image_bytes, task="pose", filename=file.filename)
-        return JSONResponse(content=result)
+        result = await pool.run(handle_analyze, image_bytes, tasks, file.filename)
+        content, headers = await pool.run(encode_analysis, result, media_type, mask_format)
+        return Response(content=content, media_type=media_type, headers=headers)
+    except PoolSaturatedError as e:
+        raise _busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+_bulk_streams = threading.BoundedSemaphore(max(1, BULK_MAX_STREAMS))
+
+@app.post("/batch/{task}")
+def batch(task: str, files: List[UploadFile] = File(...), preprocess: Optional[str] = None,
+          camera: Optional[str] = None):
+    if task not in ("detect", "segment", "pose"):
+        raise HTTPException(status_code=404, detail=f"Unsupported task: {task}")
+    spec = _preprocess_spec(preprocess, camera)
+    if not _bulk_streams.acquire(blocking=False):
+        raise _busy(PoolSaturatedError("Too many batch requests in progress, retry later"))
+    lines = stream_batch([(file.filename, file.file) for file in files], task, preprocess=spec)
+    return StreamingResponse(_releasing(lines, _bulk_streams), media_type="application/x-ndjson")
+
+
+def _releasing(lines, semaphore):
+    # Runs when the stream ends, fails or is closed after a client disconnect
+    try:
+        yield from lines
+    finally:
+        semaphore.release()
+
+
+@app.websocket("/ws/{task}")
+async def stream(websocket: WebSocket, task: str, fps: float = STREAM_MAX_FPS, mode: str = "annotated",
+                 preprocess: Optional[str] = None, camera: Optional[str] = None):
+    if task not in ("detect", "segment", "pose"):
+        await websocket.close(code=1008, reason=f"Unsupported task: {task}")
+        return
+    try:
+        spec = resolve_preprocess(preprocess, camera)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    await websocket.accept()
+    await run_stream(websocket, pool, task, fps=fps, mode=mode, preprocess=spec)
+
+
 @app.post("/video/detect")
-async def video_detect(file: UploadFile = File(...)):
+async def video_detect(file: UploadFile = File(...), preprocess: Optional[str] = None, camera: Optional[str] = None):
+    spec = _preprocess_spec(preprocess, camera)
     try:
-        result = await handle_video(file, "detect")  # pass UploadFile
-        return JSONResponse(content=result)
+        result = await handle_video(file, "detect", spec)  # pass UploadFile
+        return JSONResponse(content=result, status_code=202)
+    except PoolSaturatedError as e:
+        raise _busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/video/segment")
-async def video_segment(file: UploadFile = File(...)):
+async def video_segment(file: UploadFile = File(...), preprocess: Optional[str] = None, camera: Optional[str] = None):
+    spec = _preprocess_spec(preprocess, camera)
     try:
-        result = await handle_video(file, "segment")  # pass UploadFile
-        return JSONResponse(content=result)
+        result = await handle_video(file, "segment", spec)  # pass UploadFile
+        return JSONResponse(content=result, status_code=202)
+    except PoolSaturatedError as e:
+        raise _busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/video/pose")
-async def video_pose(file: UploadFile = File(...)):
+async def video_pose(file: UploadFile = File(...), preprocess: Optional[str] = None, camera: Optional[str] = None):
+    spec = _preprocess_spec(preprocess, camera)
     try:
-        result = await handle_video(file, "pose")  # pass UploadFile
-        return JSONResponse(content=result)
+        result = await handle_video(file, "pose", spec)  # pass UploadFile
+        return JSONResponse(content=result, status_code=202)
+    except PoolSaturatedError as e:
+        raise _busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/render/{detection_id}")
+async def render_image(detection_id: str):
+    try:
+        path = await pool.run(render_detection, detection_id)
+    except PoolSaturatedError as e:
+        raise _busy(e)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Nothing to render for {detection_id}")
+    return FileResponse(path, media_type="image/jpeg")
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+
+@app.get("/videos/{detection_id}/frames")
+def video_frames(detection_id: str, start: int = 0, end: int = None):
+    if end is None:
+        end = start + MAX_FRAMES_PER_REQUEST
+    if start < 0 or end <= start or end - start > MAX_FRAMES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Request between 1 and {MAX_FRAMES_PER_REQUEST} frames")
+    frames = get_video_frames(detection_id, start, end)
+    if frames is None:
+        raise HTTPException(status_code=404, detail=f"No per-frame detections for {detection_id}")
+    return {"detection_id": detection_id, "start": start, "frames": frames}
+
+
+@app.get("/detections")
+def list_detections(
+    class_name: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    max_confidence: Optional[float] = Query(None, ge=0, le=1),
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    task: Optional[str] = None,
+    filename: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+):
+    try:
+        return query_detections(
+            class_name=class_name, min_confidence=min_confidence, max_confidence=max_confidence,
+            since=since, until=until, task=task, filename=filename, cursor=cursor, limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/stats")
+def detection_stats(
+    granularity: str = "hour",
+    task: Optional[str] = None,
+    class_name: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+):
+    try:
+        buckets = query_stats(granularity=granularity, task=task, class_name=class_name, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"granularity": granularity, "buckets": buckets}
@@ -0,0 +1,148 @@
+import glob
+import json
+import logging
+import os
+import shutil
+import threading
+
+from backend.config import INT8_CALIBRATION_IMAGES, MODEL_EXPORT_DIR, EXPORT_IMGSZ
+
+logger = logging.getLogger(__name__)
+
+# Inference runtimes a model can be served with; "torch" runs the .pt weights eagerly.
+BACKENDS = ("torch", "onnx", "openvino", "torchscript")
+
+_FORMATS = {"onnx": "onnx", "openvino": "openvino", "torchscript": "torchscript"}
+_export_locks = {}
+_export_locks_lock = threading.Lock()
+
+
+def load_yolo(model_path: str, task: str, backend: str = "torch", int8: bool = False):
+    """
+    Load a YOLO model for the given backend, exporting the ``.pt`` weights on first use.
+
+    Args:
+        model_path (str): PyTorch weights.
+        task (str): ultralytics task of the weights ("detect", "segment" or "pose").
+        backend (str): One of ``BACKENDS``.
+        int8 (bool): Use INT8 weights (ONNX and OpenVINO only). ONNX weights are quantized
+            dynamically by onnxruntime; OpenVINO runs NNCF post-training static quantization
+            calibrated on ``INT8_CALIBRATION_IMAGES``.
+
+    Returns:
+        YOLO: ultralytics model running on the selected backend.
+    """
+    from ultralytics import YOLO  # deferred: importing torch dominates API startup
+
+    if backend == "torch":
+        if int8:
+            raise ValueError("INT8 quantization needs the onnx or openvino backend")
+        return YOLO(model_path)
+    return YOLO(export_weights(model_path, backend, int8), task=task)
+
+
+def exported_path(model_path: str, backend: str, int8: bool = False, imgsz: int = EXPORT_IMGSZ,
+                  export_dir: str = MODEL_EXPORT_DIR):
+    """
+    Cache location of an exported model. The name carries the size and modification
+    time of the source weights, so replacing the ``.pt`` file triggers a new export.
+    """
+    if backend not in _FORMATS:
+        raise ValueError(f"Unsupported backend: {backend}")
+    stat = os.stat(model_path)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    suffix = {"onnx": ".onnx", "openvino": "_openvino_model", "torchscript": ".torchscript"}[backend]
+    tag = f"{stem}-{stat.st_size}-{stat.st_mtime_ns}-{imgsz}{'-int8' if int8 else ''}"
+    return os.path.join(export_dir, tag + suffix)
+
+
+def export_weights(model_path: str, backend: str, int8: bool = False, imgsz: int = EXPORT_IMGSZ,
+                   export_dir: str = MODEL_EXPORT_DIR):
+    """
+    Export ``model_path`` for ``backend`` unless a cached export exists.
+
+    Returns:
+        str: Path of the exported model (file or OpenVINO directory).
+    """
+    if int8 and backend == "torchscript":
+        raise ValueError("INT8 quantization needs the onnx or openvino backend")
+    target = exported_path(model_path, backend, int8, imgsz, export_dir)
+    with _export_lock(target):
+        if os.path.exists(target):
+            return target
+        os.makedirs(export_dir, exist_ok=True)
+        logger.info("Exporting %s for %s%s", model_path, backend, " (int8)" if int8 else "")
+
+        # Export from a private copy so concurrent exports (other formats, other processes) do not collide
+        work_dir = f"{target}.{os.getpid()}.tmp"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+        try:
+            from ultralytics import YOLO
+
+            source = shutil.copy(model_path, work_dir)
+            model = YOLO(source)
+            options = {}
+            if int8 and backend == "openvino":
+                # Static quantization: NNCF calibrates activation ranges on local images
+                options = {"int8": True, "data": calibration_data(work_dir, model.names)}
+            # ONNX INT8 is applied below with onnxruntime's dynamic quantization
+            exported = model.export(format=_FORMATS[backend], imgsz=imgsz, dynamic=backend != "torchscript",
+                                    **options)
+            if int8 and backend == "onnx":
+                exported = _quantize_onnx(exported)
+            if not os.path.exists(target):  # another process may have finished first
+                os.replace(exported, target)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return target
+
+
+def calibration_data(work_dir: str, names: dict, images_dir: str = INT8_CALIBRATION_IMAGES):
+    """
+    Write an unlabelled ultralytics dataset of the calibration images, so INT8 export
+    does not fall back to downloading a default dataset.
+
+    The images are copied under ``work_dir`` so the label cache ultralytics writes next
+    to them is removed with it.
+
+    Returns:
+        str: Path of the dataset YAML.
+    """
+    images = sorted(
+        path for pattern in ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+        for path in glob.glob(os.path.join(images_dir, pattern))
+    )
+    if not images:
+        raise ValueError(f"No calibration images found in {images_dir}")
+    dataset_dir = os.path.join(os.path.abspath(work_dir), "calibration")
+    os.makedirs(os.path.join(dataset_dir, "images"), exist_ok=True)
+    for path in images:
+        shutil.copy(path, os.path.join(dataset_dir, "images"))
+    data_path = os.path.join(dataset_dir, "data.yaml")
+    with open(data_path, "w") as f:
+        # JSON is valid YAML, the format ultralytics reads dataset files in
+        json.dump({"path": dataset_dir, "train": "images", "val": "images",
+                   "names": [names[i] for i in sorted(names)]}, f)
+    return data_path
+
+
+def quantized_path(path: str):
+    """
+    File the INT8 copy of an exported ONNX model is written to, next to it.
+    """
+    # Only the extension changes: the export's work directory also contains ".onnx"
+    return os.path.splitext(path)[0] + ".int8.onnx"
+
+
+def _quantize_onnx(path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized = quantized_path(path)
+    quantize_dynamic(path, quantized, weight_type=QuantType.QUInt8)
+    return quantized
+
+
+def _export_lock(target):
+    with _export_locks_lock:
+        return _export_locks.setdefault(target, threading.Lock())
@@ -1,12 +1,18 @@
-from ultralytics import YOLO
 import cv2
+from backend.models.backends import load_yolo
 
 class Detector:
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, backend: str = "torch", int8: bool = False):
         """
         Initialize the YOLOv5 detector using the Ultralytics YOLO wrapper.
+
+        Args:
+            model_path (str): Path to the PyTorch weights.
+            backend (str): Inference backend ("torch", "onnx", "openvino" or "torchscript").
+            int8 (bool): Serve INT8 weights (see ``load_yolo``).
         """
-        self.model = YOLO(model_path)
+        self.backend = backend
+        self.model = load_yolo(model_path, "detect", backend, int8)
 
     def detect_and_save(self, input_path: str, output_path: str):
         """
@@ -46,6 +52,30 @@ class Detector:
 
         return class_names, confidences, boxes
 
+    def predict(self, imgs):
+        """
+        Run detection on a batch of OpenCV images in a single forward pass.
+
+        Args:
+            imgs (List[np.ndarray]): OpenCV images (BGR format)
+
+        Returns:
+            List: One ultralytics result per input image
+        """
+        return self.model(list(imgs), verbose=False)
+
+    def predict_tensor(self, batch):
+        """
+        Run inference on an already letterboxed batch, skipping ultralytics preprocessing.
+
+        Args:
+            batch (torch.Tensor): RGB float tensor of shape (B, 3, H, W) in [0, 1], H and W multiples of 32.
+
+        Returns:
+            List: One ultralytics result per image, in letterboxed coordinates
+        """
+        return self.model(batch, verbose=False)
+
     def process(self, img):
         """
         Run detection directly on a given OpenCV image and return annotated frame and results.
@@ -56,7 +86,7 @@ class Detector:
         Returns:
             Tuple[np.ndarray, List]: Annotated image and results
         """
-        results = self.model(img)
+        results = self.predict([img])
         result = results[0]
         annotated = result.plot()
         return annotated, results
@@ -1,14 +1,19 @@
-from ultralytics import YOLO
 import cv2
 import numpy as np
+from backend.models.backends import load_yolo
 
 class PoseEstimator:
-    def __init__(self, model_path="yolov8n-pose.pt", device="cpu"):
+    def __init__(self, model_path="yolov8n-pose.pt", device="cpu", backend="torch", int8=False):
         """
         Load YOLOv8 pose estimation model.
+
+        Args:
+            backend (str): Inference backend ("torch", "onnx", "openvino" or "torchscript").
+            int8 (bool): Serve INT8 weights (see ``load_yolo``).
         """
-        self.model = YOLO(model_path)
+        self.model = load_yolo(model_path, "pose", backend, int8)
         self.device = device
+        self.backend = backend
 
     def estimate_pose(self, img):
         """
@@ -20,10 +25,34 @@ class PoseEstimator:
         Returns:
             Tuple[np.ndarray, List]: Annotated image and results
         """
-        results = self.model(img)
+        results = self.predict([img])
         annotated = results[0].plot()
         return annotated, results
 
+    def predict(self, imgs):
+        """
+        Estimate human poses on a batch of images in a single forward pass.
+
+        Args:
+            imgs (List[np.ndarray]): Input OpenCV images
+
+        Returns:
+            List: One results object per input image
+        """
+        return self.model(list(imgs), verbose=False)
+
+    def predict_tensor(self, batch):
+        """
+        Run inference on an already letterboxed batch, skipping ultralytics preprocessing.
+
+        Args:
+            batch (torch.Tensor): RGB float tensor of shape (B, 3, H, W) in [0, 1], H and W multiples of 32.
+
+        Returns:
+            List: One ultralytics result per image, in letterboxed coordinates
+        """
+        return self.model(batch, verbose=False)
+
     def process(self, img):
         """
         Unified method for compatibility with handle_image().
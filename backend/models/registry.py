@@ -0,0 +1,201 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.config import MODEL_PATHS, MODEL_BACKENDS, MODEL_INT8, MODEL_CACHE_MAX_MB, MODEL_WARMUP
+from backend.models.detector import Detector
+from backend.models.segmentor import Segmentor
+from backend.models.pose_estimator import PoseEstimator
+from backend.service.metrics import MODEL_LOAD_SECONDS, MODEL_LOADS
+
+MODEL_CLASSES = {
+    "detect": Detector,
+    "segment": Segmentor,
+    "pose": PoseEstimator,
+}
+
+
+class _Entry:
+    def __init__(self, model, size_bytes, load_seconds, warmup_seconds):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        self.loads = 1
+        self.hits = 0
+
+
+class ModelRegistry:
+    def __init__(self, model_paths=None, max_memory_mb=MODEL_CACHE_MAX_MB, warmup=MODEL_WARMUP, backends=None,
+                 int8=None):
+        """
+        Process-wide cache of loaded models shared by the image and video paths.
+
+        Models are loaded lazily on first use, optionally warmed up with a dummy
+        inference, and evicted least-recently-used first once the estimated
+        memory of all loaded models exceeds ``max_memory_mb``.
+
+        Args:
+            model_paths (dict): Default weights path per task.
+            max_memory_mb (int): Memory budget for loaded models.
+            warmup (bool): Run a dummy inference after loading.
+            backends (dict): Inference backend per task (see ``backend.models.backends``).
+            int8 (dict): Whether to serve INT8-quantized weights, per task.
+        """
+        self.model_paths = dict(model_paths or MODEL_PATHS)
+        self.backends = dict(backends or MODEL_BACKENDS)
+        self.int8 = dict(int8 or MODEL_INT8)
+        self.max_bytes = max_memory_mb * 1024 * 1024
+        self.warmup = warmup
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._history = {}
+        self._counters = {"loads": 0, "hits": 0, "evictions": 0}
+
+    def get(self, task: str, model_path: str = None):
+        """
+        Return the shared model instance for a task, loading it if needed.
+
+        Args:
+            task (str): One of "detect", "segment" or "pose".
+            model_path (str): Weights path; defaults to the configured path for the task.
+
+        Returns:
+            Detector | Segmentor | PoseEstimator: Loaded model wrapper.
+        """
+        if task not in MODEL_CLASSES:
+            raise ValueError(f"Unsupported task: {task}")
+        key = (task, model_path or self.model_paths[task])
+
+        with self._lock:
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; the others wait and then hit the cache.
+        with load_lock:
+            with self._lock:
+                model = self._lookup(key)
+                if model is not None:
+                    return model
+
+            entry = self._load(*key)
+            with self._lock:
+                self._models[key] = entry
+                self._counters["loads"] += 1
+                history = self._history.setdefault(key, {"loads": 0, "hits": 0})
+                history["loads"] += 1
+                entry.loads = history["loads"]
+                self._evict(keep=key)
+            return entry.model
+
+    def version(self, task: str, model_path: str = None):
+        """
+        Identify the weights a task would run, without loading them.
+
+        Returns:
+            str: Weights path plus its size and modification time, so replacing the file changes the
+            version, and the backend serving it.
+        """
+        if task not in MODEL_CLASSES:
+            raise ValueError(f"Unsupported task: {task}")
+        path = model_path or self.model_paths[task]
+        runtime = f"{self.backends[task]}{'-int8' if self.int8[task] else ''}"
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return f"{path}:{runtime}"
+        return f"{path}:{stat.st_size}:{stat.st_mtime_ns}:{runtime}"
+
+    def clear(self):
+        """
+        Drop every loaded model (in-flight users keep their reference).
+        """
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        """
+        Report load/hit/eviction counters and the currently loaded models.
+        """
+        with self._lock:
+            loaded = []
+            for (task, path), entry in self._models.items():
+                loaded.append({
+                    "task": task,
+                    "model_path": path,
+                    "backend": getattr(entry.model, "backend", "torch"),
+                    "size_mb": round(entry.size_bytes / (1024 * 1024), 2),
+                    "loads": entry.loads,
+                    "hits": entry.hits,
+                    "load_seconds": round(entry.load_seconds, 3),
+                    "warmup_seconds": round(entry.warmup_seconds, 3),
+                })
+            return {
+                **self._counters,
+                "memory_mb": round(self._total_bytes() / (1024 * 1024), 2),
+                "max_memory_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "loaded": loaded,
+            }
+
+    def _lookup(self, key):
+        entry = self._models.get(key)
+        if entry is None:
+            return None
+        self._models.move_to_end(key)
+        entry.hits += 1
+        self._counters["hits"] += 1
+        self._history[key]["hits"] += 1
+        return entry.model
+
+    def _load(self, task, model_path):
+        start = time.perf_counter()
+        model = MODEL_CLASSES[task](model_path, backend=self.backends[task], int8=self.int8[task])
+        load_seconds = time.perf_counter() - start
+
+        warmup_seconds = 0.0
+        if self.warmup:
+            start = time.perf_counter()
+            model.process(np.zeros((640, 640, 3), dtype=np.uint8))
+            warmup_seconds = time.perf_counter() - start
+
+        MODEL_LOADS.inc(task=task, backend=self.backends[task])
+        MODEL_LOAD_SECONDS.observe(load_seconds + warmup_seconds, task=task)
+        return _Entry(model, _estimate_size(model), load_seconds, warmup_seconds)
+
+    def _total_bytes(self):
+        return sum(entry.size_bytes for entry in self._models.values())
+
+    def _evict(self, keep):
+        while self._total_bytes() > self.max_bytes and len(self._models) > 1:
+            key = next(k for k in self._models if k != keep)
+            del self._models[key]
+            self._counters["evictions"] += 1
+
+
+def _estimate_size(model):
+    """
+    Estimate the memory held by a model wrapper from its parameters and buffers.
+    """
+    try:
+        module = model.model.model
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        pass
+    # Exported backends: fall back to the size of the weights on disk
+    try:
+        path = model.model.ckpt_path or model.model.model_name
+        if os.path.isdir(path):
+            return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        return os.path.getsize(path)
+    except Exception:
+        return 0
+
+
+registry = ModelRegistry()
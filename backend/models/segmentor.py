@@ -1,19 +1,22 @@
-from ultralytics import YOLO
 import cv2
-import torch
+from backend.models.backends import load_yolo
 
 class Segmentor:
-    def __init__(self, model_path="yolov8n-seg.pt", device="cpu"):
+    def __init__(self, model_path="yolov8n-seg.pt", device="cpu", backend="torch", int8=False):
         """
         Initialize the YOLOv8 segmentation model.
 
         Args:
             model_path (str): Path to the YOLOv8 segmentation model.
             device (str): Device to run the model on ('cpu' or 'cuda').
+            backend (str): Inference backend ("torch", "onnx", "openvino" or "torchscript").
+            int8 (bool): Serve INT8 weights (see ``load_yolo``).
         """
         self.device = device
-        self.model = YOLO(model_path)
-        self.model.to(torch.device(device))
+        self.backend = backend
+        self.model = load_yolo(model_path, "segment", backend, int8)
+        if backend == "torch":
+            self.model.to(device)
 
     def segment_and_mask(self, frame):
         """
@@ -25,12 +28,37 @@ class Segmentor:
         Returns:
             tuple: (annotated image, results object)
         """
-        # Convert BGR to RGB for model inference
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.model(rgb_frame)
+        results = self.predict([frame])
         annotated = results[0].plot()
         return annotated, results
 
+    def predict(self, frames):
+        """
+        Run instance segmentation on a batch of frames in a single forward pass.
+
+        Args:
+            frames (List[np.ndarray]): Input images in BGR format.
+
+        Returns:
+            list: One results object per input frame.
+        """
+        # Convert BGR to RGB for model inference
+        rgb_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+        return self.model(rgb_frames, verbose=False)
+
+    def predict_tensor(self, batch):
+        """
+        Run instance segmentation on an already letterboxed batch.
+
+        Args:
+            batch (torch.Tensor): RGB float tensor of shape (B, 3, H, W) in [0, 1], H and W multiples of 32.
+
+        Returns:
+            list: One results object per image, in letterboxed coordinates.
+        """
+        # Swap channels like predict() does for arrays, so both paths see the same input
+        return self.model(batch.flip(1), verbose=False)
+
     def process(self, img):
         """
         Compatibility method for handle_image().
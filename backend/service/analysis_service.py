@@ -0,0 +1,175 @@
+import datetime
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from backend.config import ANALYZE_IMGSZ, EXPORT_IMGSZ, RESULT_CACHE
+from backend.db.models import Detection
+from backend.db.writer import writer
+from backend.models.registry import MODEL_CLASSES, registry
+from backend.service.detection_service import save_source, result_to_dict
+from backend.service.history_service import build_objects
+from backend.service.metrics import STAGE_SECONDS
+from backend.service.result_cache import result_cache
+
+# One thread per task, so the requested models run side by side on the shared tensor
+_executor = ThreadPoolExecutor(max_workers=len(MODEL_CLASSES), thread_name_prefix="analyze")
+
+
+def parse_tasks(tasks):
+    """
+    Validate and de-duplicate requested tasks, keeping their order.
+    """
+    parsed = []
+    for item in tasks:
+        for task in str(item).split(","):
+            task = task.strip()
+            if not task:
+                continue
+            if task not in MODEL_CLASSES:
+                raise ValueError(f"Unsupported task: {task}")
+            if task not in parsed:
+                parsed.append(task)
+    if not parsed:
+        raise ValueError("No tasks requested")
+    return parsed
+
+
+def letterbox(img, size: int = ANALYZE_IMGSZ, stride: int = 32, square: bool = False):
+    """
+    Resize so the longer side is ``size`` and pad the shorter one up to a multiple of ``stride``,
+    like ultralytics' own rectangular letterbox (gray 114 border), or up to ``size`` when ``square``.
+
+    Returns:
+        tuple: (RGB float tensor of shape (1, 3, H, W) in [0, 1], scale ratio, (pad x, pad y)).
+    """
+    import torch  # deferred: importing torch dominates API startup
+
+    height, width = img.shape[:2]
+    ratio = min(size / height, size / width)
+    new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+    resized = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR) if ratio != 1 else img
+    if square:
+        out_w = out_h = size
+    else:
+        out_w, out_h = -(-new_w // stride) * stride, -(-new_h // stride) * stride
+    pad_x, pad_y = (out_w - new_w) / 2, (out_h - new_h) / 2
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    padded = cv2.copyMakeBorder(resized, top, out_h - new_h - top, left, out_w - new_w - left,
+                                cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    rgb = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB)
+    tensor = torch.from_numpy(rgb).permute(2, 0, 1).unsqueeze(0).float().div_(255.0)
+    return tensor, ratio, (left, top)
+
+
+def unletterbox(data: dict, ratio: float, pad, image_size):
+    """
+    Map boxes, mask polygons and keypoints of a result dict from letterboxed to original image coordinates.
+    """
+    height, width = image_size
+    offset = np.array(pad, dtype=np.float32)
+    limit = np.array([width, height], dtype=np.float32)
+
+    def to_original(points):
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        return np.clip((points - offset) / ratio, 0, limit)
+
+    data = dict(data, image_size=[height, width])
+    data["bboxes"] = [to_original(box).reshape(-1).tolist() for box in data["bboxes"]]
+    if "masks" in data:
+        data["masks"] = [np.round(to_original(polygon), 1).tolist() for polygon in data["masks"]]
+    if "keypoints" in data:
+        keypoints = []
+        for person in data["keypoints"]:
+            person = np.asarray(person, dtype=np.float32).reshape(-1, 3)
+            person[:, :2] = to_original(person[:, :2])
+            keypoints.append(person.tolist())
+        data["keypoints"] = keypoints
+    return data
+
+
+def handle_analyze(image_bytes: bytes, tasks, filename: str = None):
+    """
+    Run several tasks on one image: decode and letterbox once, then run the models concurrently
+    on the shared tensor and store a single merged record.
+
+    Returns:
+        dict: Detection ID, per-task results in original image coordinates and stage timings.
+    """
+    tasks = parse_tasks(tasks)
+    if RESULT_CACHE:
+        versions = [registry.version(task) for task in tasks]
+        key = result_cache.key(image_bytes, "analyze", *tasks, *versions)
+        compute = lambda: _run_analyze(image_bytes, tasks, filename)
+        result, cached = result_cache.get_or_compute(key, compute)
+    else:
+        result, cached = _run_analyze(image_bytes, tasks, filename), False
+
+    # One record: boxes of the first task, plus masks and keypoints when requested
+    detection_id = uuid.uuid4()
+    timestamp = datetime.datetime.utcnow()
+    primary = result["results"][tasks[0]]
+    task_name = "+".join(tasks)
+    writer.submit(Detection(
+        id=detection_id,
+        timestamp=timestamp,
+        filename=filename,
+        task=task_name,
+        class_names=primary["class_names"],
+        confidences=primary["confidences"],
+        bboxes=primary["bboxes"],
+        masks=result["results"].get("segment", {}).get("masks"),
+        keypoints=result["results"].get("pose", {}).get("keypoints"),
+        source_path=result["source_path"],
+        objects=build_objects(
+            primary["class_names"], primary["confidences"], primary["bboxes"], timestamp, filename, task_name
+        ),
+    ))
+
+    response = {"detection_id": detection_id.hex, "cached": cached}
+    response.update((k, v) for k, v in result.items() if k != "source_path")
+    return response
+
+
+def _run_analyze(image_bytes: bytes, tasks, filename: str = None):
+    timings = {}
+    start = time.perf_counter()
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Failed to decode image bytes")
+    timings["decode_ms"] = 1000 * (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    # TorchScript exports are traced for a fixed square input
+    square = any(registry.backends.get(task) == "torchscript" for task in tasks)
+    tensor, ratio, pad = letterbox(img, size=EXPORT_IMGSZ if square else ANALYZE_IMGSZ, square=square)
+    timings["letterbox_ms"] = 1000 * (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    futures = {task: _executor.submit(_infer, task, tensor) for task in tasks}
+    results = {}
+    for task, future in futures.items():
+        data, infer_ms = future.result()
+        results[task] = unletterbox(data, ratio, pad, img.shape[:2])
+        timings[f"{task}_ms"] = infer_ms
+    timings["inference_ms"] = 1000 * (time.perf_counter() - start)
+    for name, value in timings.items():
+        STAGE_SECONDS.observe(value / 1000, stage=f"analyze_{name[:-3]}")
+
+    return {
+        "tasks": tasks,
+        "image_size": list(img.shape[:2]),
+        "results": results,
+        "timings_ms": {name: round(value, 3) for name, value in timings.items()},
+        "source_path": save_source(image_bytes, filename),
+    }
+
+
+def _infer(task, tensor):
+    start = time.perf_counter()
+    result = registry.get(task).predict_tensor(tensor)[0]
+    data = result_to_dict(result, task)
+    return data, 1000 * (time.perf_counter() - start)
@@ -0,0 +1,209 @@
+import datetime
+import json
+import os
+import queue
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from backend.config import BULK_BATCH_SIZE, BULK_PREFETCH
+from backend.db.models import Detection
+from backend.db.writer import writer
+from backend.models.registry import MODEL_CLASSES, registry
+from backend.service.detection_service import result_to_dict
+from backend.service.encoding import compact_result
+from backend.service.history_service import build_objects
+from backend.service.preprocessing import get_preprocessor
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+_DONE = object()
+
+
+def iter_entries(files):
+    """
+    Yield ``(name, bytes)`` for every image in the uploads, one at a time.
+
+    Zip and tar archives are read member by member from the upload stream without
+    being extracted to disk; any other upload is treated as a single image.
+
+    Args:
+        files (list): ``(filename, file object)`` pairs.
+    """
+    for filename, fileobj in files:
+        lower = (filename or "").lower()
+        if lower.endswith(".zip") or (not lower.endswith(TAR_EXTENSIONS) and _is_zip(fileobj)):
+            with zipfile.ZipFile(fileobj) as archive:
+                for member in archive.infolist():
+                    if not member.is_dir() and _is_image(member.filename):
+                        yield f"{filename}/{member.filename}", archive.read(member)
+        elif lower.endswith(TAR_EXTENSIONS):
+            # Stream mode reads members sequentially, without seeking back
+            with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+                for member in archive:
+                    if member.isfile() and _is_image(member.name):
+                        yield f"{filename}/{member.name}", archive.extractfile(member).read()
+        else:
+            yield filename, fileobj.read()
+
+
+def _is_image(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS) and not os.path.basename(name).startswith(".")
+
+
+def _is_zip(fileobj):
+    position = fileobj.tell()
+    try:
+        return zipfile.is_zipfile(fileobj)
+    finally:
+        fileobj.seek(position)
+
+
+def stream_batch(files, task: str, batch_size: int = BULK_BATCH_SIZE, prefetch: int = BULK_PREFETCH,
+                 preprocess: str = ""):
+    """
+    Run a task over many images and yield one NDJSON line per image, then a summary line.
+
+    A decoder thread reads and decodes entries ahead of the model (at most
+    ``prefetch`` images wait in memory); decoded images are sent to the model
+    ``batch_size`` at a time and their records committed in bulk. The ``preprocess``
+    spec, if any, is applied on the decoder thread, off the model's critical path.
+
+    Yields:
+        str: JSON lines terminated by a newline.
+    """
+    if task not in MODEL_CLASSES:
+        raise ValueError(f"Unsupported task: {task}")
+    batch_size = max(1, batch_size)
+    decoded = queue.Queue(maxsize=max(batch_size, prefetch))
+    stop = threading.Event()
+    preprocessor = get_preprocessor(preprocess) if preprocess else None
+
+    def put(item):
+        # Give up once the consumer is gone, so an abandoned stream cannot block this thread
+        while not stop.is_set():
+            try:
+                decoded.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decode():
+        try:
+            for index, (name, data) in enumerate(iter_entries(files)):
+                img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                if img is not None and preprocessor is not None:
+                    preprocessor.apply(img, out=img)
+                if not put((index, name, img)):
+                    return
+        except Exception as e:
+            put((None, None, e))
+        put(_DONE)
+
+    decoder = threading.Thread(target=decode, name=f"batch-decode-{task}", daemon=True)
+    decoder.start()
+
+    start = time.perf_counter()
+    counts = {"images": 0, "failed": 0}
+    class_counts = Counter()
+    try:
+        # Inside the try, so a failed model load still stops the decoder thread
+        model = registry.get(task)
+        done = False
+        while not done:
+            batch = []
+            while len(batch) < batch_size:
+                # Block for the first image only; run whatever else is already decoded
+                try:
+                    item = decoded.get() if not batch else decoded.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                index, name, img = item
+                if isinstance(img, Exception):
+                    counts["failed"] += 1
+                    yield _line({"error": f"Failed to read upload: {img}"})
+                elif img is None:
+                    counts["failed"] += 1
+                    yield _line({"index": index, "name": name, "error": "Failed to decode image bytes"})
+                else:
+                    batch.append((index, name, img))
+            if not batch:
+                continue
+
+            try:
+                results = _predict_by_shape(model, [img for _, _, img in batch])
+            except Exception as e:
+                counts["failed"] += len(batch)
+                for index, name, _ in batch:
+                    yield _line({"index": index, "name": name, "error": str(e)})
+                continue
+
+            timestamp = datetime.datetime.utcnow()
+            records, lines = [], []
+            for (index, name, _), result in zip(batch, results):
+                data = result_to_dict(result, task)
+                detection_id = uuid.uuid4()
+                records.append(Detection(
+                    id=detection_id,
+                    timestamp=timestamp,
+                    filename=name,
+                    task=task,
+                    class_names=data["class_names"],
+                    confidences=data["confidences"],
+                    bboxes=data["bboxes"],
+                    masks=data.get("masks"),
+                    keypoints=data.get("keypoints"),
+                    objects=build_objects(
+                        data["class_names"], data["confidences"], data["bboxes"], timestamp, name, task
+                    ),
+                ))
+                counts["images"] += 1
+                class_counts.update(data["class_names"])
+                lines.append(_line({"index": index, "name": name, "detection_id": detection_id.hex,
+                                    **compact_result(data)}))
+            # Queue the records before streaming, so a client that disconnects does not lose them
+            writer.submit(records)
+            yield from lines
+    finally:
+        stop.set()
+
+    elapsed = time.perf_counter() - start
+    yield _line({"summary": {
+        "task": task,
+        **counts,
+        "seconds": round(elapsed, 3),
+        "images_per_second": round(counts["images"] / elapsed, 2) if elapsed > 0 else 0.0,
+        "class_counts": dict(class_counts),
+    }})
+
+
+def _predict_by_shape(model, imgs):
+    """
+    Run one model call per distinct image shape.
+
+    Mixed shapes in one call are all padded to a square input, which costs more
+    than the batching saves; same-shaped images keep the tighter rectangular input.
+    """
+    groups = {}
+    for position, img in enumerate(imgs):
+        groups.setdefault(img.shape, []).append(position)
+    results = [None] * len(imgs)
+    for positions in groups.values():
+        for position, result in zip(positions, model.predict([imgs[p] for p in positions])):
+            results[position] = result
+    return results
+
+
+def _line(payload):
+    return json.dumps(payload, separators=(",", ":")) + "\n"
@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+from backend.config import BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+from backend.models.registry import MODEL_CLASSES, registry
+from backend.service.metrics import STAGE_SECONDS
+
+
+class _Request:
+    def __init__(self, img):
+        self.img = img
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchScheduler:
+    def __init__(self, task: str, max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        """
+        Micro-batching queue in front of one task's model.
+
+        Requests are gathered until ``max_batch_size`` images are waiting or the
+        oldest one has waited ``max_wait_ms``, then run in a single forward pass
+        and the per-image results are handed back to each caller.
+
+        Args:
+            task (str): One of "detect", "segment" or "pose".
+            max_batch_size (int): Largest batch sent to the model.
+            max_wait_ms (float): Longest time the first request of a batch waits for company.
+        """
+        self.task = task
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._batch_sizes = Counter()
+        self._images = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._errors = 0
+
+    def submit(self, img) -> Future:
+        """
+        Queue an image for inference.
+
+        Returns:
+            Future: Resolves to the ultralytics result for this image.
+        """
+        self._ensure_worker()
+        request = _Request(img)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, img):
+        """
+        Queue an image and block until its result is available.
+        """
+        return self.submit(img).result()
+
+    def stats(self):
+        """
+        Report batch size distribution and queue-wait statistics.
+        """
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "batches": batches,
+                "images": self._images,
+                "errors": self._errors,
+                "queue_depth": self._queue.qsize(),
+                "mean_batch_size": round(self._images / batches, 2) if batches else 0.0,
+                "batch_sizes": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "mean_wait_ms": round(1000 * self._wait_total / self._images, 3) if self._images else 0.0,
+                "max_wait_ms": round(1000 * self._wait_max, 3),
+            }
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"batcher-{self.task}", daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                model = registry.get(self.task)
+                results = model.predict([request.img for request in batch])
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage=f"{self.task}_inference")
+            except Exception as e:
+                with self._lock:
+                    self._errors += len(batch)
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                self._images += len(batch)
+                for request in batch:
+                    wait = started - request.enqueued_at
+                    STAGE_SECONDS.observe(wait, stage=f"{self.task}_queue_wait")
+                    self._wait_total += wait
+                    self._wait_max = max(self._wait_max, wait)
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(task: str) -> BatchScheduler:
+    """
+    Return the shared batching queue for a task.
+    """
+    if task not in MODEL_CLASSES:
+        raise ValueError(f"Unsupported task: {task}")
+    with _schedulers_lock:
+        if task not in _schedulers:
+            _schedulers[task] = BatchScheduler(task)
+        return _schedulers[task]
+
+
+def batching_stats():
+    with _schedulers_lock:
+        return {task: scheduler.stats() for task, scheduler in _schedulers.items()}
@@ -1,18 +1,31 @@
 import cv2
+import datetime
+import hashlib
 import os
 import uuid
 import numpy as np
+from sqlalchemy import update
+from backend.config import (
+    RESULT_CACHE, RESULTS_DIR, SOURCES_DIR, MASK_SIMPLIFY_EPSILON, TILE_BATCH_SIZE, TILE_FULL_FRAME, TILE_OVERLAP, TILE_SIZE,
+)
 from backend.db.session import SessionLocal
+from backend.db.writer import writer
 from backend.db.models import Detection
-from backend.models.detector import Detector
-from backend.models.segmentor import Segmentor
-from backend.models.pose_estimator import PoseEstimator
+from backend.models.registry import registry
+from backend.service.batching import get_scheduler
+from backend.service.encoding import simplify_polygon
+from backend.service.history_service import build_objects
+from backend.service.preprocessing import get_preprocessor
+from backend.service.metrics import span
+from backend.service.rendering import draw_detections
+from backend.service.result_cache import result_cache
+from backend.service.tiling import merge_results, offset_result, tile_grid
 
 def detect_from_video(video_path, output_dir, model_path="models/yolov8n.pt"):
     """
     Run YOLO object detection on each frame of the input video.
     """
-    detector = Detector(model_path)
+    detector = registry.get("detect", model_path)
     cap = cv2.VideoCapture(video_path)
     frame_idx = 0
 
@@ -31,63 +44,231 @@ def detect_from_video(video_path, output_dir, model_path="models/yolov8n.pt"):
     return f"Processed {frame_idx} frames."
 
 
-def handle_image(image_bytes: bytes, task: str, filename: str = None):
+def handle_image(image_bytes: bytes, task: str, filename: str = None, render: bool = True, tiled: bool = False,
+                 preprocess: str = ""):
     """
     Handle image processing for detection, segmentation, or pose estimation.
+
+    Results are cached by the image bytes, task and model version, so a repeated
+    upload returns the stored detections and annotated image without running the model.
+
+    Args:
+        render (bool): Draw and save the annotated image. When False only the structured
+            results are returned and ``GET /render/{detection_id}`` draws the image on demand.
+        tiled (bool): Run the model on overlapping tiles at full resolution (see ``predict_tiled``).
+        preprocess (str): Canonical preprocessing spec (see ``resolve_preprocess``); empty for none.
+    """
+    if RESULT_CACHE:
+        key = result_cache.key(image_bytes, task, registry.version(task), "render" if render else "json",
+                               *(("tiled", TILE_SIZE, TILE_OVERLAP, TILE_FULL_FRAME) if tiled else ()),
+                               *(("preprocess", preprocess) if preprocess else ()))
+        compute = lambda: _run_image(image_bytes, task, render, filename, tiled, preprocess)
+        result, cached = result_cache.get_or_compute(key, compute)
+        if cached and not all(os.path.exists(p) for p in (result["result_path"], result["source_path"]) if p):
+            # Files behind the entry were cleaned up; recompute it
+            result_cache.invalidate(key)
+            result, cached = result_cache.get_or_compute(key, compute)
+    else:
+        result, cached = _run_image(image_bytes, task, render, filename, tiled, preprocess), False
+
+    # Store results in database (committed in bulk by the background writer), with one
+    # indexed row per object carrying its class label
+    detection_id = uuid.uuid4()
+    timestamp = datetime.datetime.utcnow()
+    writer.submit(Detection(
+        id=detection_id,
+        timestamp=timestamp,
+        filename=filename,
+        task=task,
+        class_names=result["class_names"],
+        confidences=result["confidences"],
+        bboxes=result["bboxes"],
+        masks=result.get("masks"),
+        keypoints=result.get("keypoints"),
+        result_path=result["result_path"],
+        source_path=result["source_path"],
+        objects=build_objects(
+            result["class_names"], result["confidences"], result["bboxes"], timestamp, filename, task
+        ),
+    ))
+
+    response = {"detection_id": detection_id.hex, "cached": cached}
+    response.update((k, v) for k, v in result.items() if k != "source_path")
+    return response
+
+
+def _run_image(image_bytes: bytes, task: str, render: bool = True, filename: str = None, tiled: bool = False,
+               preprocess: str = ""):
+    """
+    Decode, infer and, when ``render`` is set, save the annotated image.
+
+    Returns:
+        dict: JSON-serializable detections and the annotated (or source) image path.
     """
     # Decode image bytes to OpenCV format
-    nparr = np.frombuffer(image_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    with span("decode"):
+        nparr = np.frombuffer(image_bytes, np.uint8)
+        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
     if img is None:
         raise ValueError("Failed to decode image bytes")
+    if preprocess:
+        # The decoded image is ours, so it is corrected in place
+        with span("preprocess"):
+            get_preprocessor(preprocess).apply(img, out=img)
+
+    if tiled:
+        # Tiles are batched by predict_tiled itself rather than through the shared queue
+        with span(f"{task}_tiled_predict"):
+            data = predict_tiled(img, task)
+        plot = lambda: draw_detections(img.copy(), data["class_names"], data["confidences"], data["bboxes"],
+                                       masks=data.get("masks"), keypoints=data.get("keypoints"))
+    else:
+        # Run inference through the task's batching queue so concurrent requests share a forward pass
+        with span(f"{task}_predict"):
+            result = get_scheduler(task).predict(img)
+        with span("serialize"):
+            data = result_to_dict(result, task)
+        # Draw on the BGR image: the segmentor keeps an RGB copy as orig_img
+        plot = lambda: result.plot(img=img)
 
-    # Select the appropriate model
-    if task == "detect":
-        model = Detector("models/yolov8n.pt")
-    elif task == "segment":
-        model = Segmentor("models/yolov8n-seg.pt")
-    elif task == "pose":
-        model = PoseEstimator("models/yolov8n-pose.pt")
+    output_path = None
+    source_path = None
+    if render:
+        # Save result
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIR, f"{uuid.uuid4().hex}.jpg")
+        with span("plot"):
+            annotated = plot()
+        with span("imwrite"):
+            cv2.imwrite(output_path, annotated)
     else:
-        raise ValueError(f"Unsupported task: {task}")
-
-    # Run inference
-    annotated, results = model.process(img)
-
-    # Save result
-    os.makedirs("results", exist_ok=True)
-    output_path = f"results/{uuid.uuid4().hex}.jpg"
-    cv2.imwrite(output_path, annotated)
-
-    # Extract detection details if available
-    class_names = []
-    confidences = []
-    bboxes = []
-    if hasattr(results[0], "boxes"):
-        boxes = results[0].boxes
-        if hasattr(boxes, "cls"):
-            class_names = [str(cls_id) for cls_id in boxes.cls.tolist()]
-        if hasattr(boxes, "conf"):
-            confidences = boxes.conf.tolist()
-        if hasattr(boxes, "xyxy"):
-            bboxes = boxes.xyxy.tolist()
-
-    # Store results in database
+        # Keep the upload as is (no re-encoding) so it can be rendered later
+        with span("save_source"):
+            source_path = save_source(image_bytes, filename)
+
+    return {
+        "result_path": output_path,
+        "source_path": source_path,
+        **data,
+    }
+
+
+def result_to_dict(result, task: str):
+    """
+    Structured detections of one ultralytics result: class labels and IDs, confidences,
+    xyxy boxes and, per task, simplified mask polygons or keypoints in image coordinates.
+    """
+    boxes = result.boxes
+    class_ids = [int(cls_id) for cls_id in boxes.cls.tolist()]
+    data = {
+        "image_size": list(result.orig_shape[:2]),
+        "class_names": [result.names[cls_id] for cls_id in class_ids],
+        "class_ids": class_ids,
+        "confidences": boxes.conf.tolist(),
+        "bboxes": boxes.xyxy.tolist(),
+    }
+    if task == "segment":
+        masks = result.masks.xy if result.masks is not None else []
+        data["masks"] = [
+            np.round(simplify_polygon(polygon, MASK_SIMPLIFY_EPSILON), 1).tolist() for polygon in masks
+        ]
+    if task == "pose":
+        data["keypoints"] = result.keypoints.data.tolist() if result.keypoints is not None else []
+    return data
+
+
+def predict_tiled(img, task: str, tile_size: int = TILE_SIZE, overlap: float = TILE_OVERLAP,
+                  batch_size: int = TILE_BATCH_SIZE, full_frame: bool = TILE_FULL_FRAME):
+    """
+    Detect small objects in a large image by running the model on overlapping full-resolution tiles.
+
+    Tiles are sent to the model ``batch_size`` at a time. The boxes, mask polygons and
+    keypoints of each tile are mapped back to image coordinates, and duplicates from
+    overlapping tiles are merged with cross-tile NMS. With ``full_frame``, the whole
+    downscaled image also goes through the model, so objects larger than a tile survive.
+
+    Returns:
+        dict: Result dict in the format of ``result_to_dict``, plus the number of ``tiles``.
+    """
+    model = registry.get(task)
+    height, width = img.shape[:2]
+    tiles = tile_grid(height, width, tile_size, overlap)
+    if len(tiles) == 1:
+        return {**result_to_dict(model.predict([img])[0], task), "tiles": 1}
+
+    parts = []
+    for start in range(0, len(tiles), max(1, batch_size)):
+        batch = tiles[start:start + max(1, batch_size)]
+        results = model.predict([img[y0:y1, x0:x1] for x0, y0, x1, y1 in batch])
+        for (x0, y0, _, _), result in zip(batch, results):
+            parts.append(offset_result(result_to_dict(result, task), x0, y0))
+    if full_frame:
+        parts.append(result_to_dict(model.predict([img])[0], task))
+    return {**merge_results(parts, (height, width)), "tiles": len(tiles)}
+
+
+def save_source(image_bytes: bytes, filename: str = None):
+    extension = os.path.splitext(filename or "")[1].lower() or ".jpg"
+    os.makedirs(SOURCES_DIR, exist_ok=True)
+    # Content-addressed, so repeated uploads share one file
+    path = os.path.join(SOURCES_DIR, hashlib.sha256(image_bytes).hexdigest() + extension)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(image_bytes)
+        os.replace(tmp_path, path)
+    return path
+
+
+def render_detection(detection_id: str):
+    """
+    Annotated image of a stored image detection, drawn from its stored results on first request.
+
+    Returns:
+        str | None: Path of the annotated image, or None if the detection is unknown or
+        has no image to draw on.
+    """
+    try:
+        record_id = uuid.UUID(detection_id)
+    except ValueError:
+        return None
+    record = _get_detection(record_id)
+    if record is None:
+        # It may still be waiting in the writer queue
+        writer.flush()
+        record = _get_detection(record_id)
+    if record is None:
+        return None
+    if record.result_path and os.path.exists(record.result_path):
+        return record.result_path
+    if not record.source_path:
+        return None
+
+    img = cv2.imread(record.source_path, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    draw_detections(img, record.class_names or [], record.confidences or [], record.bboxes or [],
+                    masks=record.masks, keypoints=record.keypoints)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output_path = os.path.join(RESULTS_DIR, f"{record_id.hex}.jpg")
+    tmp_path = os.path.join(RESULTS_DIR, f"{record_id.hex}.{uuid.uuid4().hex}.jpg")
+    cv2.imwrite(tmp_path, img)
+    os.replace(tmp_path, output_path)
+
+    # Cache the rendering on the record
     session = SessionLocal()
     try:
-        detection_entry = Detection(
-            filename=filename,
-            class_names=class_names,
-            confidences=confidences,
-            bboxes=bboxes,
-            result_path=output_path,
-        )
-        session.add(detection_entry)
+        session.execute(update(Detection).where(Detection.id == record_id).values(result_path=output_path))
         session.commit()
     finally:
         session.close()
+    return output_path
 
-    return {
-        "result_path": output_path,
-        "class_names": class_names
-    }
+
+def _get_detection(record_id):
+    session = SessionLocal()
+    try:
+        return session.get(Detection, record_id)
+    finally:
+        session.close()
@@ -0,0 +1,235 @@
+import base64
+import io
+import json
+
+import cv2
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for Accept: application/msgpack
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+NPY = "application/x-npy"
+MEDIA_TYPES = {
+    "application/json": JSON,
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/x-npy": NPY,
+    "application/octet-stream": NPY,
+}
+MASK_FORMATS = ("polygon", "rle")
+
+
+class NotAcceptableError(ValueError):
+    pass
+
+
+def negotiate(accept: str = None):
+    """
+    Pick the response media type from an Accept header (JSON when absent or ``*/*``).
+
+    Raises:
+        NotAcceptableError: If none of the accepted types is supported.
+    """
+    if not accept:
+        return JSON
+    candidates = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        candidates.append((-quality, position, media_type.lower()))
+    for quality, _, media_type in sorted(candidates):
+        if quality == 0:
+            break
+        if media_type in ("*/*", "application/*"):
+            return JSON
+        if media_type in MEDIA_TYPES and (MEDIA_TYPES[media_type] != MSGPACK or msgpack is not None):
+            return MEDIA_TYPES[media_type]
+    raise NotAcceptableError(f"Supported media types: {', '.join(sorted(MEDIA_TYPES))}")
+
+
+def simplify_polygon(points, epsilon: float):
+    """
+    Douglas-Peucker simplification of a closed polygon; ``epsilon`` is the largest deviation in pixels.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    if epsilon <= 0 or len(points) <= 3:
+        return points
+    simplified = cv2.approxPolyDP(points.reshape(-1, 1, 2), epsilon, True).reshape(-1, 2)
+    return simplified if len(simplified) >= 3 else points
+
+
+def polygon_mask(polygon, size):
+    """
+    Rasterize one polygon into a uint8 mask of ``size`` (height, width).
+    """
+    mask = np.zeros(tuple(size), dtype=np.uint8)
+    points = np.round(np.asarray(polygon, dtype=np.float32).reshape(-1, 2)).astype(np.int32)
+    if len(points) >= 3:
+        cv2.fillPoly(mask, [points], 1)
+    return mask
+
+
+def rle_encode(mask):
+    """
+    COCO-style uncompressed RLE: run lengths over the column-major flattened mask, starting with zeros.
+    """
+    flat = np.asarray(mask, dtype=np.uint8).ravel(order="F")
+    changes = np.flatnonzero(np.diff(flat)) + 1
+    boundaries = np.concatenate(([0], changes, [flat.size]))
+    counts = np.diff(boundaries)
+    if flat.size and flat[0]:
+        counts = np.concatenate(([0], counts))
+    return {"size": [int(mask.shape[0]), int(mask.shape[1])], "counts": counts.tolist()}
+
+
+def polygon_rle(polygon, size):
+    """
+    RLE of a rasterized polygon, equal to ``rle_encode(polygon_mask(polygon, size))``.
+
+    Only the columns spanned by the polygon are rasterized; the empty columns on
+    either side are added as zero runs.
+    """
+    height, width = size
+    # Round before shifting so pixels match polygon_mask exactly
+    points = np.round(np.asarray(polygon, dtype=np.float32).reshape(-1, 2))
+    if len(points) < 3:
+        return {"size": [height, width], "counts": [height * width]}
+    x0 = int(np.clip(np.floor(points[:, 0].min()), 0, width))
+    x1 = int(np.clip(np.ceil(points[:, 0].max()) + 1, x0, width))
+    strip = polygon_mask(points - [x0, 0], (height, x1 - x0))
+    counts = rle_encode(strip)["counts"] if x1 > x0 else [0]
+    counts[0] += x0 * height
+    if len(counts) % 2:
+        counts[-1] += (width - x1) * height
+    else:
+        counts.append((width - x1) * height)
+    return {"size": [height, width], "counts": counts}
+
+
+def rle_decode(rle):
+    height, width = rle["size"]
+    values = np.arange(len(rle["counts"])) % 2
+    flat = np.repeat(values.astype(np.uint8), rle["counts"])
+    return flat.reshape((height, width), order="F")
+
+
+def pack_array(array, dtype=np.float32, binary: bool = False):
+    """
+    Pack an array as dtype, shape and little-endian bytes (base64 text unless ``binary``).
+    """
+    array = np.ascontiguousarray(array, dtype=np.dtype(dtype).newbyteorder("<"))
+    data = array.tobytes()
+    return {
+        "dtype": array.dtype.str,
+        "shape": list(array.shape),
+        "data": data if binary else base64.b64encode(data).decode("ascii"),
+    }
+
+
+def unpack_array(packed):
+    data = packed["data"]
+    if isinstance(data, str):
+        data = base64.b64decode(data)
+    return np.frombuffer(data, dtype=np.dtype(packed["dtype"])).reshape(packed["shape"])
+
+
+def compact_result(result: dict, mask_format: str = "polygon", binary: bool = False):
+    """
+    Replace mask polygons and keypoint lists of an image result by compact encodings.
+
+    Masks become RLE (``mask_format="rle"``) or stay as the stored simplified polygons;
+    keypoints become a packed float32 array of shape (N, K, 3).
+    """
+    if mask_format not in MASK_FORMATS:
+        raise ValueError(f"Unsupported mask format: {mask_format}")
+    compact = dict(result)
+    if compact.get("masks") is not None and mask_format == "rle":
+        size = compact["image_size"]
+        compact["masks"] = [polygon_rle(polygon, size) for polygon in compact["masks"]]
+    if compact.get("keypoints") is not None:
+        keypoints = np.asarray(compact["keypoints"], dtype=np.float32)
+        if keypoints.ndim != 3:
+            keypoints = keypoints.reshape(0, 0, 3)
+        compact["keypoints"] = pack_array(keypoints, binary=binary)
+    compact["mask_format"] = mask_format
+    return compact
+
+
+def encode_result(result: dict, media_type: str = JSON, mask_format: str = "polygon"):
+    """
+    Serialize an image result for the negotiated media type.
+
+    ``application/x-npy`` carries the task's main array (keypoints for pose, bit-packed
+    masks for segmentation, ``[x1, y1, x2, y2, conf, class]`` rows otherwise); the
+    detection ID, class names and image size are sent as headers.
+
+    Returns:
+        tuple: (body bytes, extra response headers).
+    """
+    if media_type == NPY:
+        return _encode_npy(result)
+    compact = compact_result(result, mask_format, binary=media_type == MSGPACK)
+    if media_type == MSGPACK:
+        if msgpack is None:
+            raise NotAcceptableError("msgpack is not installed")
+        return msgpack.packb(compact, use_bin_type=True), {}
+    return json.dumps(compact, separators=(",", ":")).encode(), {}
+
+
+def _encode_npy(result):
+    if result.get("keypoints") is not None:
+        array = np.asarray(result["keypoints"], dtype=np.float32)
+        if array.ndim != 3:
+            array = array.reshape(0, 0, 3)
+    elif result.get("masks") is not None:
+        height, width = result["image_size"]
+        masks = [polygon_mask(polygon, (height, width)) for polygon in result["masks"]]
+        stacked = np.stack(masks) if masks else np.zeros((0, height, width), dtype=np.uint8)
+        # One bit per pixel; unpack with np.unpackbits(array, axis=-1, count=width)
+        array = np.packbits(stacked, axis=-1)
+    else:
+        array = np.column_stack([
+            np.asarray(result["bboxes"], dtype=np.float32).reshape(-1, 4),
+            np.asarray(result["confidences"], dtype=np.float32),
+            np.asarray(result["class_ids"], dtype=np.float32),
+        ]) if result["class_names"] else np.zeros((0, 6), dtype=np.float32)
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    headers = {
+        "X-Detection-Id": str(result.get("detection_id", "")),
+        "X-Class-Names": json.dumps(result["class_names"]),
+        "X-Image-Size": json.dumps(result.get("image_size")),
+    }
+    return buffer.getvalue(), headers
+
+
+def encode_analysis(result: dict, media_type: str = JSON, mask_format: str = "polygon"):
+    """
+    Serialize a multi-task ``/analyze`` result, compacting each task's masks and keypoints.
+
+    Returns:
+        tuple: (body bytes, extra response headers).
+    """
+    if media_type == NPY:
+        raise NotAcceptableError("Multi-task results are available as JSON or msgpack")
+    binary = media_type == MSGPACK
+    compact = dict(result, mask_format=mask_format)
+    compact["results"] = {
+        task: compact_result(dict(data, image_size=result["image_size"]), mask_format, binary=binary)
+        for task, data in result["results"].items()
+    }
+    if binary:
+        if msgpack is None:
+            raise NotAcceptableError("msgpack is not installed")
+        return msgpack.packb(compact, use_bin_type=True), {}
+    return json.dumps(compact, separators=(",", ":")).encode(), {}
@@ -0,0 +1,158 @@
+import base64
+import binascii
+import datetime
+import uuid
+
+from sqlalchemy import and_, or_, select
+
+from backend.config import HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE
+from backend.db.models import Detection, DetectionObject
+from backend.db.session import SessionLocal
+
+
+def build_objects(class_names, confidences, bboxes, timestamp, filename=None, task=None):
+    """
+    Normalized per-object rows for a detection.
+    """
+    return [
+        DetectionObject(
+            timestamp=timestamp,
+            filename=filename,
+            task=task,
+            class_name=class_name,
+            confidence=confidence,
+            x1=box[0], y1=box[1], x2=box[2], y2=box[3],
+        )
+        for class_name, confidence, box in zip(class_names, confidences, bboxes)
+    ]
+
+
+def encode_cursor(detection):
+    raw = f"{detection.timestamp.isoformat()}|{detection.id.hex}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """
+    Returns:
+        tuple: (timestamp, detection id) of the last item of the previous page.
+    """
+    try:
+        timestamp, detection_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.datetime.fromisoformat(timestamp), uuid.UUID(detection_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def query_detections(class_name: str = None, min_confidence: float = None, max_confidence: float = None,
+                     since: datetime.datetime = None, until: datetime.datetime = None, task: str = None,
+                     filename: str = None, cursor: str = None, limit: int = HISTORY_PAGE_SIZE):
+    """
+    Page through detections, newest first, using keyset pagination on (timestamp, id).
+
+    Class and confidence filters match detections with at least one object that
+    satisfies all of them, probed per candidate through the indexes on ``detection_objects``.
+
+    Returns:
+        dict: ``items`` for this page and ``next_cursor`` (None on the last page).
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    query = select(Detection)
+
+    if task is not None:
+        query = query.where(Detection.task == task)
+    if filename is not None:
+        query = query.where(Detection.filename == filename)
+    if since is not None:
+        query = query.where(Detection.timestamp >= since)
+    if until is not None:
+        query = query.where(Detection.timestamp < until)
+
+    object_filters = []
+    if class_name is not None:
+        object_filters.append(DetectionObject.class_name == class_name)
+    if min_confidence is not None:
+        object_filters.append(DetectionObject.confidence >= min_confidence)
+    if max_confidence is not None:
+        object_filters.append(DetectionObject.confidence <= max_confidence)
+    if object_filters:
+        # Correlated EXISTS: the keyset scan over detections stops after one page, so only
+        # the candidates of that page are probed instead of every matching object row
+        object_filters.append(DetectionObject.detection_id == Detection.id)
+        if class_name is not None:
+            # Object rows copy their detection's timestamp, so one seek on the
+            # (class_name, timestamp, detection_id) index answers the probe
+            object_filters.append(DetectionObject.timestamp == Detection.timestamp)
+        query = query.where(select(DetectionObject.id).where(*object_filters).exists())
+
+    if cursor:
+        timestamp, detection_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Detection.timestamp < timestamp,
+            and_(Detection.timestamp == timestamp, Detection.id < detection_id),
+        ))
+
+    query = query.order_by(Detection.timestamp.desc(), Detection.id.desc()).limit(limit + 1)
+
+    session = SessionLocal()
+    try:
+        rows = session.execute(query).scalars().all()
+    finally:
+        session.close()
+
+    page = rows[:limit]
+    return {
+        "items": [_to_dict(row) for row in page],
+        "next_cursor": encode_cursor(page[-1]) if len(rows) > limit else None,
+    }
+
+
+def backfill_objects(batch_size: int = 500):
+    """
+    Populate ``detection_objects`` from the JSON columns of detections that have no object rows yet.
+
+    Returns:
+        int: Number of detections backfilled.
+    """
+    done = 0
+    last_id = None
+    session = SessionLocal()
+    try:
+        while True:
+            query = (
+                select(Detection)
+                .where(~Detection.id.in_(select(DetectionObject.detection_id)))
+                .order_by(Detection.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(Detection.id > last_id)
+            rows = session.execute(query).scalars().all()
+            if not rows:
+                return done
+            last_id = rows[-1].id
+
+            for row in rows:
+                # Videos keep their per-frame objects in the sidecar
+                if row.class_names and not row.sidecar_path:
+                    row.objects.extend(build_objects(
+                        row.class_names, row.confidences or [], row.bboxes or [], row.timestamp, row.filename,
+                        row.task
+                    ))
+                    done += 1
+            session.commit()
+    finally:
+        session.close()
+
+
+def _to_dict(detection):
+    return {
+        "id": detection.id.hex,
+        "timestamp": detection.timestamp.isoformat() if detection.timestamp else None,
+        "filename": detection.filename,
+        "task": detection.task,
+        "class_names": detection.class_names or [],
+        "confidences": detection.confidences or [],
+        "bboxes": detection.bboxes or [],
+        "result_path": detection.result_path,
+    }
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from backend.config import VIDEO_JOB_WORKERS, VIDEO_JOB_QUEUE_SIZE, VIDEO_JOB_HISTORY
+from backend.service.workers import WorkerPool
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobCancelledError(Exception):
+    """
+    Raised inside a running job once cancellation has been requested.
+    """
+
+
+class VideoJob:
+    def __init__(self, task: str, video_path: str, filename: str = None):
+        """
+        Background video processing job and its progress.
+
+        Args:
+            task (str): One of "detect", "segment" or "pose".
+            video_path (str): Uploaded video on disk; deleted when the job ends.
+            filename (str): Original upload filename.
+        """
+        self.id = uuid.uuid4().hex
+        self.task = task
+        self.video_path = video_path
+        self.filename = filename
+        self.status = "queued"
+        self.frames_done = 0
+        self.total_frames = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+
+    def update(self, frames_done: int, total_frames: int = 0):
+        """
+        Progress callback for the video pipeline; aborts the job if it was cancelled.
+        """
+        self.frames_done = frames_done
+        self.total_frames = max(total_frames, frames_done)
+        if self._cancel.is_set():
+            raise JobCancelledError(f"Job {self.id} was cancelled")
+
+    def cancel(self):
+        self._cancel.set()
+        if self.status == "queued":
+            self.status = "cancelled"
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def to_dict(self):
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        fps = self.frames_done / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total_frames - self.frames_done, 0)
+        eta = remaining / fps if fps > 0 and self.status == "running" else None
+        return {
+            "job_id": self.id,
+            "task": self.task,
+            "filename": self.filename,
+            "status": self.status,
+            "frames_done": self.frames_done,
+            "total_frames": self.total_frames,
+            "fps": round(fps, 2),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "elapsed_seconds": round(elapsed, 2),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers: int = VIDEO_JOB_WORKERS, max_pending: int = VIDEO_JOB_QUEUE_SIZE,
+                 history: int = VIDEO_JOB_HISTORY):
+        """
+        Runs video jobs in the background and keeps their status for polling.
+
+        Args:
+            max_workers (int): Videos processed concurrently.
+            max_pending (int): Jobs allowed to wait; further submissions raise ``PoolSaturatedError``.
+            history (int): Finished jobs kept for status queries.
+        """
+        self.pool = WorkerPool(kind="thread", max_workers=max_workers, max_pending=max_pending)
+        self.history = history
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, job: VideoJob, fn):
+        """
+        Queue ``fn(job)`` on the job pool. The upload is removed if the job cannot be admitted.
+        """
+        try:
+            self.pool.submit(self._run, job, fn)
+        except Exception:
+            _remove(job.video_path)
+            raise
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        job = self.get(job_id)
+        if job is not None and job.status not in TERMINAL_STATUSES:
+            job.cancel()
+        return job
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            **self.pool.stats(),
+            "jobs": {status: statuses.count(status) for status in set(statuses)},
+        }
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.status not in TERMINAL_STATUSES:
+                job.cancel()
+        self.pool.shutdown()
+
+    def _run(self, job: VideoJob, fn):
+        try:
+            if job.cancelled:
+                job.status = "cancelled"
+                return
+            job.status = "running"
+            job.started_at = time.time()
+            job.result = fn(job)
+            job.status = "completed"
+        except JobCancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            _remove(job.video_path)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in TERMINAL_STATUSES]
+        for job_id in finished[:max(len(self._jobs) - self.history, 0)]:
+            del self._jobs[job_id]
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+jobs = JobManager()
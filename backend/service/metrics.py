@@ -0,0 +1,296 @@
+import bisect
+import collections
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.config import PROFILE_DIR, PROFILE_INTERVAL_MS
+
+# Seconds; covers sub-millisecond stages up to long video jobs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._labels(key)} {_number(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._values.items())
+        lines = []
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{self._labels(key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Process-wide set of metrics rendered in the Prometheus text format.
+
+        Counters and histograms are updated on the hot path; gauges describing
+        current state (queue depths, loaded models) are refreshed by collectors
+        that run on each scrape.
+        """
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """
+        Register ``collector()`` to run before each render, e.g. to set gauges from component stats.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            collectors, metrics = list(self._collectors), list(self._metrics)
+        for collector in collectors:
+            collector()
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
+
+REQUESTS = metrics.counter("http_requests_total", "HTTP requests by route and status.",
+                           ("method", "route", "status"))
+REQUEST_SECONDS = metrics.histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+STAGE_SECONDS = metrics.histogram("stage_duration_seconds", "Time spent in each hot-path stage.", ("stage",))
+MODEL_LOADS = metrics.counter("model_loads_total", "Models loaded into the registry.", ("task", "backend"))
+MODEL_LOAD_SECONDS = metrics.histogram("model_load_duration_seconds", "Model construction plus warm-up time.",
+                                       ("task",))
+VIDEO_FRAMES = metrics.counter("video_frames_total", "Video frames processed.", ("task",))
+VIDEO_FPS = metrics.gauge("video_job_fps", "Frames per second of the last finished video job.", ("task",))
+STREAM_FRAMES = metrics.counter("stream_frames_total", "WebSocket stream frames by outcome.", ("task", "outcome"))
+QUEUE_DEPTH = metrics.gauge("queue_depth", "Items waiting in each internal queue.", ("queue",))
+IN_FLIGHT = metrics.gauge("pool_in_flight", "Jobs admitted to each worker pool.", ("pool",))
+VIDEO_JOBS = metrics.gauge("video_jobs", "Known video jobs by status.", ("status",))
+MODELS_LOADED = metrics.gauge("models_loaded", "Models currently held by the registry.")
+MODEL_MEMORY = metrics.gauge("model_memory_bytes", "Estimated memory of the loaded models.")
+STARTUP_SECONDS = metrics.gauge("startup_phase_seconds", "Duration of each startup phase.", ("phase",))
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a block into the ``stage_duration_seconds`` histogram.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+class SamplingProfiler:
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, window_s: float = 0):
+        """
+        Statistical profiler sampling the Python stacks of every thread in the process.
+
+        Stacks are aggregated in the collapsed format (``thread;file:function;... count``)
+        read by flame graph tools. All threads are sampled because a request's work runs
+        on pool, batching and writer threads; with concurrent requests the profile
+        covers all of them.
+
+        With ``window_s`` the samples of the last ``window_s`` seconds are also kept with
+        their time, so one long-running profiler can serve every request: ``window()``
+        returns the stacks sampled while a given request ran.
+        """
+        self.interval = max(interval_ms, 0.1) / 1000.0
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._recent = collections.deque(maxlen=int(window_s / self.interval)) if window_s > 0 else None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start sampling; calling it again on a running profiler does nothing.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+        return self
+
+    def window(self, start: float, end: float):
+        """
+        Stacks sampled between two ``time.perf_counter()`` readings (needs ``window_s``).
+
+        Returns:
+            collections.Counter: Sample count per collapsed stack.
+        """
+        with self._lock:
+            recent = list(self._recent or ())
+        stacks = collections.Counter()
+        # Samples are in time order: walk back from the newest until the window starts
+        for sampled_at, sample in reversed(recent):
+            if sampled_at < start:
+                break
+            if sampled_at <= end:
+                stacks.update(sample)
+        return stacks
+
+    def dump(self, name: str, profile_dir: str = PROFILE_DIR, stacks=None):
+        """
+        Write the collapsed stacks (default: everything sampled so far), most frequent first.
+
+        Returns:
+            str: Path of the profile.
+        """
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}.folded")
+        with open(path, "w") as f:
+            for stack, count in (self.stacks if stacks is None else stacks).most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            sample = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                # Interned, so a window of repeated stacks holds one copy of each string
+                sample.append(sys.intern(";".join(reversed(stack))))
+            if self._recent is None:
+                self.stacks.update(sample)
+            else:
+                with self._lock:
+                    self._recent.append((time.perf_counter(), sample))
+            self.samples += 1
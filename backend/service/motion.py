@@ -0,0 +1,89 @@
+import cv2
+
+from backend.config import MOTION_THRESHOLD, MOTION_MAX_SKIP
+
+
+class MotionGate:
+    def __init__(self, threshold: float = MOTION_THRESHOLD, max_skip: int = MOTION_MAX_SKIP, size: tuple = (64, 36)):
+        """
+        Decide per frame whether a video frame changed enough to be worth running the model on.
+
+        Each frame is downscaled to ``size`` in grayscale and compared with the
+        last frame that was sent to the model. Frames whose mean absolute
+        difference is below ``threshold`` are skipped, but never more than
+        ``max_skip`` in a row.
+
+        Args:
+            threshold (float): Mean absolute pixel difference (0-255) that counts as motion.
+            max_skip (int): Longest run of consecutive skipped frames.
+            size (tuple): Size (width, height) of the thumbnails compared.
+        """
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.size = size
+        self._reference = None
+        self._consecutive = 0
+        self.inferred = 0
+        self.skipped = 0
+
+    def score(self, frame):
+        """
+        Change score of a frame against the last inferred frame (``inf`` if there is none).
+        """
+        return self._score(self._thumbnail(frame))
+
+    def should_infer(self, frame):
+        """
+        Return True if the model should run on this frame and update the counters.
+        """
+        thumbnail = self._thumbnail(frame)
+        if self._consecutive >= self.max_skip or self._score(thumbnail) >= self.threshold:
+            self._reference = thumbnail
+            self._consecutive = 0
+            self.inferred += 1
+            return True
+        self._consecutive += 1
+        self.skipped += 1
+        return False
+
+    def wrap(self, processing_fn):
+        """
+        Gate a batch ``processing_fn``: only changed frames reach the model, the others
+        reuse the detections of the latest inferred frame drawn onto themselves.
+
+        Skipped frames are drawn onto the BGR frame itself, like ``_annotate_fn`` draws
+        inferred ones, so every output frame has the same channel order.
+        """
+        state = {"result": None}
+
+        def gated(frames):
+            selected = [i for i, frame in enumerate(frames) if self.should_infer(frame)]
+            inferred = dict(zip(selected, processing_fn([frames[i] for i in selected]))) if selected else {}
+
+            outputs = []
+            for i, frame in enumerate(frames):
+                if i in inferred:
+                    outputs.append(inferred[i])
+                    state["result"] = inferred[i][1]
+                else:
+                    outputs.append((state["result"].plot(img=frame), state["result"]))
+            return outputs
+
+        return gated
+
+    def stats(self):
+        total = self.inferred + self.skipped
+        return {
+            "inferred_frames": self.inferred,
+            "skipped_frames": self.skipped,
+            "skip_ratio": round(self.skipped / total, 3) if total else 0.0,
+        }
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _score(self, thumbnail):
+        if self._reference is None:
+            return float("inf")
+        return float(cv2.absdiff(thumbnail, self._reference).mean())
@@ -1,12 +1,48 @@
+import threading
+from functools import lru_cache
+
 import cv2
 import numpy as np
 
-def apply_clahe(img: np.ndarray) -> np.ndarray:
+from backend.config import CAMERA_PREPROCESS, PREPROCESS
+
+# Pipeline steps accepted in a spec string such as "gamma=1.8,clahe=2.0"
+STEPS = {"gamma": 1.0, "contrast": 1.0, "brightness": 0.0, "clahe": 0.0, "clahe_grid": 8}
+
+_clahe_local = threading.local()
+
+
+@lru_cache(maxsize=64)
+def gamma_lut(gamma: float) -> np.ndarray:
+    """
+    256-entry lookup table for gamma correction, computed once per gamma value.
+    """
+    table = (np.power(np.arange(256) / 255.0, 1.0 / gamma) * 255).astype(np.uint8)
+    table.setflags(write=False)
+    return table
+
+
+def get_clahe(clip_limit: float = 2.0, tile_grid: int = 8):
+    """
+    CLAHE object for a parameter set, created once per thread (OpenCV's CLAHE keeps
+    internal buffers and is not safe to share between threads).
+    """
+    cache = _clahe_local.__dict__.setdefault("cache", {})
+    key = (float(clip_limit), int(tile_grid))
+    clahe = cache.get(key)
+    if clahe is None:
+        clahe = cache[key] = cv2.createCLAHE(clipLimit=key[0], tileGridSize=(key[1], key[1]))
+    return clahe
+
+
+def apply_clahe(img: np.ndarray, clip_limit: float = 2.0, tile_grid: int = 8) -> np.ndarray:
     """
     Apply CLAHE (Contrast Limited Adaptive Histogram Equalization) to a BGR image.
 
     Args:
         img (np.ndarray): Input BGR image.
+        clip_limit (float): Contrast limit of the histogram equalization.
+        tile_grid (int): Number of tiles per side.
 
     Returns:
         np.ndarray: CLAHE-enhanced image.
@@ -14,8 +50,7 @@ def apply_clahe(img: np.ndarray) -> np.ndarray:
     lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
     l, a, b = cv2.split(lab)
 
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    cl = clahe.apply(l)
+    cl = get_clahe(clip_limit, tile_grid).apply(l)
 
     merged = cv2.merge((cl, a, b))
     final = cv2.cvtColor(merged, cv2.COLOR_LAB2BGR)
@@ -32,10 +67,7 @@ def adjust_gamma(image: np.ndarray, gamma: float = 1.0) -> np.ndarray:
     Returns:
         np.ndarray: Gamma-adjusted image.
     """
-    inv_gamma = 1.0 / gamma
-    table = np.array([(i / 255.0) ** inv_gamma * 255
-                     for i in np.arange(256)]).astype("uint8")
-    return cv2.LUT(image, table)
+    return cv2.LUT(image, gamma_lut(float(gamma)))
 
 def resize_image(image: np.ndarray, size: tuple = (640, 640)) -> np.ndarray:
     """
@@ -61,3 +93,142 @@ def normalize_image(image: np.ndarray) -> np.ndarray:
         np.ndarray: Normalized image.
     """
     return image.astype(np.float32) / 255.0
+
+
+class Preprocessor:
+    def __init__(self, gamma: float = 1.0, contrast: float = 1.0, brightness: float = 0.0, clahe: float = 0.0,
+                 clahe_grid: int = 8):
+        """
+        Contrast correction applied to images before inference.
+
+        The per-pixel steps (contrast, brightness, then gamma) are fused into a single
+        256-entry lookup table, so they cost one pass over the image together. CLAHE
+        then equalizes the lightness channel in LAB space. Intermediate buffers are
+        kept per thread and image shape, so a stream of same-sized video frames
+        allocates nothing after the first frame.
+
+        Args:
+            gamma (float): Gamma correction (> 1 brightens shadows).
+            contrast (float): Multiplier applied to pixel values.
+            brightness (float): Offset added after the contrast multiplier.
+            clahe (float): CLAHE clip limit (0 disables CLAHE).
+            clahe_grid (int): CLAHE tiles per side.
+        """
+        if gamma <= 0 or contrast < 0 or clahe < 0 or clahe_grid < 1:
+            raise ValueError("Preprocessing needs gamma > 0, contrast >= 0, clahe >= 0 and clahe_grid >= 1")
+        self.gamma = float(gamma)
+        self.contrast = float(contrast)
+        self.brightness = float(brightness)
+        self.clahe = float(clahe)
+        self.clahe_grid = int(clahe_grid)
+        self.lut = self._fused_lut()
+        self._local = threading.local()
+
+    @classmethod
+    def from_spec(cls, spec: str):
+        """
+        Build a preprocessor from a spec such as ``"gamma=1.8,clahe=2.0"``.
+        """
+        params = {}
+        for part in (spec or "").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            name, _, value = part.partition("=")
+            name = name.strip()
+            if name not in STEPS:
+                raise ValueError(f"Unknown preprocessing step: {name} (expected one of {', '.join(STEPS)})")
+            try:
+                params[name] = type(STEPS[name])(float(value)) if value.strip() else None
+            except ValueError:
+                raise ValueError(f"Invalid value for preprocessing step {name}: {value!r}")
+            if params[name] is None:
+                # A bare step name enables it with a sensible default
+                params[name] = {"gamma": 1.5, "clahe": 2.0}.get(name, STEPS[name])
+        return cls(**params)
+
+    @property
+    def spec(self):
+        """
+        Canonical spec string: non-default steps in a fixed order, empty when the pipeline does nothing.
+        """
+        values = {"gamma": self.gamma, "contrast": self.contrast, "brightness": self.brightness,
+                  "clahe": self.clahe, "clahe_grid": self.clahe_grid if self.clahe else STEPS["clahe_grid"]}
+        return ",".join(f"{name}={values[name]:g}" for name in STEPS if values[name] != STEPS[name])
+
+    def apply(self, img: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Preprocess one BGR image into ``out`` (pass ``out=img`` to work in place; default: a new array).
+        """
+        if out is None:
+            out = np.empty_like(img)
+        src = img
+        if self.lut is not None:
+            cv2.LUT(src, self.lut, dst=out)
+            src = out
+        if self.clahe:
+            lab, lightness = self._buffers(img.shape)
+            cv2.cvtColor(src, cv2.COLOR_BGR2LAB, dst=lab)
+            cv2.extractChannel(lab, 0, dst=lightness)
+            self._clahe().apply(lightness, dst=lightness)
+            cv2.insertChannel(lightness, lab, 0)
+            cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=out)
+        elif src is not out:
+            np.copyto(out, src)
+        return out
+
+    def apply_batch(self, frames, inplace: bool = False):
+        """
+        Preprocess a batch, a list of frames or an (N, H, W, 3) array, frame by frame with shared buffers.
+
+        Returns:
+            list | np.ndarray: Same container type as ``frames``.
+        """
+        if isinstance(frames, np.ndarray):
+            out = frames if inplace else np.empty_like(frames)
+            for frame, target in zip(frames, out):
+                self.apply(frame, out=target)
+            return out
+        return [self.apply(frame, out=frame if inplace else None) for frame in frames]
+
+    def _fused_lut(self):
+        if self.gamma == 1.0 and self.contrast == 1.0 and self.brightness == 0.0:
+            return None
+        values = np.clip(np.arange(256) * self.contrast + self.brightness, 0, 255)
+        table = (np.power(values / 255.0, 1.0 / self.gamma) * 255).astype(np.uint8)
+        table.setflags(write=False)
+        return table
+
+    def _clahe(self):
+        return get_clahe(self.clahe, self.clahe_grid)
+
+    def _buffers(self, shape):
+        buffers = self._local.__dict__.setdefault("buffers", {})
+        key = shape[:2]
+        if key not in buffers:
+            if len(buffers) >= 4:
+                buffers.clear()
+            buffers[key] = (np.empty((*key, 3), np.uint8), np.empty(key, np.uint8))
+        return buffers[key]
+
+
+@lru_cache(maxsize=64)
+def get_preprocessor(spec: str):
+    """
+    Shared preprocessor for a spec, or None when the spec does nothing.
+    """
+    preprocessor = Preprocessor.from_spec(spec)
+    return preprocessor if preprocessor.spec else None
+
+
+def resolve_preprocess(preprocess: str = None, camera: str = None):
+    """
+    Canonical preprocessing spec for a request: the explicit ``preprocess`` spec, else
+    the one configured for ``camera``, else the global default.
+
+    Raises:
+        ValueError: The spec is invalid.
+    """
+    if preprocess is None:
+        preprocess = CAMERA_PREPROCESS.get(camera, PREPROCESS) if camera else PREPROCESS
+    return Preprocessor.from_spec(preprocess).spec
@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+
+# COCO keypoint skeleton (pairs of 0-based keypoint indices)
+SKELETON = (
+    (15, 13), (13, 11), (16, 14), (14, 12), (11, 12), (5, 11), (6, 12), (5, 6), (5, 7), (6, 8),
+    (7, 9), (8, 10), (1, 2), (0, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6),
+)
+
+
+def color_for(index: int):
+    """
+    Stable BGR color for a class or track index.
+    """
+    hue = (int(index) * 37) % 180
+    b, g, r = cv2.cvtColor(np.uint8([[[hue, 220, 255]]]), cv2.COLOR_HSV2BGR)[0][0]
+    return int(b), int(g), int(r)
+
+
+def draw_box(img, box, label, color):
+    """
+    Draw a labelled xyxy box in place.
+    """
+    x1, y1, x2, y2 = [int(round(v)) for v in box]
+    thickness = max(1, round(sum(img.shape[:2]) / 600))
+    cv2.rectangle(img, (x1, y1), (x2, y2), color, thickness, cv2.LINE_AA)
+    if label:
+        (w, h), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        top = max(y1 - h - baseline - 2, 0)
+        cv2.rectangle(img, (x1, top), (x1 + w + 2, top + h + baseline + 2), color, -1)
+        cv2.putText(img, label, (x1 + 1, top + h + 1), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1,
+                    cv2.LINE_AA)
+    return img
+
+
+def draw_tracks(img, tracks):
+    """
+    Draw tracked boxes with their stable track IDs.
+
+    Args:
+        img (np.ndarray): BGR frame, drawn on in place.
+        tracks (list): Tracks from ``IouTracker``.
+
+    Returns:
+        np.ndarray: The annotated frame.
+    """
+    for track in tracks:
+        label = f"#{track.id} {track.class_name} {track.confidence:.2f}"
+        draw_box(img, track.box, label, color_for(track.id))
+    return img
+
+
+def draw_masks(img, polygons, colors, alpha: float = 0.5):
+    """
+    Blend filled mask polygons (in pixel coordinates) into the image in place.
+    """
+    if not polygons:
+        return img
+    overlay = img.copy()
+    for polygon, color in zip(polygons, colors):
+        points = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+        if len(points) >= 3:
+            cv2.fillPoly(overlay, [np.round(points).astype(np.int32)], color, cv2.LINE_AA)
+    cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0, dst=img)
+    return img
+
+
+def draw_keypoints(img, keypoints, min_confidence: float = 0.5):
+    """
+    Draw pose keypoints (N x K x 3 of x, y, confidence) and their COCO skeleton in place.
+    """
+    radius = max(2, round(sum(img.shape[:2]) / 400))
+    for person in keypoints:
+        points = np.asarray(person, dtype=np.float32).reshape(-1, 3)
+        visible = points[:, 2] >= min_confidence if points.shape[0] else np.zeros(0, dtype=bool)
+        for a, b in SKELETON:
+            if a < len(points) and b < len(points) and visible[a] and visible[b]:
+                cv2.line(img, tuple(int(v) for v in points[a, :2]), tuple(int(v) for v in points[b, :2]),
+                         color_for(a), max(1, radius // 2), cv2.LINE_AA)
+        for index, (x, y, _) in enumerate(points):
+            if visible[index]:
+                cv2.circle(img, (int(x), int(y)), radius, color_for(index), -1, cv2.LINE_AA)
+    return img
+
+
+def draw_detections(img, class_names, confidences, bboxes, masks=None, keypoints=None):
+    """
+    Draw stored detections (as returned by the image endpoints) onto an image.
+
+    Returns:
+        np.ndarray: The annotated image, drawn on in place.
+    """
+    colors = [color_for(sum(map(ord, name))) for name in class_names]
+    if masks:
+        draw_masks(img, masks, colors)
+    for name, confidence, box, color in zip(class_names, confidences, bboxes, colors):
+        draw_box(img, box, f"{name} {confidence:.2f}", color)
+    if keypoints:
+        draw_keypoints(img, keypoints)
+    return img
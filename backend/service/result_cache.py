@@ -0,0 +1,229 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from backend.config import RESULT_CACHE_ENTRIES, RESULT_CACHE_DIR, RESULT_CACHE_DISK_MB
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = RESULT_CACHE_ENTRIES, disk_dir: str = RESULT_CACHE_DIR,
+                 disk_max_mb: float = RESULT_CACHE_DISK_MB):
+        """
+        Content-addressed cache of image results with an in-memory and an on-disk tier.
+
+        Entries are JSON-serializable dicts. The memory tier keeps the ``max_entries``
+        most recently used ones; the disk tier keeps one file per entry and drops the
+        least recently used files once they exceed ``disk_max_mb``. Concurrent lookups
+        of a key that is being computed wait for that computation instead of repeating it.
+
+        Args:
+            max_entries (int): Entries kept in memory (0 disables the memory tier).
+            disk_dir (str): Directory of the disk tier (empty disables it).
+            disk_max_mb (float): Size budget of the disk tier.
+        """
+        self.max_entries = max(0, max_entries)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_mb * 1024 * 1024
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "disk_evictions": 0}
+
+    @staticmethod
+    def key(data: bytes, *parts):
+        """
+        Cache key for input bytes plus everything else the result depends on (task, model version, options).
+        """
+        digest = hashlib.sha256(data)
+        for part in parts:
+            digest.update(b"\0" + str(part).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """
+        Returns:
+            dict | None: The cached entry, or None on a miss.
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return value
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._remember(key, value)
+            return value
+
+    def put(self, key: str, value: dict):
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    def get_or_compute(self, key: str, compute):
+        """
+        Return the cached entry for ``key``, running ``compute()`` on a miss.
+
+        Only one caller computes a missing key; concurrent callers for the same key
+        wait for its result. Failures are not cached.
+
+        Returns:
+            tuple: (entry, True if it came from the cache or an in-flight computation).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self._counters["coalesced"] += 1
+        if not leader:
+            return future.result(), True
+
+        try:
+            value = compute()
+            self.put(key, value)
+            future.set_result(value)
+            return value, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+        self._remove_disk(self._path(key))
+
+    def clear(self):
+        """
+        Drop every entry from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+        for path in self._disk_files():
+            self._remove_disk(path)
+        with self._lock:
+            self._disk_bytes = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = lookups - self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_mb": round((self._disk_bytes or 0) / (1024 * 1024), 2),
+                "disk_max_mb": round(self.disk_max_bytes / (1024 * 1024), 2),
+            }
+
+    def _remember(self, key, value):
+        if not self.max_entries:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_files(self):
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return []
+        return [os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir) if name.endswith(".json")]
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+            # Refresh the access time used for LRU eviction
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir or self.disk_max_bytes <= 0:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(value, f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.exception("Failed to write result cache entry %s", key)
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(_size(p) for p in self._disk_files())
+            else:
+                self._disk_bytes += size
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        # Rescan: other worker processes may share the directory
+        files = sorted(((_mtime(p), p, _size(p)) for p in self._disk_files()))
+        total = sum(size for _, _, size in files)
+        evicted = 0
+        for _, path, size in files:
+            if total <= self.disk_max_bytes:
+                break
+            self._remove_disk(path)
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._counters["disk_evictions"] += evicted
+
+    @staticmethod
+    def _remove_disk(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+result_cache = ResultCache()
@@ -0,0 +1,150 @@
+import json
+import os
+
+import numpy as np
+
+COLUMNS = ("boxes", "class_ids", "confidences", "keypoints", "track_ids")
+
+
+class FrameRecorder:
+    def __init__(self):
+        """
+        Collect per-frame detections of a video into flat columns.
+
+        Objects of all frames are stored back to back; ``offsets[i]:offsets[i + 1]``
+        selects the objects of frame ``i``.
+        """
+        self.names = {}
+        self._counts = []
+        self._columns = {name: [] for name in COLUMNS}
+
+    def add(self, result):
+        """
+        Record one frame. ``result`` is an ultralytics result or a list of tracks.
+        """
+        if isinstance(result, list):
+            self._add_tracks(result)
+            return
+
+        boxes = result.boxes
+        class_ids = boxes.cls.cpu().numpy().astype(np.int16)
+        self.names.update({int(c): result.names[int(c)] for c in class_ids})
+        self._counts.append(len(class_ids))
+        self._columns["boxes"].append(boxes.xyxy.cpu().numpy().astype(np.float32))
+        self._columns["class_ids"].append(class_ids)
+        self._columns["confidences"].append(boxes.conf.cpu().numpy().astype(np.float32))
+        if getattr(result, "keypoints", None) is not None:
+            self._columns["keypoints"].append(result.keypoints.data.cpu().numpy().astype(np.float32))
+
+    def _add_tracks(self, tracks):
+        ids = {name: class_id for class_id, name in self.names.items()}
+        for track in tracks:
+            if track.class_name not in ids:
+                ids[track.class_name] = len(ids)
+                self.names[ids[track.class_name]] = track.class_name
+        self._counts.append(len(tracks))
+        self._columns["boxes"].append(np.array([t.box for t in tracks], dtype=np.float32).reshape(-1, 4))
+        self._columns["class_ids"].append(np.array([ids[t.class_name] for t in tracks], dtype=np.int16))
+        self._columns["confidences"].append(np.array([t.confidence for t in tracks], dtype=np.float32))
+        self._columns["track_ids"].append(np.array([t.id for t in tracks], dtype=np.int32))
+
+    @property
+    def frame_count(self):
+        return len(self._counts)
+
+    def save(self, path: str):
+        """
+        Write the columns as ``.npy`` files in directory ``path``.
+
+        Returns:
+            str: The sidecar directory.
+        """
+        os.makedirs(path, exist_ok=True)
+        offsets = np.zeros(len(self._counts) + 1, dtype=np.int64)
+        np.cumsum(self._counts, out=offsets[1:])
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        for name, chunks in self._columns.items():
+            # keypoints / track_ids only exist for pose and tracking runs
+            if chunks:
+                np.save(os.path.join(path, f"{name}.npy"), _concat(name, chunks))
+        with open(os.path.join(path, "names.json"), "w") as f:
+            json.dump({str(k): v for k, v in self.names.items()}, f)
+        return path
+
+
+def _concat(name, chunks):
+    if name == "boxes":
+        return np.concatenate([c.reshape(-1, 4) for c in chunks])
+    if name == "keypoints":
+        shape = next((c.shape[1:] for c in chunks if c.ndim == 3), (0, 3))
+        return np.concatenate([c.reshape((-1,) + tuple(shape)) for c in chunks])
+    return np.concatenate(chunks)
+
+
+def merge_sidecars(paths, output_path: str):
+    """
+    Concatenate the sidecars of consecutive video segments into one.
+    """
+    os.makedirs(output_path, exist_ok=True)
+    offsets = [np.zeros(1, dtype=np.int64)]
+    columns = {name: [] for name in COLUMNS}
+    names = {}
+    for path in paths:
+        segment_offsets = np.load(os.path.join(path, "offsets.npy"))
+        offsets.append(segment_offsets[1:] + offsets[-1][-1])
+        for name in COLUMNS:
+            file = os.path.join(path, f"{name}.npy")
+            if os.path.exists(file):
+                columns[name].append(np.load(file))
+        with open(os.path.join(path, "names.json")) as f:
+            names.update(json.load(f))
+
+    np.save(os.path.join(output_path, "offsets.npy"), np.concatenate(offsets))
+    for name, chunks in columns.items():
+        if chunks:
+            np.save(os.path.join(output_path, f"{name}.npy"), _concat(name, chunks))
+    with open(os.path.join(output_path, "names.json"), "w") as f:
+        json.dump(names, f)
+    return output_path
+
+
+def read_frames(path: str, start: int = 0, end: int = None):
+    """
+    Read the detections of frames ``[start, end)`` from a sidecar.
+
+    The columns are memory-mapped, so only the requested range is read from disk.
+
+    Returns:
+        list: One dict per frame with class names, confidences, boxes and, when
+        recorded, keypoints and track IDs.
+    """
+    offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+    columns = {}
+    for name in COLUMNS:
+        file = os.path.join(path, f"{name}.npy")
+        if os.path.exists(file):
+            columns[name] = np.load(file, mmap_mode="r")
+    with open(os.path.join(path, "names.json")) as f:
+        names = json.load(f)
+
+    frame_count = len(offsets) - 1
+    end = frame_count if end is None else min(end, frame_count)
+    frames = []
+    for frame_idx in range(max(start, 0), end):
+        lo, hi = int(offsets[frame_idx]), int(offsets[frame_idx + 1])
+        frame = {
+            "frame": frame_idx,
+            "class_names": [names.get(str(int(c)), str(int(c))) for c in columns["class_ids"][lo:hi]],
+            "confidences": columns["confidences"][lo:hi].tolist(),
+            "bboxes": columns["boxes"][lo:hi].tolist(),
+        }
+        if "keypoints" in columns:
+            frame["keypoints"] = columns["keypoints"][lo:hi].tolist()
+        if "track_ids" in columns:
+            frame["track_ids"] = columns["track_ids"][lo:hi].tolist()
+        frames.append(frame)
+    return frames
+
+
+def frame_count(path: str):
+    return len(np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")) - 1
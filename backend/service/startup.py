@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+
+from backend.config import STARTUP_TASKS
+from backend.models.registry import registry
+from backend.service.metrics import STARTUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class Startup:
+    def __init__(self, tasks=STARTUP_TASKS, model_registry=registry):
+        """
+        Background model loading at API startup and the readiness state behind ``GET /ready``.
+
+        The app imports without torch or ultralytics; a daemon thread imports them,
+        then loads and warms up the models of ``tasks`` while the server already
+        answers requests. The timings of each phase are kept for ``to_dict``.
+
+        Args:
+            tasks (list): Tasks whose configured models must be warm before the app is ready.
+            model_registry (ModelRegistry): Registry the models are loaded into.
+        """
+        self.tasks = list(tasks)
+        self.registry = model_registry
+        self.state = "pending"
+        self.error = None
+        self._seconds = {}
+        self._started_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self._seconds[phase] = seconds
+        STARTUP_SECONDS.set(seconds, phase=phase)
+
+    def start(self):
+        """
+        Start loading in the background; later calls are no-ops.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._started_at = time.perf_counter()
+            self.state = "warming"
+            self._thread = threading.Thread(target=self._run, name="startup-warmup", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float = None):
+        """
+        Block until loading has finished.
+
+        Returns:
+            bool: Whether the app is ready.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def to_dict(self):
+        with self._lock:
+            seconds = dict(self._seconds)
+        return {
+            "status": self.state,
+            "tasks": self.tasks,
+            "error": self.error,
+            "seconds": {phase: round(value, 3) for phase, value in seconds.items()},
+        }
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            import ultralytics  # noqa: F401  (pulls in torch)
+            self.record("framework_import", time.perf_counter() - start)
+
+            for task in self.tasks:
+                self.registry.get(task)
+            loaded = {entry["task"]: entry for entry in self.registry.stats()["loaded"]}
+            for task in self.tasks:
+                if task in loaded:
+                    self.record(f"{task}_load", loaded[task]["load_seconds"])
+                    self.record(f"{task}_warmup", loaded[task]["warmup_seconds"])
+        except Exception as e:
+            logger.exception("Startup model loading failed")
+            self.error = str(e)
+            self.state = "failed"
+            return
+        self.record("background", time.perf_counter() - self._started_at)
+        self.state = "ready"
+        logger.info("Ready after %.2fs: %s", time.perf_counter() - self._started_at, self.to_dict()["seconds"])
+
+
+startup = Startup()
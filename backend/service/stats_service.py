@@ -0,0 +1,50 @@
+import datetime
+
+from sqlalchemy import select
+
+from backend.db.models import DetectionRollup
+from backend.db.rollups import GRANULARITIES
+from backend.db.session import SessionLocal
+
+
+def query_stats(granularity: str = "hour", task: str = None, class_name: str = None,
+                since: datetime.datetime = None, until: datetime.datetime = None):
+    """
+    Object counts and mean confidence per class, task and time bucket, read from the rollups.
+
+    The cost depends on the number of buckets in the requested window, not on how
+    many detections have been stored.
+
+    Returns:
+        list: One dict per (bucket, task, class), oldest bucket first.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+
+    query = select(DetectionRollup).where(DetectionRollup.granularity == granularity)
+    if since is not None:
+        query = query.where(DetectionRollup.bucket_start >= since)
+    if until is not None:
+        query = query.where(DetectionRollup.bucket_start < until)
+    if task is not None:
+        query = query.where(DetectionRollup.task == task)
+    if class_name is not None:
+        query = query.where(DetectionRollup.class_name == class_name)
+    query = query.order_by(DetectionRollup.bucket_start, DetectionRollup.task, DetectionRollup.class_name)
+
+    session = SessionLocal()
+    try:
+        rows = session.execute(query).scalars().all()
+    finally:
+        session.close()
+
+    return [
+        {
+            "bucket_start": row.bucket_start.isoformat(),
+            "task": row.task,
+            "class_name": row.class_name,
+            "count": row.count,
+            "mean_confidence": round(row.confidence_sum / row.count, 4) if row.count else None,
+        }
+        for row in rows
+    ]
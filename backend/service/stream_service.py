@@ -0,0 +1,179 @@
+import asyncio
+import json
+import time
+
+import cv2
+import numpy as np
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from backend.config import STREAM_JPEG_QUALITY, STREAM_MAX_FPS
+from backend.service.batching import get_scheduler
+from backend.service.detection_service import result_to_dict
+from backend.service.encoding import compact_result
+from backend.service.metrics import STREAM_FRAMES
+from backend.service.preprocessing import get_preprocessor, resolve_preprocess
+from backend.service.workers import PoolSaturatedError
+
+STREAM_MODES = ("annotated", "detections")
+
+
+class LatestFrame:
+    def __init__(self):
+        """
+        Single-slot mailbox: a new frame replaces one that has not been picked up yet.
+        """
+        self._frame = None
+        self._event = asyncio.Event()
+        self.closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self.received += 1
+        self._event.set()
+
+    def close(self):
+        self.closed = True
+        self._event.set()
+
+    async def get(self):
+        """
+        Wait for the newest frame; returns None once closed.
+        """
+        while self._frame is None and not self.closed:
+            self._event.clear()
+            await self._event.wait()
+        return self.take_nowait()
+
+    def take_nowait(self):
+        frame, self._frame = self._frame, None
+        return frame
+
+
+def process_frame(frame_bytes: bytes, task: str, annotate: bool = True, quality: int = STREAM_JPEG_QUALITY,
+                  preprocess: str = ""):
+    """
+    Run one stream frame through the task's batching queue, after the ``preprocess`` spec if any.
+
+    Nothing is written to disk or the database.
+
+    Returns:
+        tuple: (detections dict, annotated JPEG bytes or None).
+    """
+    img = cv2.imdecode(np.frombuffer(frame_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Failed to decode frame")
+    if preprocess:
+        get_preprocessor(preprocess).apply(img, out=img)
+    result = get_scheduler(task).predict(img)
+    jpeg = None
+    if annotate:
+        # Draw on the BGR frame: the segmentor keeps an RGB copy as orig_img
+        ok, buffer = cv2.imencode(".jpg", result.plot(img=img), [cv2.IMWRITE_JPEG_QUALITY, quality])
+        jpeg = buffer.tobytes() if ok else None
+    return compact_result(result_to_dict(result, task)), jpeg
+
+
+async def run_stream(websocket: WebSocket, pool, task: str, fps: float = STREAM_MAX_FPS, mode: str = "annotated",
+                     preprocess: str = ""):
+    """
+    Serve a live stream: the client sends JPEG frames as binary messages and receives, per
+    processed frame, a JSON text message with the detections followed (in ``annotated``
+    mode) by the annotated JPEG as a binary message.
+
+    Only the newest frame is kept while one is being processed, so a client that sends
+    faster than the server keeps up sees fresh results rather than a growing backlog.
+    Text messages ``{"fps": ..., "mode": ..., "preprocess": ...}`` change the settings mid-stream.
+    """
+    settings = {"fps": _clamp_fps(fps), "mode": mode if mode in STREAM_MODES else "annotated",
+                "preprocess": preprocess}
+    mailbox = LatestFrame()
+
+    async def receive():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    mailbox.put((message["bytes"], time.perf_counter()))
+                elif message.get("text"):
+                    _apply_settings(settings, message["text"])
+        finally:
+            mailbox.close()
+
+    receiver = asyncio.create_task(receive())
+    processed = 0
+    next_due = 0.0
+    try:
+        while True:
+            item = await mailbox.get()
+            if item is None:
+                break
+
+            # Pace to the target rate; a frame arriving meanwhile replaces this one
+            wait = next_due - time.perf_counter()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                newer = mailbox.take_nowait()
+                if newer is not None:
+                    mailbox.dropped += 1
+                    item = newer
+            frame_bytes, received_at = item
+            next_due = time.perf_counter() + 1.0 / settings["fps"]
+
+            annotate = settings["mode"] == "annotated"
+            try:
+                detections, jpeg = await pool.run(process_frame, frame_bytes, task, annotate, STREAM_JPEG_QUALITY,
+                                                  settings["preprocess"])
+            except PoolSaturatedError:
+                mailbox.dropped += 1
+                continue
+            except ValueError as e:
+                await websocket.send_text(json.dumps({"error": str(e)}))
+                continue
+
+            processed += 1
+            STREAM_FRAMES.inc(task=task, outcome="processed")
+            await websocket.send_text(json.dumps({
+                "frame": processed,
+                "latency_ms": round(1000 * (time.perf_counter() - received_at), 1),
+                "received": mailbox.received,
+                "dropped": mailbox.dropped,
+                **detections,
+            }, separators=(",", ":")))
+            if jpeg is not None:
+                await websocket.send_bytes(jpeg)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        STREAM_FRAMES.inc(mailbox.dropped, task=task, outcome="dropped")
+
+
+def _apply_settings(settings, text):
+    try:
+        update = json.loads(text)
+    except ValueError:
+        return
+    if not isinstance(update, dict):
+        return
+    if "fps" in update:
+        try:
+            settings["fps"] = _clamp_fps(float(update["fps"]))
+        except (TypeError, ValueError):
+            pass
+    if update.get("mode") in STREAM_MODES:
+        settings["mode"] = update["mode"]
+    if isinstance(update.get("preprocess"), str):
+        try:
+            settings["preprocess"] = resolve_preprocess(update["preprocess"])
+        except ValueError:
+            pass
+
+
+def _clamp_fps(fps):
+    return min(max(float(fps), 0.1), STREAM_MAX_FPS)
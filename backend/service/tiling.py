@@ -0,0 +1,92 @@
+import numpy as np
+
+from backend.config import TILE_MATCH_THRESHOLD, TILE_OVERLAP, TILE_SIZE
+
+
+def tile_grid(height: int, width: int, tile_size: int = TILE_SIZE, overlap: float = TILE_OVERLAP):
+    """
+    Overlapping tiles covering an image.
+
+    Uses the fewest ``tile_size`` square tiles per axis that overlap by at least
+    ``overlap`` (a fraction of the tile), spread evenly so the last one ends at the
+    image border. Every tile has the same shape, so a whole grid can run as one
+    batch. An image no larger than a tile yields a single tile.
+
+    Returns:
+        list: ``(x0, y0, x1, y1)`` tuples, row by row.
+    """
+    step = max(1.0, tile_size * (1 - overlap))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        count = int(np.ceil((length - tile_size) / step)) + 1
+        return [int(round(position)) for position in np.linspace(0, length - tile_size, count)]
+
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in starts(height) for x in starts(width)
+    ]
+
+
+def offset_result(data: dict, dx: float, dy: float):
+    """
+    Shift boxes, mask polygons and keypoints of a result dict by ``(dx, dy)``, in place.
+    """
+    data["bboxes"] = [[x1 + dx, y1 + dy, x2 + dx, y2 + dy] for x1, y1, x2, y2 in data["bboxes"]]
+    if data.get("masks"):
+        data["masks"] = [[[x + dx, y + dy] for x, y in polygon] for polygon in data["masks"]]
+    if data.get("keypoints"):
+        data["keypoints"] = [[[x + dx, y + dy, *rest] for x, y, *rest in person] for person in data["keypoints"]]
+    return data
+
+
+def ios_matrix(boxes_a, boxes_b):
+    """
+    Pairwise intersection over the smaller box's area, for two sets of xyxy boxes.
+
+    Unlike IoU it is high when an object cut by a tile edge is matched with its full
+    box from a neighbouring tile or the full-frame pass.
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    smaller = np.minimum(area_a[:, None], area_b[None, :])
+    return np.where(smaller > 0, inter / np.maximum(smaller, 1e-9), 0.0)
+
+
+def merge_results(parts, image_size, match_threshold: float = TILE_MATCH_THRESHOLD):
+    """
+    Merge per-tile result dicts (already in image coordinates) with class-aware greedy NMS.
+
+    Detections are visited by descending confidence; each one suppresses later
+    detections of the same class whose intersection over the smaller box reaches
+    ``match_threshold``.
+
+    Returns:
+        dict: Result dict in the format of ``result_to_dict``.
+    """
+    keys = ["class_names", "class_ids", "confidences", "bboxes"]
+    keys += [key for key in ("masks", "keypoints") if any(key in part for part in parts)]
+    merged = {key: [item for part in parts for item in part.get(key, [])] for key in keys}
+
+    kept = []
+    if merged["bboxes"]:
+        class_ids = np.asarray(merged["class_ids"])
+        overlaps = ios_matrix(merged["bboxes"], merged["bboxes"])
+        suppressed = np.zeros(len(class_ids), dtype=bool)
+        for i in np.argsort(-np.asarray(merged["confidences"]), kind="stable"):
+            if suppressed[i]:
+                continue
+            kept.append(i)
+            suppressed |= (overlaps[i] >= match_threshold) & (class_ids == class_ids[i])
+
+    result = {"image_size": list(image_size)}
+    result.update((key, [values[i] for i in kept]) for key, values in merged.items())
+    return result
@@ -0,0 +1,159 @@
+from collections import Counter
+
+import numpy as np
+
+from backend.config import TRACK_IOU_THRESHOLD, TRACK_MAX_MISSES
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Pairwise IoU between two sets of xyxy boxes.
+
+    Args:
+        boxes_a (np.ndarray): Array of shape (N, 4).
+        boxes_b (np.ndarray): Array of shape (M, 4).
+
+    Returns:
+        np.ndarray: IoU matrix of shape (N, M).
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class Track:
+    def __init__(self, track_id, box, class_name, confidence, frame_idx):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.observed_box = self.box
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.class_name = class_name
+        self.confidence = confidence
+        self.first_frame = frame_idx
+        self.last_frame = frame_idx
+        self.hits = 1
+        self.misses = 0
+        self._confidence_sum = confidence
+
+    def observe(self, box, confidence, frame_idx):
+        box = np.asarray(box, dtype=np.float32)
+        gap = max(frame_idx - self.last_frame, 1)
+        # Smoothed per-frame box velocity, used to carry the box between keyframes
+        self.velocity = 0.5 * self.velocity + 0.5 * (box - self.observed_box) / gap
+        self.box = box
+        self.observed_box = box
+        self.confidence = confidence
+        self.last_frame = frame_idx
+        self.hits += 1
+        self.misses = 0
+        self._confidence_sum += confidence
+
+    def to_dict(self):
+        return {
+            "track_id": self.id,
+            "class_name": self.class_name,
+            "first_frame": self.first_frame,
+            "last_frame": self.last_frame,
+            "hits": self.hits,
+            "mean_confidence": round(self._confidence_sum / self.hits, 4),
+        }
+
+
+class IouTracker:
+    def __init__(self, iou_threshold: float = TRACK_IOU_THRESHOLD, max_misses: int = TRACK_MAX_MISSES):
+        """
+        Lightweight multi-object tracker: greedy IoU association at keyframes and
+        constant-velocity box propagation in between.
+
+        Args:
+            iou_threshold (float): Minimum IoU for a detection to continue a track of the same class.
+            max_misses (int): Keyframes a track may go unmatched before it is closed.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self._next_id = 1
+        self._frame_idx = 0
+        self.active = []
+        self.finished = []
+
+    def update(self, boxes, class_names, confidences, frame_idx):
+        """
+        Associate keyframe detections with existing tracks.
+
+        Returns:
+            list: Tracks visible in this frame.
+        """
+        self._advance(frame_idx)
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        matched_tracks, matched_dets = set(), set()
+
+        if len(self.active) and len(boxes):
+            ious = iou_matrix([t.box for t in self.active], boxes)
+            same_class = np.array([[t.class_name == c for c in class_names] for t in self.active])
+            ious = np.where(same_class, ious, 0.0)
+            # Greedy assignment, best overlap first
+            for flat in np.argsort(-ious, axis=None):
+                t, d = np.unravel_index(flat, ious.shape)
+                if ious[t, d] < self.iou_threshold:
+                    break
+                if t in matched_tracks or d in matched_dets:
+                    continue
+                self.active[t].observe(boxes[d], confidences[d], frame_idx)
+                matched_tracks.add(t)
+                matched_dets.add(d)
+
+        survivors = []
+        for t, track in enumerate(self.active):
+            if t not in matched_tracks:
+                track.misses += 1
+            if track.misses > self.max_misses:
+                self.finished.append(track)
+            else:
+                survivors.append(track)
+        self.active = survivors
+
+        for d in range(len(boxes)):
+            if d not in matched_dets:
+                self.active.append(Track(self._next_id, boxes[d], class_names[d], confidences[d], frame_idx))
+                self._next_id += 1
+
+        return self.visible()
+
+    def predict(self, frame_idx):
+        """
+        Carry tracks forward to a non-keyframe.
+
+        Returns:
+            list: Tracks visible in this frame.
+        """
+        self._advance(frame_idx)
+        return self.visible()
+
+    def visible(self):
+        return [track for track in self.active if track.misses == 0]
+
+    def summary(self):
+        """
+        Per-track summaries and unique object counts per class.
+        """
+        tracks = sorted(self.finished + self.active, key=lambda track: track.id)
+        return {
+            "track_count": len(tracks),
+            "unique_objects": dict(Counter(track.class_name for track in tracks)),
+            "tracks": [track.to_dict() for track in tracks],
+        }
+
+    def _advance(self, frame_idx):
+        steps = frame_idx - self._frame_idx
+        if steps > 0:
+            for track in self.active:
+                track.box = track.box + track.velocity * steps
+        self._frame_idx = frame_idx
@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+
+from backend.config import VIDEO_QUEUE_SIZE
+from backend.service.metrics import STAGE_SECONDS
+
+_END = object()
+
+
+class _QueueStats:
+    def __init__(self):
+        self.samples = 0
+        self.total = 0
+        self.max = 0
+
+    def sample(self, depth):
+        self.samples += 1
+        self.total += depth
+        self.max = max(self.max, depth)
+
+    def to_dict(self):
+        return {
+            "mean_depth": round(self.total / self.samples, 2) if self.samples else 0.0,
+            "max_depth": self.max,
+        }
+
+
+class FramePipeline:
+    def __init__(self, cap, writer, queue_size: int = VIDEO_QUEUE_SIZE, max_frames: int = None):
+        """
+        Decode and encode video frames on their own threads around the caller's inference stage.
+
+        A decoder thread fills a bounded queue from ``cap`` and an encoder thread
+        drains a second bounded queue into ``writer``. OpenCV releases the GIL
+        while decoding and encoding, so both overlap with inference. Frames go
+        through both queues in FIFO order, so output order matches input order.
+
+        Args:
+            cap (cv2.VideoCapture): Opened input video; only read by the decoder thread.
+            writer (cv2.VideoWriter): Opened output video; only written by the encoder thread.
+            queue_size (int): Capacity of each queue.
+            max_frames (int): Stop decoding after this many frames (default: until the end).
+        """
+        self._cap = cap
+        self._writer = writer
+        self._max_frames = max_frames
+        self._decoded = queue.Queue(maxsize=max(1, queue_size))
+        self._encoded = queue.Queue(maxsize=max(1, queue_size))
+        self._stop = threading.Event()
+        self._exhausted = False
+        self._errors = []
+        self._seconds = {"decode": 0.0, "encode": 0.0}
+        self._queue_stats = {"decode": _QueueStats(), "encode": _QueueStats()}
+        self._threads = [
+            threading.Thread(target=self._decode, name="video-decode", daemon=True),
+            threading.Thread(target=self._encode, name="video-encode", daemon=True),
+        ]
+        self._started_at = None
+        self._elapsed = None
+
+    def __enter__(self):
+        self._started_at = time.perf_counter()
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Stop the decoder if the caller finished early and unblock it if its queue is full
+        self._stop.set()
+        self._drain(self._decoded)
+        self._encoded.put(_END)
+        for thread in self._threads:
+            thread.join()
+        self._elapsed = time.perf_counter() - self._started_at
+        if exc_type is None and self._errors:
+            raise self._errors[0]
+        return False
+
+    def read(self, n: int = 1):
+        """
+        Return up to ``n`` decoded frames in order; an empty list means the video has ended.
+        """
+        frames = []
+        while len(frames) < n and not self._exhausted:
+            self._queue_stats["decode"].sample(self._decoded.qsize())
+            item = self._decoded.get()
+            if item is _END:
+                self._exhausted = True
+                break
+            frames.append(item)
+        return frames
+
+    def write(self, frame):
+        """
+        Queue an output frame for encoding.
+        """
+        self._queue_stats["encode"].sample(self._encoded.qsize())
+        self._encoded.put(frame)
+
+    def stats(self, frames: int = 0):
+        elapsed = self._elapsed or (time.perf_counter() - self._started_at)
+        return {
+            "decode_seconds": round(self._seconds["decode"], 3),
+            "encode_seconds": round(self._seconds["encode"], 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+            "decode_queue": self._queue_stats["decode"].to_dict(),
+            "encode_queue": self._queue_stats["encode"].to_dict(),
+        }
+
+    def _decode(self):
+        decoded = 0
+        try:
+            while not self._stop.is_set() and self._cap.isOpened():
+                if self._max_frames is not None and decoded >= self._max_frames:
+                    break
+                start = time.perf_counter()
+                ret, frame = self._cap.read()
+                elapsed = time.perf_counter() - start
+                self._seconds["decode"] += elapsed
+                STAGE_SECONDS.observe(elapsed, stage="video_decode")
+                if not ret:
+                    break
+                self._put(self._decoded, frame)
+                decoded += 1
+        except Exception as e:
+            self._errors.append(e)
+        finally:
+            self._put(self._decoded, _END)
+
+    def _encode(self):
+        while True:
+            frame = self._encoded.get()
+            if frame is _END:
+                break
+            if self._errors:
+                continue
+            try:
+                start = time.perf_counter()
+                self._writer.write(frame)
+                elapsed = time.perf_counter() - start
+                self._seconds["encode"] += elapsed
+                STAGE_SECONDS.observe(elapsed, stage="video_encode")
+            except Exception as e:
+                self._errors.append(e)
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    @staticmethod
+    def _drain(q):
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                return
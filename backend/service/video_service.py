@@ -1,48 +1,90 @@
 import cv2
+import multiprocessing
 import os
+import shutil
 import tempfile
+import threading
+import time
 import uuid
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
 from fastapi import UploadFile
-from backend.models.detector import Detector
-from backend.models.segmentor import Segmentor
-from backend.models.pose_estimator import PoseEstimator
+from backend.models.registry import registry
+from backend.service.job_service import JobCancelledError, VideoJob, jobs
+from backend.service.metrics import STAGE_SECONDS, VIDEO_FPS, VIDEO_FRAMES
+from backend.service.motion import MotionGate
+from backend.service.preprocessing import get_preprocessor
+from backend.service.rendering import draw_tracks
+from backend.service.sidecar import FrameRecorder, merge_sidecars, read_frames
+from backend.service.tracking import IouTracker
+from backend.service.video_pipeline import FramePipeline
+from backend.config import (
+    UPLOAD_CHUNK_SIZE, VIDEO_BATCH_SIZE, VIDEO_BATCH_MAX_MB, VIDEO_SEGMENT_WORKERS, VIDEO_SEGMENT_MIN_FRAMES,
+    VIDEO_MOTION_GATING, VIDEO_RESULTS_DIR, VIDEO_TRACKING, TRACK_KEYFRAME_INTERVAL
+)
 from backend.db.session import SessionLocal
+from backend.db.writer import writer
 from backend.db.models import Detection
 
+# One pool per worker count, so a job asking for a different count never tears down a pool in use
+_segment_pools = {}
+_segment_pool_lock = threading.Lock()
 
-def process_video_detect(video_path, output_dir, model_path="models/yolov8n.pt", orig_filename=None):
-    detector = Detector(model_path)
 
-    def detect_fn(frame):
-        annotated, _ = detector.process(frame)
-        return annotated, None
+def process_video_detect(video_path, output_dir, model_path="models/yolov8n.pt", orig_filename=None, progress_fn=None,
+                         batch_size=VIDEO_BATCH_SIZE, motion_gating=VIDEO_MOTION_GATING, tracking=VIDEO_TRACKING,
+                         keyframe_interval=TRACK_KEYFRAME_INTERVAL, preprocess=""):
+    detector = registry.get("detect", model_path)
+    if not tracking:
+        return _process_video(video_path, output_dir, _annotate_fn(detector), suffix="detect",
+                              orig_filename=orig_filename, progress_fn=progress_fn, batch_size=batch_size,
+                              motion_gating=motion_gating, preprocess=preprocess)
 
-    return _process_video(video_path, output_dir, detect_fn, suffix="detect", orig_filename=orig_filename)
+    # Tracking mode: detector on keyframes only, boxes carried by the tracker in between
+    tracker = IouTracker()
+    result = _process_video(video_path, output_dir, _tracking_fn(detector, tracker, keyframe_interval),
+                            suffix="detect", orig_filename=orig_filename, progress_fn=progress_fn,
+                            batch_size=batch_size, preprocess=preprocess)
+    result["tracks"] = tracker.summary()
+    return result
 
 
-def process_video_segment(video_path, output_dir, model_path="models/yolov8n-seg.pt", orig_filename=None):
-    segmentor = Segmentor(model_path)
+def process_video_segment(video_path, output_dir, model_path="models/yolov8n-seg.pt", orig_filename=None,
+                          progress_fn=None, batch_size=VIDEO_BATCH_SIZE, motion_gating=VIDEO_MOTION_GATING,
+                          preprocess=""):
+    segmentor = registry.get("segment", model_path)
+    return _process_video(video_path, output_dir, _annotate_fn(segmentor), suffix="segment",
+                          orig_filename=orig_filename, progress_fn=progress_fn, batch_size=batch_size,
+                          motion_gating=motion_gating, preprocess=preprocess)
 
-    def segment_fn(frame):
-        annotated, _ = segmentor.segment_and_mask(frame)
-        return annotated, None
 
-    return _process_video(video_path, output_dir, segment_fn, suffix="segment", orig_filename=orig_filename)
+def process_video_pose(video_path, output_dir, model_path="models/yolov8n-pose.pt", orig_filename=None,
+                       progress_fn=None, batch_size=VIDEO_BATCH_SIZE, motion_gating=VIDEO_MOTION_GATING,
+                       preprocess=""):
+    estimator = registry.get("pose", model_path)
+    return _process_video(video_path, output_dir, _annotate_fn(estimator), suffix="pose",
+                          orig_filename=orig_filename, progress_fn=progress_fn, batch_size=batch_size,
+                          motion_gating=motion_gating, preprocess=preprocess)
 
 
-def process_video_pose(video_path, output_dir, model_path="models/yolov8n-pose.pt", orig_filename=None):
-    estimator = PoseEstimator(model_path)
+def _effective_batch_size(batch_size, width, height, max_mb=VIDEO_BATCH_MAX_MB):
+    """
+    Shrink the frame batch so the decoded frames of one batch stay under ``max_mb``.
+    """
+    frame_bytes = max(width * height * 3, 1)
+    return max(1, min(batch_size, (max_mb * 1024 * 1024) // frame_bytes))
 
-    def estimate_fn(frame):
-        pose_img, _ = estimator.estimate_pose(frame)
-        return pose_img, None
 
-    return _process_video(video_path, output_dir, estimate_fn, suffix="pose", orig_filename=orig_filename)
+def _process_video(video_path, output_dir, processing_fn, suffix="processed", show=False, orig_filename=None,
+                   progress_fn=None, batch_size=1, motion_gating=False, preprocess=""):
+    """
+    Run ``processing_fn`` over every frame of a video and write the annotated output.
 
-
-def _process_video(video_path, output_dir, processing_fn, suffix="processed", show=False, orig_filename=None):
+    ``processing_fn`` takes a list of up to ``batch_size`` frames and returns one
+    ``(annotated_frame, result)`` pair per frame, in order. With ``motion_gating``
+    near-static frames skip ``processing_fn`` and reuse the previous detections.
+    ``preprocess`` is a preprocessing spec applied to each frame before inference.
+    """
     cap = cv2.VideoCapture(video_path)
-    frame_idx = 0
     os.makedirs(output_dir, exist_ok=True)
     video_filename = f"{suffix}_processed.avi"
     video_output_path = os.path.join(output_dir, video_filename)
@@ -51,68 +93,400 @@ def _process_video(video_path, output_dir, processing_fn, suffix="processed", sh
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
     fourcc = cv2.VideoWriter_fourcc(*"XVID")
     writer = cv2.VideoWriter(video_output_path, fourcc, fps, (width, height))
+    batch_size = _effective_batch_size(batch_size, width, height)
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    recorder = FrameRecorder()
+    try:
+        frame_idx, pipeline_stats = _annotate_frames(
+            cap, writer, processing_fn, batch_size, total_frames=total_frames, progress_fn=progress_fn, show=show,
+            motion_gating=motion_gating, recorder=recorder, task=suffix, preprocess=preprocess
+        )
+    finally:
+        cap.release()
+        writer.release()
+        if show:
+            cv2.destroyAllWindows()
 
-        result_frame, _ = processing_fn(frame)
-        writer.write(result_frame)
+    sidecar_path = recorder.save(os.path.join(output_dir, f"{suffix}_detections"))
+    detection_id = _record_video(orig_filename or os.path.basename(video_path), video_output_path, sidecar_path,
+                                 task=f"video_{suffix}")
 
-        if show:
-            cv2.imshow("Result", result_frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+    return {
+        "message": f"{suffix.capitalize()} completed for {frame_idx} frames.",
+        "frame_count": frame_idx,
+        "video_path": video_output_path,
+        "detection_id": detection_id,
+        "pipeline": pipeline_stats
+    }
+
+
+def _annotate_frames(cap, writer, processing_fn, batch_size, max_frames=None, total_frames=0, progress_fn=None,
+                     show=False, motion_gating=False, recorder=None, task="video", preprocess=""):
+    """
+    Pipelined decode / infer / encode loop shared by the serial and segmented video paths.
+
+    Returns:
+        tuple: Number of frames written and pipeline statistics.
+    """
+    frame_idx = 0
+    infer_seconds = 0.0
+    gate = MotionGate() if motion_gating else None
+    if gate is not None:
+        processing_fn = gate.wrap(processing_fn)
+    preprocessor = get_preprocessor(preprocess) if preprocess else None
+
+    # Decoding and encoding run on their own threads; inference stays on this one
+    with FramePipeline(cap, writer, max_frames=max_frames) as pipeline:
+        while True:
+            # The last batch may be partial
+            frames = pipeline.read(batch_size)
+            if not frames:
                 break
+            if preprocessor is not None:
+                # Decoded frames are not shared, so they are corrected in place
+                start = time.perf_counter()
+                preprocessor.apply_batch(frames, inplace=True)
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage="video_preprocess")
 
-        frame_idx += 1
+            start = time.perf_counter()
+            outputs = processing_fn(frames)
+            elapsed = time.perf_counter() - start
+            infer_seconds += elapsed
+            STAGE_SECONDS.observe(elapsed, stage=f"video_{task}_infer")
+
+            quit_requested = False
+            for result_frame, result in outputs:
+                pipeline.write(result_frame)
+                if recorder is not None:
+                    recorder.add(result)
+
+                if show:
+                    cv2.imshow("Result", result_frame)
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        quit_requested = True
+
+            frame_idx += len(frames)
+            VIDEO_FRAMES.inc(len(frames), task=task)
+            if quit_requested:
+                break
+            if progress_fn is not None:
+                # May raise to abort processing (e.g. job cancellation)
+                progress_fn(frame_idx, total_frames)
+
+    pipeline_stats = pipeline.stats(frame_idx)
+    pipeline_stats["infer_seconds"] = round(infer_seconds, 3)
+    pipeline_stats["batch_size"] = batch_size
+    if gate is not None:
+        pipeline_stats["motion"] = gate.stats()
+    return frame_idx, pipeline_stats
 
-    cap.release()
-    writer.release()
-    if show:
-        cv2.destroyAllWindows()
 
-    # Record processed video in database
+def _record_video(filename, video_output_path, sidecar_path=None, task=None):
+    # Record processed video in database; per-frame detections live in the sidecar.
+    # Wait for the commit so the record exists once the job reports completion.
+    detection_id = uuid.uuid4()
+    writer.submit(Detection(
+        id=detection_id,
+        filename=filename,
+        class_names=[],
+        confidences=[],
+        bboxes=[],
+        result_path=video_output_path,
+        sidecar_path=sidecar_path,
+        task=task,
+    )).result()
+    return detection_id.hex
+
+
+def get_video_frames(detection_id: str, start: int = 0, end: int = None):
+    """
+    Per-frame detections of a processed video, read from its memory-mapped sidecar.
+
+    Returns:
+        list | None: Frames ``[start, end)``, or None if the video or its sidecar is unknown.
+    """
+    try:
+        record_id = uuid.UUID(detection_id)
+    except ValueError:
+        return None
     session = SessionLocal()
     try:
-        detection_entry = Detection(
-            filename=orig_filename or os.path.basename(video_path),
-            class_names=[],
-            confidences=[],
-            bboxes=[],
-            result_path=video_output_path,
-        )
-        session.add(detection_entry)
-        session.commit()
+        record = session.get(Detection, record_id)
     finally:
         session.close()
+    if record is None or not record.sidecar_path or not os.path.isdir(record.sidecar_path):
+        return None
+    return read_frames(record.sidecar_path, start, end)
+
+
+def _annotate_fn(model):
+    def annotate(frames):
+        results = model.predict(frames)
+        # Draw onto the BGR input frame: the segmentor keeps an RGB copy as orig_img
+        return [(result.plot(img=frame), result) for frame, result in zip(frames, results)]
+
+    return annotate
+
+
+def _tracking_fn(detector, tracker, keyframe_interval):
+    """
+    Batch processing function that runs ``detector`` on every ``keyframe_interval``-th
+    frame and propagates tracks through the frames in between.
+    """
+    keyframe_interval = max(1, keyframe_interval)
+    state = {"frame_idx": 0}
+
+    def track(frames):
+        first = state["frame_idx"]
+        keyframes = [i for i in range(len(frames)) if (first + i) % keyframe_interval == 0]
+        results = dict(zip(keyframes, detector.predict([frames[i] for i in keyframes]))) if keyframes else {}
+
+        outputs = []
+        for i, frame in enumerate(frames):
+            if i in results:
+                boxes = results[i].boxes
+                class_names = [results[i].names[int(c)] for c in boxes.cls.tolist()]
+                tracks = tracker.update(boxes.xyxy.tolist(), class_names, boxes.conf.tolist(), first + i)
+            else:
+                tracks = tracker.predict(first + i)
+            outputs.append((draw_tracks(frame, tracks), tracks))
+        state["frame_idx"] += len(frames)
+        return outputs
+
+    return track
+
+
+def _process_segment(video_path, task, index, start, end, output_path, batch_size, motion_gating, progress, cancel,
+                     preprocess=""):
+    """
+    Worker-process entry point: annotate frames ``[start, end)`` of a video into its own file.
+
+    ``end=None`` means "until the end of the video" so the last segment picks up
+    any frames the container's frame count missed.
+    """
+    model = registry.get(task)
+    cap = cv2.VideoCapture(video_path)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    # Intermediate segments use MJPG: cheap to decode again when concatenating
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+
+    def report(frames_done, _total):
+        progress[index] = frames_done
+        if cancel.is_set():
+            raise JobCancelledError("Video processing was cancelled")
 
+    recorder = FrameRecorder()
+    try:
+        frame_count, stats = _annotate_frames(
+            cap, writer, _annotate_fn(model), _effective_batch_size(batch_size, width, height),
+            max_frames=None if end is None else end - start, progress_fn=report, motion_gating=motion_gating,
+            recorder=recorder, task=task, preprocess=preprocess
+        )
+    finally:
+        cap.release()
+        writer.release()
+    recorder.save(os.path.splitext(output_path)[0] + "_detections")
+    return frame_count, stats
+
+
+def _get_segment_pool(workers):
+    with _segment_pool_lock:
+        pool = _segment_pools.get(workers)
+        if pool is None:
+            # Spawned workers keep their own model registry, so models stay loaded between videos
+            pool = _segment_pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return pool
+
+
+def shutdown_segment_pool():
+    with _segment_pool_lock:
+        pools = list(_segment_pools.values())
+        _segment_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+def process_video_parallel(video_path, output_dir, task, workers=VIDEO_SEGMENT_WORKERS, orig_filename=None,
+                           progress_fn=None, batch_size=VIDEO_BATCH_SIZE, motion_gating=VIDEO_MOTION_GATING,
+                           preprocess=""):
+    """
+    Split a video into frame-range segments, annotate them in parallel worker processes
+    and concatenate the segments into ``{task}_processed.avi``.
+
+    Produces the same frame count and database record as the serial path.
+    """
+    cap = cv2.VideoCapture(video_path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    cap.release()
+
+    os.makedirs(output_dir, exist_ok=True)
+    video_output_path = os.path.join(output_dir, f"{task}_processed.avi")
+    segment_count = max(1, min(workers, total_frames // VIDEO_SEGMENT_MIN_FRAMES))
+    bounds = [round(i * total_frames / segment_count) for i in range(segment_count)] + [None]
+    segment_paths = [os.path.join(output_dir, f"segment_{i:03d}.avi") for i in range(segment_count)]
+    segment_sidecars = [os.path.splitext(path)[0] + "_detections" for path in segment_paths]
+
+    started = time.perf_counter()
+    manager = multiprocessing.get_context("spawn").Manager()
+    try:
+        try:
+            progress = manager.dict()
+            cancel = manager.Event()
+            pool = _get_segment_pool(workers)
+            futures = [
+                pool.submit(_process_segment, video_path, task, i, bounds[i], bounds[i + 1], segment_paths[i],
+                            batch_size, motion_gating, progress, cancel, preprocess)
+                for i in range(segment_count)
+            ]
+            try:
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                    for future in done:
+                        # Re-raises the segment's error; the handler below stops its siblings
+                        future.result()
+                    if progress_fn is not None:
+                        progress_fn(sum(progress.values()), total_frames)
+            except BaseException:
+                cancel.set()
+                wait(futures)
+                raise
+            segment_results = [future.result() for future in futures]
+        finally:
+            manager.shutdown()
+
+        # Concatenate the segments in order into the final video
+        writer = cv2.VideoWriter(video_output_path, cv2.VideoWriter_fourcc(*"XVID"), fps, (width, height))
+        try:
+            for segment_path in segment_paths:
+                segment = cv2.VideoCapture(segment_path)
+                while True:
+                    ret, frame = segment.read()
+                    if not ret:
+                        break
+                    writer.write(frame)
+                segment.release()
+        finally:
+            writer.release()
+
+        sidecar_path = merge_sidecars(segment_sidecars, os.path.join(output_dir, f"{task}_detections"))
+    finally:
+        # Intermediate files go whether the job finished, failed or was cancelled
+        for segment_path, segment_sidecar in zip(segment_paths, segment_sidecars):
+            if os.path.exists(segment_path):
+                os.remove(segment_path)
+            shutil.rmtree(segment_sidecar, ignore_errors=True)
+
+    frame_idx = sum(frame_count for frame_count, _ in segment_results)
+    # Segment workers count frames in their own processes
+    VIDEO_FRAMES.inc(frame_idx, task=task)
+    detection_id = _record_video(orig_filename or os.path.basename(video_path), video_output_path, sidecar_path,
+                                 task=f"video_{task}")
+
+    elapsed = time.perf_counter() - started
     return {
-        "message": f"{suffix.capitalize()} completed for {frame_idx} frames.",
+        "message": f"{task.capitalize()} completed for {frame_idx} frames.",
         "frame_count": frame_idx,
-        "video_path": video_output_path
+        "video_path": video_output_path,
+        "detection_id": detection_id,
+        "pipeline": {
+            "segments": [stats for _, stats in segment_results],
+            "elapsed_seconds": round(elapsed, 3),
+            "fps": round(frame_idx / elapsed, 2) if elapsed > 0 else 0.0,
+        }
     }
 
 
-async def handle_video(file: UploadFile, task: str):
-    suffix = os.path.splitext(file.filename)[-1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(await file.read())
-        temp_video_path = tmp.name
+def process_video(video_path, task, orig_filename=None, progress_fn=None, batch_size=VIDEO_BATCH_SIZE,
+                  segment_workers=VIDEO_SEGMENT_WORKERS, motion_gating=VIDEO_MOTION_GATING, tracking=VIDEO_TRACKING,
+                  preprocess=""):
+    """
+    Run the video pipeline for a task on a file already on disk.
 
-    output_dir = os.path.join("video_results", uuid.uuid4().hex)
+    With ``segment_workers > 1`` the video is split into frame ranges processed in parallel worker processes.
+    Detection with ``tracking`` always runs serially so track IDs stay stable across the whole video.
+    """
+    if task not in ("detect", "segment", "pose"):
+        return {
+            "status": "error",
+            "message": f"Unsupported task type: {task}"
+        }
+    output_dir = os.path.join(VIDEO_RESULTS_DIR, uuid.uuid4().hex)
     os.makedirs(output_dir, exist_ok=True)
+    options = {
+        "orig_filename": orig_filename,
+        "progress_fn": progress_fn,
+        "batch_size": batch_size,
+        "motion_gating": motion_gating,
+        "preprocess": preprocess,
+    }
 
-    if task == "detect":
-        return process_video_detect(temp_video_path, output_dir, orig_filename=file.filename)
-    elif task == "segment":
-        return process_video_segment(temp_video_path, output_dir, orig_filename=file.filename)
-    elif task == "pose":
-        return process_video_pose(temp_video_path, output_dir, orig_filename=file.filename)
-    else:
+    try:
+        if task == "detect" and tracking:
+            result = process_video_detect(video_path, output_dir, tracking=True, **options)
+        elif segment_workers > 1:
+            result = process_video_parallel(video_path, output_dir, task, workers=segment_workers, **options)
+        elif task == "detect":
+            result = process_video_detect(video_path, output_dir, tracking=False, **options)
+        elif task == "segment":
+            result = process_video_segment(video_path, output_dir, **options)
+        else:
+            result = process_video_pose(video_path, output_dir, **options)
+    except Exception:
+        # Cancelled or failed: drop the partial video, segments and sidecars
+        shutil.rmtree(output_dir, ignore_errors=True)
+        raise
+    VIDEO_FPS.set(result["pipeline"]["fps"], task=task)
+    return result
+
+
+async def save_upload(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """
+    Copy an upload to a temporary file in fixed-size chunks so memory stays flat.
+
+    Returns:
+        str: Path of the temporary file; the caller is responsible for deleting it.
+    """
+    suffix = os.path.splitext(file.filename or "")[-1]
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            tmp.write(chunk)
+        return tmp.name
+
+
+async def handle_video(file: UploadFile, task: str, preprocess: str = ""):
+    """
+    Store the upload and start processing it as a background job.
+
+    Args:
+        preprocess (str): Canonical preprocessing spec applied to every frame; empty for none.
+
+    Returns:
+        dict: Job status; poll ``GET /jobs/{job_id}`` for progress and the result.
+    """
+    if task not in ("detect", "segment", "pose"):
         return {
             "status": "error",
             "message": f"Unsupported task type: {task}"
         }
+
+    temp_video_path = await save_upload(file)
+    job = VideoJob(task, temp_video_path, file.filename)
+    jobs.submit(job, lambda j: process_video(j.video_path, j.task, orig_filename=j.filename, progress_fn=j.update,
+                                             preprocess=preprocess))
+    return job.to_dict()
@@ -0,0 +1,107 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from backend.config import WORKER_POOL_KIND, WORKER_POOL_SIZE, WORKER_QUEUE_SIZE
+
+
+class PoolSaturatedError(RuntimeError):
+    """
+    Raised when a job is submitted while every worker and queue slot is taken.
+    """
+
+
+class WorkerPool:
+    def __init__(self, kind: str = WORKER_POOL_KIND, max_workers: int = WORKER_POOL_SIZE,
+                 max_pending: int = WORKER_QUEUE_SIZE):
+        """
+        Bounded thread or process pool for blocking work (inference, image writes, DB commits).
+
+        At most ``max_workers + max_pending`` jobs are admitted at once; further
+        submissions fail fast with ``PoolSaturatedError`` instead of queueing.
+
+        Args:
+            kind (str): "thread" or "process".
+            max_workers (int): Number of workers.
+            max_pending (int): Jobs allowed to wait for a free worker.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported worker pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(0, max_pending)
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Admit a job or raise ``PoolSaturatedError`` if the pool is full.
+
+        Returns:
+            concurrent.futures.Future: Future of the job's return value.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PoolSaturatedError("Server is busy, retry later")
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run a blocking job on the pool without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # Spawned workers load their own models instead of inheriting torch state.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="worker")
+            return self._executor
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+
+
+pool = WorkerPool()
@@ -0,0 +1,109 @@
+"""
+Accuracy parity and latency of an exported backend against eager PyTorch on sample_images/.
+
+    python -m benchmarks.backend_parity --backend onnx [--int8] [--tasks detect pose] [--min-recall 0.95]
+
+Detections are matched greedily by IoU (same class); the check fails when the backend
+recovers less than ``--min-recall`` of the PyTorch detections.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from backend.config import MODEL_PATHS
+from backend.models.backends import BACKENDS, load_yolo
+from backend.service.tracking import iou_matrix
+
+
+def _run(model, imgs, conf):
+    outputs, elapsed = [], []
+    for img in imgs:
+        start = time.perf_counter()
+        result = model(img, conf=conf, verbose=False)[0]
+        elapsed.append(time.perf_counter() - start)
+        outputs.append(result)
+    return outputs, 1000 * float(np.median(elapsed))
+
+
+def _match(reference, candidate, iou_threshold):
+    ref_boxes, cand_boxes = reference.boxes.xyxy.cpu().numpy(), candidate.boxes.xyxy.cpu().numpy()
+    ref_cls, cand_cls = reference.boxes.cls.cpu().numpy(), candidate.boxes.cls.cpu().numpy()
+    if not len(ref_boxes) or not len(cand_boxes):
+        return []
+    ious = iou_matrix(ref_boxes, cand_boxes) * (ref_cls[:, None] == cand_cls[None, :])
+    pairs, used_ref, used_cand = [], set(), set()
+    for flat in np.argsort(-ious, axis=None):
+        r, c = np.unravel_index(flat, ious.shape)
+        if ious[r, c] < iou_threshold:
+            break
+        if r in used_ref or c in used_cand:
+            continue
+        used_ref.add(r)
+        used_cand.add(c)
+        pairs.append((r, c, float(ious[r, c])))
+    return pairs
+
+
+def compare(task, backend, int8, imgs, conf, iou_threshold):
+    reference_model = load_yolo(MODEL_PATHS[task], task)
+    candidate_model = load_yolo(MODEL_PATHS[task], task, backend, int8)
+    references, reference_ms = _run(reference_model, imgs, conf)
+    candidates, candidate_ms = _run(candidate_model, imgs, conf)
+
+    ref_total = cand_total = matched = 0
+    ious, conf_errors, keypoint_errors = [], [], []
+    for reference, candidate in zip(references, candidates):
+        pairs = _match(reference, candidate, iou_threshold)
+        ref_total += len(reference.boxes)
+        cand_total += len(candidate.boxes)
+        matched += len(pairs)
+        for r, c, iou in pairs:
+            ious.append(iou)
+            conf_errors.append(abs(float(reference.boxes.conf[r]) - float(candidate.boxes.conf[c])))
+            if reference.keypoints is not None and candidate.keypoints is not None:
+                diff = reference.keypoints.xy[r].cpu().numpy() - candidate.keypoints.xy[c].cpu().numpy()
+                keypoint_errors.append(float(np.abs(diff).mean()))
+
+    return {
+        "task": task,
+        "backend": backend + ("-int8" if int8 else ""),
+        "images": len(imgs),
+        "torch_detections": ref_total,
+        "backend_detections": cand_total,
+        "recall": round(matched / ref_total, 4) if ref_total else 1.0,
+        "precision": round(matched / cand_total, 4) if cand_total else 1.0,
+        "mean_iou": round(float(np.mean(ious)), 4) if ious else None,
+        "mean_conf_abs_diff": round(float(np.mean(conf_errors)), 4) if conf_errors else None,
+        "mean_keypoint_abs_diff_px": round(float(np.mean(keypoint_errors)), 3) if keypoint_errors else None,
+        "torch_median_ms": round(reference_ms, 2),
+        "backend_median_ms": round(candidate_ms, 2),
+        "speedup": round(reference_ms / candidate_ms, 2) if candidate_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=[b for b in BACKENDS if b != "torch"], required=True)
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--tasks", nargs="+", default=["detect", "segment", "pose"])
+    parser.add_argument("--images", default=os.path.join("sample_images", "*.jpg"))
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    args = parser.parse_args()
+
+    imgs = [cv2.imread(path) for path in sorted(glob.glob(args.images))]
+    reports = [compare(task, args.backend, args.int8, imgs, args.conf, args.iou) for task in args.tasks]
+    print(json.dumps(reports, indent=2))
+    if any(report["recall"] < args.min_recall for report in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
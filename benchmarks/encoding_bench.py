@@ -0,0 +1,82 @@
+"""
+Response size and encode time of segmentation/pose results: naive JSON lists vs the compact encodings.
+
+    python -m benchmarks.encoding_bench [--objects 20] [--width 1280] [--height 720]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from backend.service.encoding import JSON, MSGPACK, NPY, encode_result, msgpack, polygon_mask, simplify_polygon
+
+
+def _ellipse(cx, cy, rx, ry, points=400):
+    angles = np.linspace(0, 2 * np.pi, points, endpoint=False)
+    return np.column_stack([cx + rx * np.cos(angles), cy + ry * np.sin(angles)])
+
+
+def synthetic_results(objects, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    polygons = [
+        _ellipse(rng.uniform(0.2, 0.8) * width, rng.uniform(0.2, 0.8) * height,
+                 rng.uniform(0.05, 0.15) * width, rng.uniform(0.05, 0.15) * height)
+        for _ in range(objects)
+    ]
+    common = {
+        "detection_id": "0" * 32,
+        "image_size": [height, width],
+        "class_names": ["person"] * objects,
+        "class_ids": [0] * objects,
+        "confidences": rng.uniform(0.3, 1.0, objects).tolist(),
+        "bboxes": [[*p.min(axis=0), *p.max(axis=0)] for p in polygons],
+    }
+    segment = {**common, "masks": [np.round(simplify_polygon(p, 1.0), 1).tolist() for p in polygons]}
+    pose = {**common, "keypoints": rng.uniform(0, width, (objects, 17, 3)).tolist()}
+    naive_segment = {**common, "masks": [p.tolist() for p in polygons]}
+    return segment, naive_segment, pose, polygons
+
+
+def _time(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, 1000 * (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--objects", type=int, default=20)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    segment, naive_segment, pose, polygons = synthetic_results(args.objects, args.width, args.height)
+    size = (args.height, args.width)
+    cases = {
+        "segment naive JSON polygons": lambda: json.dumps(naive_segment).encode(),
+        "segment naive JSON bitmaps": lambda: json.dumps(
+            {**segment, "masks": [polygon_mask(p, size).tolist() for p in polygons]}).encode(),
+        "segment JSON polygons (simplified)": lambda: encode_result(segment, JSON, "polygon")[0],
+        "segment JSON RLE": lambda: encode_result(segment, JSON, "rle")[0],
+        "segment npy bit-packed": lambda: encode_result(segment, NPY)[0],
+        "pose naive JSON lists": lambda: json.dumps(pose).encode(),
+        "pose JSON packed": lambda: encode_result(pose, JSON)[0],
+        "pose npy": lambda: encode_result(pose, NPY)[0],
+    }
+    if msgpack is not None:
+        cases["segment msgpack RLE"] = lambda: encode_result(segment, MSGPACK, "rle")[0]
+        cases["pose msgpack packed"] = lambda: encode_result(pose, MSGPACK)[0]
+
+    report = []
+    for name, fn in cases.items():
+        body, ms = _time(fn, args.repeat)
+        report.append({"case": name, "bytes": len(body), "encode_ms": round(ms, 3)})
+        print(f"{name:40s} {len(body):>12,d} B {ms:10.3f} ms")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Load and latency benchmark for the image and video endpoints.
+
+    python -m benchmarks.load_bench --endpoints detect segment pose video/detect --concurrency 4 --requests 40
+    python -m benchmarks.load_bench --url http://localhost:8000 --server-pid 1234 --output bench.json
+    python -m benchmarks.load_bench --baseline bench.json --tolerance 0.2
+
+Runs in-process through the ASGI app unless ``--url`` is given. Each endpoint gets a
+cold request (models dropped first, in-process only), warm-up requests, then
+``--requests`` timed requests at ``--concurrency``. Uploaded images get a random
+suffix after the JPEG end marker so the result cache does not short-circuit them.
+Results are written as JSON; with ``--baseline`` the run exits non-zero when p95
+latency or throughput regress by more than ``--tolerance``.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backend.service.job_service import TERMINAL_STATUSES
+
+IMAGE_ENDPOINTS = ("detect", "segment", "pose")
+VIDEO_ENDPOINTS = ("video/detect", "video/segment", "video/pose")
+
+
+class Client:
+    def __init__(self, url: str = None, timeout: float = 600.0):
+        """
+        HTTP client against ``url``, or an in-process client for the ASGI app.
+        """
+        self.in_process = url is None
+        if self.in_process:
+            from fastapi.testclient import TestClient
+            from backend.main import app
+
+            self._client = TestClient(app)
+        else:
+            import httpx
+
+            self._client = httpx.Client(base_url=url, timeout=timeout)
+
+    def post(self, path, files):
+        return self._client.post(path, files=files)
+
+    def get(self, path):
+        return self._client.get(path)
+
+
+class Workload:
+    def __init__(self, images, videos, unique: bool = True):
+        self.images = [open(path, "rb").read() for path in images]
+        self.videos = [(os.path.basename(path), open(path, "rb").read()) for path in videos]
+        self.unique = unique
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _pick(self, items):
+        with self._lock:
+            index = self._next
+            self._next += 1
+        return items[index % len(items)]
+
+    def request(self, client, endpoint, poll_interval):
+        """
+        Issue one request; video jobs are polled until they finish.
+
+        Returns:
+            bool: Whether the request succeeded.
+        """
+        if endpoint in VIDEO_ENDPOINTS:
+            name, data = self._pick(self.videos)
+            response = client.post(f"/{endpoint}", files={"file": (name, data, "video/mp4")})
+            if response.status_code != 202:
+                return False
+            job_id = response.json()["job_id"]
+            while True:
+                job = client.get(f"/jobs/{job_id}").json()
+                if job["status"] in TERMINAL_STATUSES:
+                    return job["status"] == "completed"
+                time.sleep(poll_interval)
+
+        data = self._pick(self.images)
+        if self.unique:
+            # Bytes after the JPEG end-of-image marker are ignored by decoders but change the content hash
+            data = data + uuid.uuid4().bytes
+        response = client.post(f"/{endpoint}", files={"file": ("bench.jpg", data, "image/jpeg")})
+        return response.status_code == 200
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    try:
+        ok = fn()
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def _percentiles(latencies):
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None, "max_ms": None}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2),
+            "mean_ms": round(float(values.mean()), 2), "max_ms": round(float(values.max()), 2)}
+
+
+def _peak_rss_mb(server_pid=None):
+    if server_pid:
+        try:
+            with open(f"/proc/{server_pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            return None
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def bench_endpoint(client, workload, endpoint, requests, concurrency, warmup, cold, poll_interval, server_pid):
+    report = {"endpoint": endpoint, "requests": requests, "concurrency": concurrency}
+
+    if cold and client.in_process:
+        from backend.models.registry import registry
+
+        registry.clear()
+        cold_s, ok = _timed(lambda: workload.request(client, endpoint, poll_interval))
+        report["cold_ms"] = round(1000 * cold_s, 2) if ok else None
+
+    for _ in range(warmup):
+        workload.request(client, endpoint, poll_interval)
+
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_timed, lambda: workload.request(client, endpoint, poll_interval))
+                   for _ in range(requests)]
+        for future in futures:
+            elapsed, ok = future.result()
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+    wall = time.perf_counter() - start
+
+    report.update(_percentiles(latencies))
+    report.update({
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall > 0 else 0.0,
+        "peak_rss_mb": _peak_rss_mb(server_pid),
+    })
+    return report
+
+
+def compare(results, baseline, tolerance):
+    """
+    Regressions of p95 latency and throughput beyond ``tolerance`` (relative) per endpoint.
+    """
+    regressions = []
+    previous = {item["endpoint"]: item for item in baseline.get("endpoints", [])}
+    for current in results["endpoints"]:
+        before = previous.get(current["endpoint"])
+        if not before:
+            continue
+        if before.get("p95_ms") and current.get("p95_ms") and current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{current['endpoint']}: p95 {before['p95_ms']} -> {current['p95_ms']} ms")
+        if before.get("throughput_rps") and current["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{current['endpoint']}: throughput {before['throughput_rps']} -> {current['throughput_rps']} req/s"
+            )
+        if current["errors"] > before.get("errors", 0):
+            regressions.append(f"{current['endpoint']}: errors {before.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--endpoints", nargs="+", default=list(IMAGE_ENDPOINTS),
+                        choices=IMAGE_ENDPOINTS + VIDEO_ENDPOINTS)
+    parser.add_argument("--requests", type=int, default=20, help="Timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--no-cold", action="store_true", help="Skip the cold-model request")
+    parser.add_argument("--no-unique", action="store_true", help="Send identical bytes (exercises the result cache)")
+    parser.add_argument("--images", default=os.path.join("sample_images", "*.jpg"))
+    parser.add_argument("--videos", default=os.path.join("sample_videos", "*.mp4"))
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--server-pid", type=int, help="Report this process's peak RSS (HTTP mode)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with a previous JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    client = Client(args.url)
+    workload = Workload(sorted(glob.glob(args.images)), sorted(glob.glob(args.videos)), unique=not args.no_unique)
+    results = {
+        "meta": {
+            "mode": "in-process" if client.in_process else "http",
+            "url": args.url,
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "endpoints": [],
+    }
+    for endpoint in args.endpoints:
+        report = bench_endpoint(client, workload, endpoint, args.requests, max(1, args.concurrency), args.warmup,
+                                not args.no_cold, args.poll_interval, args.server_pid)
+        results["endpoints"].append(report)
+        print(f"{endpoint:14s} p50 {report['p50_ms']} ms  p95 {report['p95_ms']} ms  p99 {report['p99_ms']} ms  "
+              f"{report['throughput_rps']} req/s  errors {report['errors']}  cold {report.get('cold_ms')} ms  "
+              f"peak RSS {report['peak_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Throughput and recall of tiled inference against full-frame inference on large images.
+
+    python -m benchmarks.tiling_bench [--task detect] [--grid 3] [--tile-size 640] [--overlap 0.2]
+
+Large test images are built as mosaics of ``grid x grid`` images from sample_images/.
+The reference detections are those of each sample image run on its own at native
+resolution, shifted to its place in the mosaic. Recall is the share of reference
+detections matched (same class, IoU >= ``--iou``) by each mode.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from backend.models.registry import registry
+from backend.service.detection_service import predict_tiled, result_to_dict
+from backend.service.tiling import offset_result
+from backend.service.tracking import iou_matrix
+
+
+def build_mosaics(imgs, grid):
+    """
+    Tile sample images into ``grid x grid`` mosaics.
+
+    Returns:
+        list: ``(mosaic, placements)`` with the ``(image index, x0, y0)`` of each cell.
+    """
+    cell_h = max(img.shape[0] for img in imgs)
+    cell_w = max(img.shape[1] for img in imgs)
+    per_mosaic = grid * grid
+    mosaics = []
+    for first in range(0, max(1, len(imgs) // per_mosaic) * per_mosaic, per_mosaic):
+        mosaic = np.full((grid * cell_h, grid * cell_w, 3), 114, dtype=np.uint8)
+        placements = []
+        for cell in range(per_mosaic):
+            index = (first + cell) % len(imgs)
+            img = imgs[index]
+            y0, x0 = (cell // grid) * cell_h, (cell % grid) * cell_w
+            mosaic[y0:y0 + img.shape[0], x0:x0 + img.shape[1]] = img
+            placements.append((index, x0, y0))
+        mosaics.append((mosaic, placements))
+    return mosaics
+
+
+def _recall(reference, candidate, iou_threshold):
+    if not reference["bboxes"]:
+        return None, 0
+    if not candidate["bboxes"]:
+        return 0.0, 0
+    ious = iou_matrix(reference["bboxes"], candidate["bboxes"])
+    same_class = np.asarray(reference["class_ids"])[:, None] == np.asarray(candidate["class_ids"])[None, :]
+    matched = int(((ious >= iou_threshold) & same_class).any(axis=1).sum())
+    return matched / len(reference["bboxes"]), matched
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--task", choices=["detect", "segment", "pose"], default="detect")
+    parser.add_argument("--images", default=os.path.join("sample_images", "*.jpg"))
+    parser.add_argument("--grid", type=int, default=3)
+    parser.add_argument("--tile-size", type=int, default=640)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--no-full-frame", action="store_true", help="Tiles only, without the downscaled pass")
+    parser.add_argument("--iou", type=float, default=0.5)
+    args = parser.parse_args()
+
+    model = registry.get(args.task)
+    imgs = [cv2.imread(path) for path in sorted(glob.glob(args.images))]
+    native = [result_to_dict(result, args.task) for result in model.predict(imgs)]
+
+    modes = {
+        "full_frame": lambda img: result_to_dict(model.predict([img])[0], args.task),
+        "tiled": lambda img: predict_tiled(img, args.task, args.tile_size, args.overlap, args.batch_size,
+                                           full_frame=not args.no_full_frame),
+    }
+    totals = {mode: {"seconds": 0.0, "detections": 0, "matched": 0} for mode in modes}
+    reference_total = 0
+    mosaics = build_mosaics(imgs, args.grid)
+    for mosaic, placements in mosaics:
+        reference = {"bboxes": [], "class_ids": []}
+        for index, x0, y0 in placements:
+            shifted = offset_result({"bboxes": native[index]["bboxes"]}, x0, y0)
+            reference["bboxes"] += shifted["bboxes"]
+            reference["class_ids"] += native[index]["class_ids"]
+        reference_total += len(reference["bboxes"])
+        for mode, run in modes.items():
+            run(mosaic)  # warm-up at this input size
+            output, seconds = _timed(run, mosaic)
+            _, matched = _recall(reference, output, args.iou)
+            totals[mode]["seconds"] += seconds
+            totals[mode]["detections"] += len(output["bboxes"])
+            totals[mode]["matched"] += matched
+
+    height, width = mosaics[0][0].shape[:2]
+    report = {
+        "task": args.task,
+        "image_size": [height, width],
+        "images": len(mosaics),
+        "reference_detections": reference_total,
+        "modes": {},
+    }
+    for mode, total in totals.items():
+        report["modes"][mode] = {
+            "mean_ms": round(1000 * total["seconds"] / len(mosaics), 1),
+            "images_per_second": round(len(mosaics) / total["seconds"], 3) if total["seconds"] else None,
+            "detections": total["detections"],
+            "recall": round(total["matched"] / reference_total, 4) if reference_total else None,
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,13 @@
-from backend.db.models import Base
-from backend.db.session import engine
+from backend.db.rollups import rebuild_rollups
+from backend.db.session import SessionLocal, init_db
+from backend.service.history_service import backfill_objects
 
-Base.metadata.create_all(bind=engine)
+init_db()
+print(f"Backfilled objects for {backfill_objects()} detections")
+
+# Rebuild rollups from the raw objects; run while the backend is stopped
+session = SessionLocal()
+try:
+    print(f"Rebuilt rollups from {rebuild_rollups(session)} objects")
+finally:
+    session.close()
@@ -2,10 +2,12 @@ import streamlit as st
 import requests
 from PIL import Image
 import cv2
+import json
+import numpy as np
 import tempfile
 import pandas as pd
-from sqlalchemy import create_engine
 import os
+from websockets.sync.client import connect
 
 st.set_page_config(page_title="YOLO Multi-Task App", layout="centered")
 st.title("🧠 YOLO Detection, Segmentation & Pose Estimation")
@@ -13,9 +15,11 @@ st.title("🧠 YOLO Detection, Segmentation & Pose Estimation")
 tabs = ["📁 Image Upload", "📷 Webcam Detection", "📊 Detection History", "📼 Video Upload"]
 tab1, tab2, tab3, tab4 = st.tabs(tabs)
 
+API_URL = "http://localhost:8000"
+
 def get_endpoint(task_type, is_video=False):
     prefix = "/video" if is_video else ""
-    return f"http://localhost:8000{prefix}/" + {
+    return f"{API_URL}{prefix}/" + {
         "Object Detection": "detect",
         "Segmentation": "segment",
         "Pose Estimation": "pose"
@@ -46,53 +50,99 @@ with tab1:
 with tab2:
     st.subheader("Live Webcam Detection")
     task_type = st.selectbox("Select Task", ["Object Detection", "Segmentation", "Pose Estimation"], key="webcam_task")
+    target_fps = st.slider("Target FPS", 1, 30, 10, key="webcam_fps")
     run_webcam = st.button("🎥 Start Webcam")
 
     if run_webcam:
         cap = cv2.VideoCapture(0)
         stframe = st.empty()
+        stinfo = st.empty()
         st.info("Press 'Stop' to terminate the webcam stream.")
 
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                st.warning("❌ Failed to read from webcam.")
-                break
-
-            _, buffer = cv2.imencode(".jpg", frame)
-            byte_img = buffer.tobytes()
-
-            try:
-                files = {"file": ("frame.jpg", byte_img, "image/jpeg")}
-                response = requests.post(get_endpoint(task_type), files=files)
-                if response.ok:
-                    result = response.json()
-                    img_path = result["result_path"]
-                    if os.path.exists(img_path):
-                        img = cv2.imread(img_path)
-                        stframe.image(img, channels="BGR", use_column_width=True)
-                    else:
-                        st.warning("⚠️ Result image not found.")
-                else:
-                    st.error("API returned an error: " + response.text)
-            except Exception as e:
-                st.error(f"Exception: {e}")
-                break
+        # Frames and annotated results travel over one WebSocket; the server only
+        # processes the newest frame, so the preview never lags behind the camera.
+        task = get_endpoint(task_type).rsplit("/", 1)[-1]
+        ws_url = f"{API_URL.replace('http', 'ws', 1)}/ws/{task}?fps={target_fps}"
+        try:
+            with connect(ws_url, max_size=None) as ws:
+                while cap.isOpened():
+                    ret, frame = cap.read()
+                    if not ret:
+                        st.warning("❌ Failed to read from webcam.")
+                        break
+
+                    _, buffer = cv2.imencode(".jpg", frame)
+                    ws.send(buffer.tobytes())
+
+                    # Show whatever results arrived meanwhile, without waiting for this frame's
+                    try:
+                        while True:
+                            message = ws.recv(timeout=0.001)
+                            if isinstance(message, bytes):
+                                img = cv2.imdecode(np.frombuffer(message, np.uint8), cv2.IMREAD_COLOR)
+                                stframe.image(img, channels="BGR", use_column_width=True)
+                            else:
+                                info = json.loads(message)
+                                if "error" in info:
+                                    st.warning(info["error"])
+                                else:
+                                    stinfo.caption(f"Latency {info['latency_ms']} ms · "
+                                                   f"dropped {info['dropped']} of {info['received']} frames")
+                    except TimeoutError:
+                        pass
+        except Exception as e:
+            st.error(f"Exception: {e}")
 
         cap.release()
 
 # ---- Tab 3: Detection History ----
 with tab3:
-    st.subheader("Detection History (SQLite)")
+    st.subheader("Detection History")
+    col1, col2, col3 = st.columns(3)
+    class_filter = col1.text_input("Class", key="history_class")
+    task_filter = col2.selectbox("Task", ["All", "detect", "segment", "pose"], key="history_task")
+    min_conf = col3.slider("Min confidence", 0.0, 1.0, 0.0, key="history_conf")
+
+    filters = {"limit": 50}
+    if class_filter:
+        filters["class_name"] = class_filter
+    if task_filter != "All":
+        filters["task"] = task_filter
+    if min_conf > 0:
+        filters["min_confidence"] = min_conf
+
+    # Restart paging whenever the filters change
+    if st.session_state.get("history_filters") != filters:
+        st.session_state["history_filters"] = filters
+        st.session_state["history_rows"] = []
+        st.session_state["history_cursor"] = None
+        st.session_state["history_loaded"] = False
+
+    def load_history_page():
+        params = dict(filters)
+        if st.session_state["history_cursor"]:
+            params["cursor"] = st.session_state["history_cursor"]
+        response = requests.get(f"{API_URL}/detections", params=params)
+        response.raise_for_status()
+        page = response.json()
+        st.session_state["history_rows"].extend(page["items"])
+        st.session_state["history_cursor"] = page["next_cursor"]
+        st.session_state["history_loaded"] = True
+
     try:
-        engine = create_engine("sqlite:///detections.db")
-        df = pd.read_sql("SELECT timestamp, filename, class_names FROM detections ORDER BY timestamp DESC", engine)
-        if df.empty:
+        if not st.session_state["history_loaded"]:
+            load_history_page()
+        if st.session_state["history_cursor"] and st.button("Load more", key="history_more"):
+            load_history_page()
+
+        rows = st.session_state["history_rows"]
+        if not rows:
             st.info("No detections yet.")
         else:
+            df = pd.DataFrame(rows)[["timestamp", "filename", "task", "class_names"]]
             st.dataframe(df)
-    except Exception as e:
-        st.error("Database not available or not populated yet.")
+    except requests.exceptions.RequestException as e:
+        st.error("History API not available.")
         st.code(str(e))
 
 # # ---- Tab 4: Upload Video ----
@@ -0,0 +1,16 @@
+import os
+import shutil
+import tempfile
+
+# Keep the database and output files written by the API tests out of the working tree. Set before
+# any backend module is imported, since the engine and output paths are read at import time.
+_OUTPUT_DIR = tempfile.mkdtemp(prefix="yolo-api-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_OUTPUT_DIR, 'detections.db')}"
+os.environ["RESULTS_DIR"] = os.path.join(_OUTPUT_DIR, "results")
+os.environ["VIDEO_RESULTS_DIR"] = os.path.join(_OUTPUT_DIR, "video_results")
+os.environ["RESULT_CACHE_DIR"] = os.path.join(_OUTPUT_DIR, "cache")
+os.environ["PROFILE_DIR"] = os.path.join(_OUTPUT_DIR, "profiles")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_OUTPUT_DIR, ignore_errors=True)
@@ -0,0 +1,26 @@
+# Stand-in for cv2.VideoCapture that yields frames; read number fail_at raises
+class FakeCapture:
+    def __init__(self, frames, fail_at=None):
+        self.frames = list(frames)
+        self.fail_at = fail_at
+        self.reads = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.reads == self.fail_at:
+            raise IOError("corrupt packet")
+        self.reads += 1
+        return (True, self.frames.pop(0)) if self.frames else (False, None)
+
+# Stand-in for cv2.VideoWriter that collects frames; raises once fail_at frames are written
+class ListWriter(list):
+    def __init__(self, fail_at=None):
+        super().__init__()
+        self.fail_at = fail_at
+
+    def write(self, frame):
+        if len(self) == self.fail_at:
+            raise IOError("disk full")
+        self.append(frame)
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from backend.service.analysis_service import letterbox, parse_tasks, unletterbox
+
+def test_letterbox_pads_to_stride_and_maps_back():
+    img = np.zeros((435, 640, 3), dtype=np.uint8)
+    tensor, ratio, pad = letterbox(img, size=320)
+    assert tuple(tensor.shape) == (1, 3, 224, 320)
+    assert ratio == 0.5 and pad == (0, 3)
+
+    # A box and keypoint at known original positions, expressed in letterboxed coordinates
+    data = {
+        "class_names": ["person"], "confidences": [0.9],
+        "bboxes": [[10 * ratio + pad[0], 20 * ratio + pad[1], 100 * ratio + pad[0], 200 * ratio + pad[1]]],
+        "keypoints": [[[50 * ratio + pad[0], 60 * ratio + pad[1], 0.8]]],
+    }
+    mapped = unletterbox(data, ratio, pad, img.shape[:2])
+    assert np.allclose(mapped["bboxes"][0], [10, 20, 100, 200])
+    assert np.allclose(mapped["keypoints"][0][0], [50, 60, 0.8])
+    assert mapped["image_size"] == [435, 640]
+
+def test_parse_tasks():
+    assert parse_tasks(["pose,detect", "pose"]) == ["pose", "detect"]
+    with pytest.raises(ValueError):
+        parse_tasks(["classify"])
@@ -1,19 +1,31 @@
+import io
+import json
 import os
+import threading
+import time
+import zipfile
+import cv2
+import numpy as np
 from fastapi.testclient import TestClient
+import backend.main
 from backend.main import app
+from backend.db.writer import writer
+from backend.service.result_cache import result_cache
+from backend.service.workers import WorkerPool
 
 client = TestClient(app)
 
 SAMPLE_IMAGE = os.path.join(os.path.dirname(__file__), "..", "sample_images", "1.jpg")
+SAMPLE_VIDEO = os.path.join(os.path.dirname(__file__), "..", "sample_videos", "car-detection.mp4")
 
 def test_health():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
-def _post_image(endpoint: str):
-    with open(SAMPLE_IMAGE, "rb") as f:
-        return client.post(endpoint, files={"file": ("1.jpg", f, "image/jpeg")})
+def _post_image(endpoint: str, path: str = SAMPLE_IMAGE):
+    with open(path, "rb") as f:
+        return client.post(endpoint, files={"file": (os.path.basename(path), f, "image/jpeg")})
 
 def test_detect_endpoint():
     response = _post_image("/detect")
@@ -36,3 +48,255 @@ def test_pose_endpoint():
     assert "result_path" in data
     assert "class_names" in data
 
+
+def test_models_are_shared_between_requests():
+    result_cache.clear()
+    _post_image("/detect")
+    before = client.get("/diagnostics").json()["models"]
+    _post_image("/detect", SAMPLE_IMAGE.replace("1.jpg", "2.jpg"))
+    after = client.get("/diagnostics").json()["models"]
+    assert after["loads"] == before["loads"]
+    assert after["hits"] > before["hits"]
+
+def test_repeated_image_is_served_from_cache():
+    first = _post_image("/detect").json()
+    before = client.get("/diagnostics").json()
+    second = _post_image("/detect").json()
+    after = client.get("/diagnostics").json()
+    assert second["cached"] is True
+    assert second["result_path"] == first["result_path"]
+    assert after["models"]["hits"] == before["models"]["hits"]
+    assert after["result_cache"]["memory_hits"] > before["result_cache"]["memory_hits"]
+
+def test_saturated_pool_returns_503(monkeypatch):
+    busy = WorkerPool(kind="thread", max_workers=1, max_pending=0)
+    release = threading.Event()
+    busy.submit(release.wait)
+    monkeypatch.setattr(backend.main, "pool", busy)
+    try:
+        response = _post_image("/detect")
+    finally:
+        release.set()
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+
+def test_video_job_can_be_polled_and_cancelled():
+    with open(SAMPLE_VIDEO, "rb") as f:
+        response = client.post("/video/detect", files={"file": ("car.mp4", f, "video/mp4")})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    assert client.get(f"/jobs/{job_id}").status_code == 200
+    assert client.delete(f"/jobs/{job_id}").status_code == 200
+
+    for _ in range(100):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("completed", "cancelled", "failed"):
+            break
+        time.sleep(0.1)
+    assert job["status"] in ("completed", "cancelled")
+
+def test_unknown_job_returns_404():
+    assert client.get("/jobs/does-not-exist").status_code == 404
+
+def test_detection_history_is_paginated():
+    _post_image("/detect")
+    _post_image("/detect")
+    writer.flush()
+    first = client.get("/detections", params={"task": "detect", "limit": 1}).json()
+    assert len(first["items"]) == 1
+    assert first["next_cursor"]
+
+    second = client.get("/detections", params={"task": "detect", "limit": 1, "cursor": first["next_cursor"]}).json()
+    assert second["items"][0]["id"] != first["items"][0]["id"]
+    assert second["items"][0]["timestamp"] <= first["items"][0]["timestamp"]
+
+def test_detection_history_rejects_bad_cursor():
+    assert client.get("/detections", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_stats_are_served_from_rollups():
+    _post_image("/detect")
+    writer.flush()
+    response = client.get("/stats", params={"granularity": "day", "task": "detect"})
+    assert response.status_code == 200
+    for bucket in response.json()["buckets"]:
+        assert bucket["task"] == "detect"
+        assert bucket["count"] > 0
+
+def test_stats_rejects_unknown_granularity():
+    assert client.get("/stats", params={"granularity": "week"}).status_code == 400
+
+def test_json_only_request_is_rendered_on_demand():
+    with open(SAMPLE_IMAGE, "rb") as f:
+        response = client.post("/segment", params={"render": "false"}, files={"file": ("1.jpg", f, "image/jpeg")})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["result_path"] is None
+    assert "masks" in data and "confidences" in data and "bboxes" in data
+
+    rendered = client.get(f"/render/{data['detection_id']}")
+    assert rendered.status_code == 200
+    assert rendered.headers["content-type"] == "image/jpeg"
+    assert client.get(f"/render/{data['detection_id']}").content == rendered.content
+
+def test_render_unknown_detection_returns_404():
+    assert client.get("/render/not-an-id").status_code == 404
+
+def test_pose_keypoints_as_npy():
+    with open(SAMPLE_IMAGE, "rb") as f:
+        response = client.post("/pose", headers={"Accept": "application/x-npy"},
+                               files={"file": ("1.jpg", f, "image/jpeg")})
+    assert response.status_code == 200
+    keypoints = np.load(io.BytesIO(response.content))
+    assert keypoints.ndim == 3 and keypoints.shape[-1] == 3
+    assert "x-class-names" in response.headers
+
+def test_unsupported_accept_returns_406():
+    with open(SAMPLE_IMAGE, "rb") as f:
+        response = client.post("/detect", headers={"Accept": "text/html"}, files={"file": ("1.jpg", f, "image/jpeg")})
+    assert response.status_code == 406
+
+def test_analyze_runs_several_tasks_in_one_request():
+    with open(SAMPLE_IMAGE, "rb") as f:
+        response = client.post("/analyze", params={"tasks": ["detect", "pose"]},
+                               files={"file": ("1.jpg", f, "image/jpeg")})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["tasks"] == ["detect", "pose"]
+    assert set(data["results"]) == {"detect", "pose"}
+    writer.flush()
+    history = client.get("/detections", params={"task": "detect+pose"}).json()
+    assert data["detection_id"] in [item["id"] for item in history["items"]]
+
+def test_analyze_rejects_unknown_task():
+    with open(SAMPLE_IMAGE, "rb") as f:
+        response = client.post("/analyze", params={"tasks": "classify"}, files={"file": ("1.jpg", f, "image/jpeg")})
+    assert response.status_code == 400
+
+def test_batch_streams_ndjson_with_summary():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for name in ("1.jpg", "2.jpg"):
+            zf.write(SAMPLE_IMAGE.replace("1.jpg", name), name)
+    archive.seek(0)
+    with open(SAMPLE_IMAGE, "rb") as f:
+        response = client.post("/batch/detect", files=[
+            ("files", ("images.zip", archive, "application/zip")),
+            ("files", ("1.jpg", f, "image/jpeg")),
+            ("files", ("broken.jpg", io.BytesIO(b"not an image"), "image/jpeg")),
+        ])
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["name"] for line in lines[:-1]) == ["1.jpg", "broken.jpg", "images.zip/1.jpg", "images.zip/2.jpg"]
+    assert lines[-1]["summary"]["images"] == 3
+    assert lines[-1]["summary"]["failed"] == 1
+
+def test_failed_batch_streams_release_their_slot(monkeypatch):
+    from backend.service import batch_service
+
+    def unavailable(task, model_path=None):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(batch_service.registry, "get", unavailable)
+    failing = TestClient(app, raise_server_exceptions=False)
+    for _ in range(4):
+        with open(SAMPLE_IMAGE, "rb") as f:
+            response = failing.post("/batch/detect", files=[("files", ("1.jpg", f, "image/jpeg"))])
+        assert response.status_code != 503
+    monkeypatch.undo()
+    with open(SAMPLE_IMAGE, "rb") as f:
+        response = client.post("/batch/detect", files=[("files", ("1.jpg", f, "image/jpeg"))])
+    assert response.status_code == 200
+    # The decoder threads of the failed streams were stopped
+    deadline = time.time() + 5
+    while [t for t in threading.enumerate() if t.name.startswith("batch-decode-")] and time.time() < deadline:
+        time.sleep(0.05)
+    assert not [t for t in threading.enumerate() if t.name.startswith("batch-decode-")]
+
+def test_websocket_stream_returns_detections_and_frames():
+    with open(SAMPLE_IMAGE, "rb") as f:
+        frame = f.read()
+    with client.websocket_connect("/ws/detect?fps=30") as ws:
+        ws.send_bytes(frame)
+        message = ws.receive_json()
+        assert message["frame"] == 1
+        assert "class_names" in message
+        assert ws.receive_bytes()[:2] == b"\xff\xd8"
+
+        ws.send_text(json.dumps({"mode": "detections"}))
+        ws.send_bytes(frame)
+        assert ws.receive_json()["frame"] == 2
+
+def test_metrics_expose_requests_and_stages():
+    _post_image("/detect?render=true", os.path.join(os.path.dirname(__file__), "..", "sample_images", "4.jpg"))
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_requests_total{method="POST",route="/detect",status="200"}' in text
+    assert 'stage_duration_seconds_count{stage="detect_inference"}' in text
+    assert 'queue_depth{queue="db_writer"}' in text
+
+def test_slow_requests_dump_profiles_from_the_shared_sampler(monkeypatch, tmp_path):
+    from backend.service.metrics import SamplingProfiler
+
+    profiler = SamplingProfiler(interval_ms=1, window_s=10)
+    # Only the output directory changes; the middleware calls dump(name, stacks=...)
+    real_dump = profiler.dump
+    monkeypatch.setattr(profiler, "dump", lambda name, stacks=None: real_dump(name, str(tmp_path), stacks))
+    monkeypatch.setattr(backend.main, "profiler", profiler)
+    monkeypatch.setattr(backend.main, "PROFILE_SLOW_MS", 0.001)
+    try:
+        with open(SAMPLE_IMAGE, "rb") as f:
+            # Trailing bytes make the upload unique, so the request runs the model instead of hitting the cache
+            data = f.read() + os.urandom(16)
+        for _ in range(2):
+            assert client.post("/detect", files={"file": ("1.jpg", data, "image/jpeg")}).status_code == 200
+        # Requests share one sampler thread instead of starting their own
+        assert [t.name for t in threading.enumerate()].count("sampling-profiler") == 1
+        deadline = time.time() + 5
+        while not list(tmp_path.glob("*POST-detect.folded")) and time.time() < deadline:
+            time.sleep(0.05)
+        assert list(tmp_path.glob("*POST-detect.folded"))
+    finally:
+        profiler.stop()
+
+def test_rendered_segment_keeps_bgr_order():
+    frame = np.zeros((96, 128, 3), dtype=np.uint8)
+    frame[..., 0], frame[..., 1], frame[..., 2] = 20, 120, 220
+    ok, buffer = cv2.imencode(".png", frame)
+    # Trailing bytes make the upload unique, so it is rendered rather than served from the result cache
+    data = buffer.tobytes() + os.urandom(16)
+    response = client.post("/segment?render=true", files={"file": ("solid.png", data, "image/png")})
+    assert response.status_code == 200
+    annotated = cv2.imread(response.json()["result_path"])
+    assert np.abs(annotated.reshape(-1, 3).mean(axis=0) - [20, 120, 220]).max() < 10
+
+def test_ready_reports_startup_state():
+    response = client.get("/ready")
+    assert response.status_code in (200, 503)
+    assert response.json()["status"] in ("pending", "warming", "ready", "failed")
+    assert "import" in response.json()["seconds"]
+
+def test_tiled_inference_on_large_image():
+    img = cv2.imread(SAMPLE_IMAGE)
+    large = np.vstack([np.hstack([img, img]), np.hstack([img, img])])
+    data = cv2.imencode(".jpg", large)[1].tobytes()
+    response = client.post("/detect?tiled=true&render=true", files={"file": ("large.jpg", data, "image/jpeg")})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["tiles"] > 1
+    assert result["image_size"] == list(large.shape[:2])
+    assert os.path.exists(result["result_path"])
+
+def test_preprocessing_per_request():
+    with open(SAMPLE_IMAGE, "rb") as f:
+        # Trailing bytes make the upload unique, so the result cache cannot answer it
+        data = f.read() + os.urandom(16)
+    response = client.post("/detect", params={"preprocess": "gamma=1.8,clahe=2", "render": "false"},
+                           files={"file": ("night.jpg", data, "image/jpeg")})
+    assert response.status_code == 200
+    assert response.json()["cached"] is False
+    response = client.post("/detect", params={"preprocess": "sharpen=1"},
+                           files={"file": ("night.jpg", data, "image/jpeg")})
+    assert response.status_code == 400
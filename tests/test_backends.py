@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from backend.models.backends import calibration_data, exported_path, export_weights, load_yolo, quantized_path
+
+def test_exported_path_tracks_source_weights(tmp_path):
+    weights = tmp_path / "model.pt"
+    weights.write_bytes(b"v1")
+    first = exported_path(str(weights), "onnx", export_dir=str(tmp_path / "exported"))
+    assert first.endswith(".onnx")
+    assert exported_path(str(weights), "onnx", int8=True, export_dir=str(tmp_path)) != first
+
+    weights.write_bytes(b"v2-longer")
+    os.utime(weights, ns=(1, 1))
+    assert exported_path(str(weights), "onnx", export_dir=str(tmp_path / "exported")) != first
+
+def test_int8_needs_an_exported_backend(tmp_path):
+    with pytest.raises(ValueError):
+        load_yolo("models/yolov8n.pt", "detect", "torch", int8=True)
+    with pytest.raises(ValueError):
+        export_weights("models/yolov8n.pt", "torchscript", int8=True, export_dir=str(tmp_path))
+
+def test_unknown_backend_is_rejected(tmp_path):
+    weights = tmp_path / "model.pt"
+    weights.write_bytes(b"v1")
+    with pytest.raises(ValueError):
+        exported_path(str(weights), "tensorrt")
+
+def test_calibration_data_is_a_local_dataset(tmp_path):
+    from ultralytics.data.utils import check_det_dataset
+
+    data = check_det_dataset(calibration_data(str(tmp_path), {0: "person", 1: "car"}, "sample_images"))
+    assert data["names"] == {0: "person", 1: "car"}
+    assert len(os.listdir(data["val"])) == len(os.listdir("sample_images"))
+    assert str(data["val"]).startswith(str(tmp_path))
+    with pytest.raises(ValueError):
+        calibration_data(str(tmp_path / "other"), {0: "person"}, str(tmp_path / "empty"))
+
+def test_quantized_path_only_changes_the_extension(tmp_path):
+    weights = tmp_path / "yolov8n.pt"
+    weights.write_bytes(b"v1")
+    target = exported_path(str(weights), "onnx", int8=True, export_dir=str(tmp_path))
+    # The export lands in a work directory named after the target, like export_weights does
+    exported = os.path.join(f"{target}.1234.tmp", "yolov8n.onnx")
+    assert quantized_path(exported) == os.path.join(f"{target}.1234.tmp", "yolov8n.int8.onnx")
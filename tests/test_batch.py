@@ -0,0 +1,34 @@
+import io
+import tarfile
+import zipfile
+
+from backend.service.batch_service import iter_entries
+
+def _zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+def _tar(entries):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in entries.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+def test_iter_entries_reads_archives_and_plain_files():
+    files = [
+        ("a.zip", _zip({"x/1.jpg": b"one", "notes.txt": b"skip", "x/.hidden.jpg": b"skip"})),
+        ("b.tar.gz", _tar({"2.png": b"two"})),
+        ("3.jpg", io.BytesIO(b"three")),
+    ]
+    assert list(iter_entries(files)) == [("a.zip/x/1.jpg", b"one"), ("b.tar.gz/2.png", b"two"), ("3.jpg", b"three")]
+
+def test_zip_is_detected_without_extension():
+    assert list(iter_entries([("upload", _zip({"1.jpg": b"one"}))])) == [("upload/1.jpg", b"one")]
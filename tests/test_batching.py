@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from backend.service import batching
+from backend.service.batching import BatchScheduler
+
+class _FakeModel:
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def predict(self, imgs):
+        self.batches.append(list(imgs))
+        if self.error is not None:
+            raise self.error
+        return [f"result-{img}" for img in imgs]
+
+class _FakeRegistry:
+    def __init__(self, model):
+        self.model = model
+
+    def get(self, task, model_path=None):
+        return self.model
+
+@pytest.fixture
+def model(monkeypatch):
+    model = _FakeModel()
+    monkeypatch.setattr(batching, "registry", _FakeRegistry(model))
+    return model
+
+def test_full_batch_flushes_before_the_deadline(model):
+    scheduler = BatchScheduler("detect", max_batch_size=4, max_wait_ms=10_000)
+    started = time.perf_counter()
+    futures = [scheduler.submit(i) for i in range(4)]
+    assert [future.result(timeout=5) for future in futures] == [f"result-{i}" for i in range(4)]
+    assert time.perf_counter() - started < 5
+    assert model.batches == [[0, 1, 2, 3]]
+
+def test_partial_batch_flushes_after_max_wait(model):
+    scheduler = BatchScheduler("detect", max_batch_size=8, max_wait_ms=50)
+    started = time.perf_counter()
+    futures = [scheduler.submit(i) for i in range(3)]
+    assert [future.result(timeout=5) for future in futures] == ["result-0", "result-1", "result-2"]
+    assert time.perf_counter() - started >= 0.05
+    assert model.batches == [[0, 1, 2]]
+
+def test_each_caller_gets_its_own_result(model):
+    scheduler = BatchScheduler("detect", max_batch_size=3, max_wait_ms=20)
+    futures = {img: scheduler.submit(img) for img in ("a", "b", "c", "d", "e", "f", "g")}
+    for img, future in futures.items():
+        assert future.result(timeout=5) == f"result-{img}"
+    assert max(len(batch) for batch in model.batches) <= 3
+
+def test_model_error_reaches_every_future_in_the_batch(model):
+    model.error = RuntimeError("out of memory")
+    scheduler = BatchScheduler("detect", max_batch_size=3, max_wait_ms=10_000)
+    futures = [scheduler.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="out of memory"):
+            future.result(timeout=5)
+    assert scheduler.stats()["errors"] == 3
+    assert scheduler.stats()["batches"] == 0
+
+def test_stats_count_batches_and_waits(model):
+    scheduler = BatchScheduler("detect", max_batch_size=2, max_wait_ms=10_000)
+    for future in [scheduler.submit(i) for i in range(4)]:
+        future.result(timeout=5)
+    stats = scheduler.stats()
+    assert stats["batches"] == 2
+    assert stats["images"] == 4
+    assert stats["batch_sizes"] == {"2": 2}
+    assert stats["mean_batch_size"] == 2.0
+    assert stats["max_wait_ms"] >= stats["mean_wait_ms"] > 0
+    assert stats["errors"] == 0
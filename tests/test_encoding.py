@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend.service.encoding import (
+    JSON, NPY, NotAcceptableError, compact_result, encode_result, negotiate, polygon_mask, polygon_rle, rle_decode,
+    rle_encode, unpack_array,
+)
+
+RESULT = {
+    "detection_id": "abc",
+    "image_size": [40, 60],
+    "class_names": ["person"],
+    "class_ids": [0],
+    "confidences": [0.9],
+    "bboxes": [[5.0, 5.0, 30.0, 35.0]],
+    "masks": [[[5, 5], [30, 5], [30, 35], [5, 35]]],
+    "keypoints": [[[10.0, 12.0, 0.8]] * 17],
+}
+
+def test_negotiate():
+    assert negotiate(None) == JSON
+    assert negotiate("*/*") == JSON
+    assert negotiate("text/html;q=0.9, application/x-npy") == NPY
+    assert negotiate("application/x-npy;q=0.5, application/json") == JSON
+    with pytest.raises(NotAcceptableError):
+        negotiate("text/html")
+
+def test_rle_round_trip():
+    mask = polygon_mask(RESULT["masks"][0], RESULT["image_size"])
+    assert mask.sum() > 0
+    rle = rle_encode(mask)
+    assert sum(rle["counts"]) == mask.size
+    assert np.array_equal(rle_decode(rle), mask)
+
+def test_polygon_rle_matches_full_mask():
+    size = RESULT["image_size"]
+    for polygon in (RESULT["masks"][0], [[0, 0], [10, 0], [10, 39]], [[50, 3], [59.6, 3], [59.6, 20]]):
+        assert polygon_rle(polygon, size) == rle_encode(polygon_mask(polygon, size))
+
+def test_rle_mask_starting_with_ones():
+    mask = np.ones((2, 2), dtype=np.uint8)
+    assert rle_encode(mask)["counts"] == [0, 4]
+
+def test_compact_json_packs_keypoints_and_rle_masks():
+    compact = compact_result(RESULT, mask_format="rle")
+    assert compact["masks"][0]["size"] == [40, 60]
+    keypoints = unpack_array(compact["keypoints"])
+    assert keypoints.shape == (1, 17, 3)
+    assert np.allclose(keypoints[0, 0], [10.0, 12.0, 0.8])
+    body, _ = encode_result(RESULT, JSON, "rle")
+    assert json.loads(body)["mask_format"] == "rle"
+
+def test_npy_carries_keypoints_and_headers():
+    body, headers = encode_result(RESULT, NPY)
+    assert json.loads(headers["X-Class-Names"]) == ["person"]
+    assert body.startswith(b"\x93NUMPY")
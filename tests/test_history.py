@@ -0,0 +1,61 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.db.models import Base, Detection
+from backend.service import history_service
+from backend.service.history_service import build_objects, query_detections
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    t0 = datetime.datetime(2025, 1, 1)
+    for i in range(20):
+        timestamp = t0 + datetime.timedelta(minutes=i)
+        class_names = ["person", "dog"] if i % 4 == 0 else ["car"]
+        confidences = [0.9] * len(class_names)
+        bboxes = [[0, 0, 1, 1]] * len(class_names)
+        session.add(Detection(
+            timestamp=timestamp, filename=f"{i % 2}.jpg", task="detect", class_names=class_names,
+            confidences=confidences, bboxes=bboxes,
+            objects=build_objects(class_names, confidences, bboxes, timestamp, f"{i % 2}.jpg", "detect"),
+        ))
+    session.commit()
+    session.close()
+    monkeypatch.setattr(history_service, "SessionLocal", sessionmaker(bind=engine))
+    return engine
+
+def _plan(engine, sql):
+    with engine.connect() as conn:
+        return " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+def test_class_filter_pages_through_matching_detections(engine):
+    first = query_detections(class_name="dog", limit=3)
+    second = query_detections(class_name="dog", limit=3, cursor=first["next_cursor"])
+    items = first["items"] + second["items"]
+    assert len(items) == 5
+    assert second["next_cursor"] is None
+    assert all("dog" in item["class_names"] for item in items)
+    assert [item["timestamp"] for item in items] == sorted((item["timestamp"] for item in items), reverse=True)
+
+def test_filters_use_indexes(engine):
+    filename_plan = _plan(engine, "SELECT id FROM detections WHERE filename = '1.jpg'")
+    assert "ix_detections_filename" in filename_plan
+    class_plan = _plan(engine, (
+        "SELECT id FROM detections WHERE EXISTS (SELECT 1 FROM detection_objects o WHERE o.class_name = 'dog' "
+        "AND o.timestamp = detections.timestamp AND o.detection_id = detections.id) "
+        "ORDER BY timestamp DESC LIMIT 3"
+    ))
+    assert "ix_detection_objects_class_timestamp_detection" in class_plan
+    task_plan = _plan(engine, (
+        "SELECT id FROM detections WHERE task = 'detect' AND (timestamp < '2025-01-01 00:10:00' "
+        "OR (timestamp = '2025-01-01 00:10:00' AND id < 'f')) ORDER BY timestamp DESC, id DESC LIMIT 3"
+    ))
+    assert "ix_detections_task_timestamp_id" in task_plan
+    assert "TEMP B-TREE" not in task_plan
+    assert len(query_detections(filename="1.jpg", limit=100)["items"]) == 10
@@ -0,0 +1,27 @@
+import json
+
+from benchmarks.load_bench import _percentiles, compare, main
+
+def test_percentiles_in_milliseconds():
+    stats = _percentiles([0.01] * 98 + [0.5, 1.0])
+    assert stats["p50_ms"] == 10.0
+    assert stats["p95_ms"] == 10.0
+    assert stats["max_ms"] == 1000.0
+    assert _percentiles([])["p95_ms"] is None
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {"endpoints": [{"endpoint": "detect", "p95_ms": 100.0, "throughput_rps": 10.0, "errors": 0}]}
+    within = {"endpoints": [{"endpoint": "detect", "p95_ms": 115.0, "throughput_rps": 9.0, "errors": 0}]}
+    slower = {"endpoints": [{"endpoint": "detect", "p95_ms": 130.0, "throughput_rps": 7.0, "errors": 1}]}
+    assert compare(within, baseline, 0.2) == []
+    assert len(compare(slower, baseline, 0.2)) == 3
+
+def test_in_process_run_writes_results(tmp_path):
+    output = tmp_path / "bench.json"
+    main(["--endpoints", "detect", "--requests", "2", "--concurrency", "2", "--warmup", "0",
+          "--no-cold", "--output", str(output)])
+    report = json.loads(output.read_text())["endpoints"][0]
+    assert report["endpoint"] == "detect"
+    assert report["errors"] == 0
+    assert report["p99_ms"] >= report["p50_ms"] > 0
+    assert report["peak_rss_mb"] > 0
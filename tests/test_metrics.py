@@ -0,0 +1,59 @@
+import threading
+import time
+
+from backend.service.metrics import MetricsRegistry, SamplingProfiler
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value, stage="decode")
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{stage="decode",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{stage="decode",le="1"} 3' in text
+    assert 'latency_seconds_bucket{stage="decode",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{stage="decode"} 4' in text
+
+def test_collectors_refresh_gauges_on_render():
+    registry = MetricsRegistry()
+    depth = registry.gauge("queue_depth", "Depth.", ("queue",))
+    pending = []
+    registry.add_collector(lambda: depth.set(len(pending), queue="writer"))
+    pending.extend([1, 2])
+    assert 'queue_depth{queue="writer"} 2' in registry.render()
+
+def test_sampling_profiler_dumps_collapsed_stacks(tmp_path):
+    def busy():
+        end = time.perf_counter() + 0.2
+        while time.perf_counter() < end:
+            pass
+
+    profiler = SamplingProfiler(interval_ms=2).start()
+    thread = threading.Thread(target=busy, name="busy-worker")
+    thread.start()
+    thread.join()
+    profiler.stop()
+    path = profiler.dump("slow", profile_dir=str(tmp_path))
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert any(line.startswith("busy-worker;") and ":busy " in line for line in lines)
+
+def test_shared_profiler_returns_the_window_of_one_request():
+    profiler = SamplingProfiler(interval_ms=1, window_s=5)
+    assert profiler.start() is profiler.start()
+    try:
+        time.sleep(0.05)
+        start = time.perf_counter()
+        thread = threading.Thread(target=time.sleep, args=(0.1,), name="window-worker")
+        thread.start()
+        thread.join()
+        end = time.perf_counter()
+        time.sleep(0.05)
+        inside = profiler.window(start, end)
+        before = profiler.window(start - 0.05, start - 0.01)
+    finally:
+        profiler.stop()
+    assert any(stack.startswith("window-worker;") for stack in inside)
+    assert not any(stack.startswith("window-worker;") for stack in before)
+    assert not profiler.stacks
@@ -0,0 +1,34 @@
+import numpy as np
+from backend.models.registry import registry
+from backend.service.motion import MotionGate
+from backend.service.video_service import _annotate_fn, _annotate_frames
+from tests.fakes import FakeCapture, ListWriter
+
+def _frame(value):
+    return np.full((120, 160, 3), value, dtype=np.uint8)
+
+def test_static_frames_are_skipped_up_to_max_skip():
+    gate = MotionGate(threshold=4.0, max_skip=3)
+    decisions = [gate.should_infer(_frame(100)) for _ in range(6)]
+    assert decisions == [True, False, False, False, True, False]
+    assert gate.stats()["skipped_frames"] == 4
+
+def test_changed_frame_is_inferred():
+    gate = MotionGate(threshold=4.0, max_skip=10)
+    assert gate.should_infer(_frame(100))
+    assert not gate.should_infer(_frame(102))
+    assert gate.should_infer(_frame(150))
+
+def test_gated_segment_frames_keep_bgr_order():
+    # Static frames with distinct channels: the first is inferred, the rest reuse its result
+    frame = np.zeros((96, 128, 3), dtype=np.uint8)
+    frame[..., 0], frame[..., 1], frame[..., 2] = 20, 120, 220
+    writer = ListWriter()
+    count, stats = _annotate_frames(FakeCapture(frame.copy() for _ in range(6)), writer,
+                                    _annotate_fn(registry.get("segment")), batch_size=3, motion_gating=True,
+                                    task="segment")
+    assert count == 6
+    assert stats["motion"]["skipped_frames"] > 0
+    for output in writer:
+        assert output.shape == frame.shape
+        assert np.array_equal(output[0, 0], frame[0, 0])
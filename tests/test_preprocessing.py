@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+import pytest
+
+import backend.service.preprocessing as preprocessing
+from backend.service.preprocessing import (
+    Preprocessor, adjust_gamma, apply_clahe, gamma_lut, get_clahe, get_preprocessor, resolve_preprocess,
+)
+
+def _image():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 80, size=(120, 160, 3), dtype=np.uint8)  # dark, like night footage
+
+def test_pipeline_matches_individual_steps():
+    img = _image()
+    expected = apply_clahe(adjust_gamma(img, 1.8), 2.0, 8)
+    assert np.array_equal(Preprocessor(gamma=1.8, clahe=2.0).apply(img), expected)
+
+def test_in_place_and_batch_agree():
+    img = _image()
+    preprocessor = get_preprocessor("gamma=1.8,clahe=2")
+    expected = preprocessor.apply(img)
+    frame = img.copy()
+    assert preprocessor.apply(frame, out=frame) is frame and np.array_equal(frame, expected)
+
+    frames = np.stack([img, img])
+    assert np.array_equal(preprocessor.apply_batch(frames)[1], expected)
+    lut_only = get_preprocessor("gamma=1.8")
+    assert np.array_equal(lut_only.apply_batch(frames, inplace=True)[0], adjust_gamma(img, 1.8))
+    assert all(np.array_equal(out, expected) for out in preprocessor.apply_batch([img.copy(), img.copy()]))
+
+def test_tables_and_clahe_are_cached():
+    assert gamma_lut(1.8) is gamma_lut(1.8)
+    assert get_clahe(2.0, 8) is get_clahe(2.0, 8)
+    assert get_preprocessor("clahe=2") is get_preprocessor("clahe=2")
+
+def test_spec_parsing():
+    assert Preprocessor.from_spec(" clahe , gamma=1.8 ").spec == "gamma=1.8,clahe=2"
+    assert get_preprocessor("gamma=1") is None
+    with pytest.raises(ValueError):
+        Preprocessor.from_spec("sharpen=1")
+    with pytest.raises(ValueError):
+        Preprocessor.from_spec("gamma=abc")
+
+def test_camera_specs_and_default(monkeypatch):
+    monkeypatch.setattr(preprocessing, "CAMERA_PREPROCESS", {"yard": "clahe=2.5"})
+    monkeypatch.setattr(preprocessing, "PREPROCESS", "gamma=1.2")
+    assert resolve_preprocess(camera="yard") == "clahe=2.5"
+    assert resolve_preprocess(camera="gate") == "gamma=1.2"
+    assert resolve_preprocess("", camera="yard") == ""
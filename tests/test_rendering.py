@@ -0,0 +1,12 @@
+import numpy as np
+
+from backend.service.rendering import draw_detections
+
+def test_draw_detections_with_masks_and_keypoints():
+    img = np.zeros((100, 100, 3), dtype=np.uint8)
+    keypoints = [[[10 + 4 * i, 10 + 4 * i, 0.9] for i in range(17)]]
+    draw_detections(img, ["person"], [0.9], [[5, 5, 60, 60]],
+                    masks=[[[10, 10], [50, 10], [50, 50]]], keypoints=keypoints)
+    assert img[30, 40].any()  # inside the mask
+    assert img[5, 30].any()  # on the box edge
+    assert not img[90, 10].any()
@@ -0,0 +1,46 @@
+import threading
+import time
+
+from backend.service.result_cache import ResultCache
+
+def test_concurrent_misses_are_coalesced(tmp_path):
+    cache = ResultCache(max_entries=8, disk_dir=str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 1}
+
+    key = cache.key(b"image", "detect", "v1")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(key, compute)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [value for value, _ in results] == [{"value": 1}] * 4
+    assert sorted(cached for _, cached in results) == [False, True, True, True]
+
+def test_disk_tier_survives_memory_eviction(tmp_path):
+    cache = ResultCache(max_entries=1, disk_dir=str(tmp_path))
+    cache.put("a", {"value": "a"})
+    cache.put("b", {"value": "b"})
+    assert cache.get("a") == {"value": "a"}
+    assert cache.stats()["disk_hits"] == 1
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(max_entries=0, disk_dir=str(tmp_path), disk_max_mb=300 / (1024 * 1024))
+    payload = "x" * 100
+    for key in ("a", "b", "c"):
+        cache.put(key, {"value": payload})
+        time.sleep(0.01)
+    assert cache.get("a") is None
+    assert cache.get("c") == {"value": payload}
+    assert cache.stats()["disk_evictions"] >= 1
+
+def test_key_depends_on_model_version():
+    assert ResultCache.key(b"image", "detect", "v1") != ResultCache.key(b"image", "detect", "v2")
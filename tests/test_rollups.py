@@ -0,0 +1,46 @@
+import datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from backend.db.models import Base, Detection, DetectionRollup
+from backend.db.rollups import apply_rollups, rebuild_rollups
+from backend.service.history_service import build_objects
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+def _detection(timestamp, class_names, confidences):
+    return Detection(
+        timestamp=timestamp, filename="a.jpg", task="detect", class_names=class_names,
+        confidences=confidences, bboxes=[[0, 0, 1, 1]] * len(class_names),
+        objects=build_objects(class_names, confidences, [[0, 0, 1, 1]] * len(class_names), timestamp, "a.jpg",
+                              "detect"),
+    )
+
+def _rollups(session):
+    rows = session.execute(select(DetectionRollup)).scalars().all()
+    return {(r.granularity, r.bucket_start, r.class_name): (r.count, round(r.confidence_sum, 6)) for r in rows}
+
+def test_incremental_rollups_match_rebuild():
+    session = _session()
+    t0 = datetime.datetime(2025, 1, 1, 10, 15)
+    for batch in (
+        [_detection(t0, ["person", "dog"], [0.9, 0.5])],
+        [_detection(t0 + datetime.timedelta(minutes=30), ["person"], [0.7]),
+         _detection(t0 + datetime.timedelta(hours=1), ["person"], [0.6])],
+    ):
+        session.add_all(batch)
+        apply_rollups(session, batch)
+        session.commit()
+
+    incremental = _rollups(session)
+    assert incremental[("hour", datetime.datetime(2025, 1, 1, 10), "person")] == (2, 1.6)
+    assert incremental[("hour", datetime.datetime(2025, 1, 1, 11), "person")] == (1, 0.6)
+    assert incremental[("day", datetime.datetime(2025, 1, 1), "person")] == (3, 2.2)
+    assert incremental[("day", datetime.datetime(2025, 1, 1), "dog")] == (1, 0.5)
+
+    assert rebuild_rollups(session) == 4
+    assert _rollups(session) == incremental
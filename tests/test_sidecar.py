@@ -0,0 +1,29 @@
+from backend.service.sidecar import FrameRecorder, merge_sidecars, read_frames
+from backend.service.tracking import Track
+
+def _record(path, frames):
+    recorder = FrameRecorder()
+    for tracks in frames:
+        recorder.add(tracks)
+    return recorder.save(str(path))
+
+def test_frames_round_trip(tmp_path):
+    car = Track(1, [0, 0, 10, 10], "car", 0.9, 0)
+    person = Track(2, [5, 5, 20, 20], "person", 0.7, 0)
+    path = _record(tmp_path / "video", [[car, person], [], [person]])
+
+    frames = read_frames(path, 0, 10)
+    assert [f["frame"] for f in frames] == [0, 1, 2]
+    assert frames[0]["class_names"] == ["car", "person"]
+    assert frames[1]["bboxes"] == []
+    assert frames[2]["track_ids"] == [2]
+    assert read_frames(path, 2, 3)[0]["class_names"] == ["person"]
+
+def test_segments_merge_in_order(tmp_path):
+    car = Track(1, [0, 0, 10, 10], "car", 0.9, 0)
+    first = _record(tmp_path / "a", [[car], []])
+    second = _record(tmp_path / "b", [[car, car]])
+    merged = merge_sidecars([first, second], str(tmp_path / "merged"))
+
+    frames = read_frames(merged)
+    assert [len(f["bboxes"]) for f in frames] == [1, 0, 2]
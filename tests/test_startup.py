@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+from backend.service.startup import Startup
+
+class FakeRegistry:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.loaded = []
+
+    def get(self, task):
+        if self.fail:
+            raise RuntimeError("weights missing")
+        self.loaded.append(task)
+
+    def stats(self):
+        return {"loaded": [{"task": task, "load_seconds": 0.5, "warmup_seconds": 0.25} for task in self.loaded]}
+
+def test_ready_once_configured_models_are_loaded():
+    startup = Startup(tasks=["detect", "pose"], model_registry=FakeRegistry())
+    assert not startup.ready
+    startup.start()
+    assert startup.wait(timeout=120)
+    seconds = startup.to_dict()["seconds"]
+    assert seconds["detect_load"] == 0.5
+    assert seconds["pose_warmup"] == 0.25
+    assert "framework_import" in seconds
+
+def test_failed_load_is_reported():
+    startup = Startup(tasks=["detect"], model_registry=FakeRegistry(fail=True))
+    startup.start()
+    assert not startup.wait(timeout=120)
+    assert startup.to_dict()["status"] == "failed"
+    assert "weights missing" in startup.to_dict()["error"]
+
+def test_app_imports_without_torch():
+    code = "import sys, backend.main; print('torch' in sys.modules, 'ultralytics' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ["False", "False"]
@@ -0,0 +1,26 @@
+import asyncio
+
+import cv2
+import numpy as np
+
+from backend.service.stream_service import LatestFrame, process_frame
+
+def test_latest_frame_keeps_only_newest():
+    async def scenario():
+        mailbox = LatestFrame()
+        for frame in ("a", "b", "c"):
+            mailbox.put(frame)
+        assert await mailbox.get() == "c"
+        assert mailbox.dropped == 2
+        mailbox.close()
+        assert await mailbox.get() is None
+
+    asyncio.run(scenario())
+
+def test_annotated_segment_frames_keep_bgr_order():
+    frame = np.zeros((96, 128, 3), dtype=np.uint8)
+    frame[..., 0], frame[..., 1], frame[..., 2] = 20, 120, 220
+    ok, buffer = cv2.imencode(".jpg", frame)
+    _, jpeg = process_frame(buffer.tobytes(), "segment")
+    annotated = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    assert np.abs(annotated.reshape(-1, 3).mean(axis=0) - [20, 120, 220]).max() < 10
@@ -0,0 +1,28 @@
+from backend.service.tiling import merge_results, offset_result, tile_grid
+
+def test_tiles_cover_image_with_overlap():
+    tiles = tile_grid(1000, 2000, tile_size=640, overlap=0.2)
+    xs = sorted({x0 for x0, _, _, _ in tiles})
+    ys = sorted({y0 for _, y0, _, _ in tiles})
+    assert xs[0] == 0 and max(x1 for _, _, x1, _ in tiles) == 2000
+    assert ys[0] == 0 and max(y1 for _, _, _, y1 in tiles) == 1000
+    assert all(b - a <= 640 * 0.8 for a, b in zip(xs, xs[1:]))
+    assert {(x1 - x0, y1 - y0) for x0, y0, x1, y1 in tiles} == {(640, 640)}
+    assert tile_grid(300, 500, tile_size=640) == [(0, 0, 500, 300)]
+
+def test_offset_result_maps_to_image_coordinates():
+    data = {"bboxes": [[1, 2, 3, 4]], "masks": [[[1, 1], [2, 2]]], "keypoints": [[[5, 6, 0.9]]]}
+    offset_result(data, 100, 200)
+    assert data["bboxes"] == [[101, 202, 103, 204]]
+    assert data["masks"] == [[[101, 201], [102, 202]]]
+    assert data["keypoints"] == [[[105, 206, 0.9]]]
+
+def test_merge_suppresses_cross_tile_duplicates_per_class():
+    full = {"class_names": ["car"], "class_ids": [2], "confidences": [0.8], "bboxes": [[600, 100, 700, 160]]}
+    # The same car cut by the tile edge, and a person overlapping it
+    cut = {"class_names": ["car", "person"], "class_ids": [2, 0], "confidences": [0.9, 0.7],
+           "bboxes": [[600, 100, 640, 160], [610, 110, 650, 150]]}
+    merged = merge_results([cut, full], (1000, 1000), match_threshold=0.6)
+    assert merged["image_size"] == [1000, 1000]
+    assert merged["class_names"] == ["car", "person"]
+    assert merged["confidences"] == [0.9, 0.7]
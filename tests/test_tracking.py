@@ -0,0 +1,27 @@
+from backend.service.tracking import IouTracker, iou_matrix
+
+def test_iou_matrix():
+    ious = iou_matrix([[0, 0, 10, 10]], [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    assert ious.shape == (1, 3)
+    assert abs(ious[0, 0] - 1.0) < 1e-6
+    assert abs(ious[0, 1] - 1 / 3) < 1e-6
+    assert ious[0, 2] == 0
+
+def test_track_ids_are_stable_and_boxes_propagate():
+    tracker = IouTracker(iou_threshold=0.3, max_misses=1)
+    first = tracker.update([[0, 0, 10, 10]], ["car"], [0.9], frame_idx=0)
+    second = tracker.update([[2, 0, 12, 10]], ["car"], [0.8], frame_idx=2)
+    assert first[0].id == second[0].id
+
+    predicted = tracker.predict(frame_idx=4)
+    assert predicted[0].box[0] > 2
+
+    summary = tracker.summary()
+    assert summary["unique_objects"] == {"car": 1}
+    assert summary["tracks"][0]["hits"] == 2
+
+def test_classes_are_not_mixed():
+    tracker = IouTracker()
+    tracker.update([[0, 0, 10, 10]], ["car"], [0.9], frame_idx=0)
+    tracker.update([[0, 0, 10, 10]], ["person"], [0.9], frame_idx=1)
+    assert tracker.summary()["unique_objects"] == {"car": 1, "person": 1}
@@ -0,0 +1,97 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.service import video_service
+from backend.service.job_service import JobCancelledError
+from backend.service.sidecar import read_frames
+from tests.fakes import FakeCapture, ListWriter
+
+def _write_video(path, frames=24, size=(320, 240)):
+    img = cv2.imread(os.path.join("sample_images", "1.jpg"))
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, size)
+    for i in range(frames):
+        # Pan across the image so consecutive frames differ
+        writer.write(cv2.resize(img[:, i * 4:], size))
+    writer.release()
+    return str(path)
+
+def _count_frames(path):
+    cap = cv2.VideoCapture(path)
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    return count
+
+@pytest.fixture
+def unrecorded(monkeypatch):
+    # Keep these runs out of the detection history
+    monkeypatch.setattr(video_service, "_record_video", lambda *args, **kwargs: "0" * 32)
+    monkeypatch.setattr(video_service, "VIDEO_SEGMENT_MIN_FRAMES", 8)
+    yield
+    video_service.shutdown_segment_pool()
+
+def test_segmented_run_matches_serial_run(tmp_path, unrecorded):
+    video = _write_video(tmp_path / "input.avi")
+    serial = video_service.process_video_detect(video, str(tmp_path / "serial"), batch_size=4)
+    parallel = video_service.process_video_parallel(video, str(tmp_path / "parallel"), "detect", workers=2,
+                                                    batch_size=4)
+
+    assert parallel["frame_count"] == serial["frame_count"] == 24
+    assert len(parallel["pipeline"]["segments"]) == 2
+    assert _count_frames(parallel["video_path"]) == _count_frames(serial["video_path"]) == 24
+    serial_frames = read_frames(os.path.join(tmp_path, "serial", "detect_detections"))
+    parallel_frames = read_frames(os.path.join(tmp_path, "parallel", "detect_detections"))
+    assert [f["class_names"] for f in parallel_frames] == [f["class_names"] for f in serial_frames]
+    assert sorted(os.listdir(tmp_path / "parallel")) == ["detect_detections", "detect_processed.avi"]
+
+def test_failed_segment_removes_intermediate_files(tmp_path, unrecorded):
+    video = _write_video(tmp_path / "input.avi")
+    output_dir = tmp_path / "failed"
+    with pytest.raises(ValueError):
+        # Workers open their segment file, then reject the preprocessing spec
+        video_service.process_video_parallel(video, str(output_dir), "detect", workers=2, preprocess="sharpen")
+    assert not [name for name in os.listdir(output_dir) if name.startswith("segment_")]
+
+def test_cancelled_job_removes_its_output_dir(tmp_path, unrecorded, monkeypatch):
+    video = _write_video(tmp_path / "input.avi")
+    monkeypatch.setattr(video_service, "VIDEO_RESULTS_DIR", str(tmp_path / "video_results"))
+
+    def cancel(_progress, _total):
+        raise JobCancelledError("Video processing was cancelled")
+
+    with pytest.raises(JobCancelledError):
+        video_service.process_video(video, "detect", progress_fn=cancel, segment_workers=1)
+    assert os.listdir(tmp_path / "video_results") == []
+
+def test_segment_pools_are_kept_per_worker_count():
+    try:
+        two = video_service._get_segment_pool(2)
+        assert video_service._get_segment_pool(3) is not two
+        assert video_service._get_segment_pool(2) is two
+    finally:
+        video_service.shutdown_segment_pool()
+
+def test_memory_cap_shrinks_batches_of_large_frames():
+    # A 4K BGR frame is about 24 MB
+    assert video_service._effective_batch_size(8, 3840, 2160, max_mb=64) == 2
+    assert video_service._effective_batch_size(8, 3840, 2160, max_mb=16) == 1
+    assert video_service._effective_batch_size(8, 640, 360, max_mb=64) == 8
+
+def test_partial_final_batch_is_processed_and_written():
+    frames = [np.full((8, 8, 3), i, dtype=np.uint8) for i in range(10)]
+    batch_sizes = []
+
+    def annotate(batch):
+        batch_sizes.append(len(batch))
+        return [(frame, None) for frame in batch]
+
+    writer = ListWriter()
+    count, stats = video_service._annotate_frames(FakeCapture(frames), writer, annotate, batch_size=4)
+    assert count == 10
+    assert batch_sizes == [4, 4, 2]
+    assert [int(frame[0, 0, 0]) for frame in writer] == list(range(10))
+    assert stats["batch_size"] == 4
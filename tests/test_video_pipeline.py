@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from backend.service.video_pipeline import FramePipeline
+from tests.fakes import FakeCapture, ListWriter
+
+def _run(pipeline, batch_size=3, fn=lambda frame: frame):
+    with pipeline:
+        while True:
+            frames = pipeline.read(batch_size)
+            if not frames:
+                break
+            for frame in frames:
+                pipeline.write(fn(frame))
+
+def _within(seconds, target):
+    # Fail instead of hanging the suite if the pipeline deadlocks
+    outcome = {}
+
+    def call():
+        try:
+            target()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=call, daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), "pipeline did not shut down"
+    return outcome.get("error")
+
+def test_output_order_matches_input_order():
+    writer = ListWriter()
+    _run(FramePipeline(FakeCapture(range(50)), writer, queue_size=4))
+    assert writer == list(range(50))
+
+def test_max_frames_stops_decoding():
+    cap, writer = FakeCapture(range(50)), ListWriter()
+    _run(FramePipeline(cap, writer, queue_size=4, max_frames=10))
+    assert writer == list(range(10))
+    assert cap.reads == 10
+
+def test_processing_error_shuts_down_cleanly():
+    pipeline = FramePipeline(FakeCapture(range(100)), ListWriter(), queue_size=2)
+
+    def fail(frame):
+        if frame == 5:
+            raise RuntimeError("model crashed")
+        return frame
+
+    error = _within(5, lambda: _run(pipeline, fn=fail))
+    assert isinstance(error, RuntimeError)
+    assert not any(thread.is_alive() for thread in pipeline._threads)
+    assert pipeline._encoded.empty()
+    assert not pipeline._decoded.full()
+
+def test_decoder_error_reaches_the_caller():
+    writer = ListWriter()
+    error = _within(5, lambda: _run(FramePipeline(FakeCapture(range(50), fail_at=7), writer, queue_size=2)))
+    assert isinstance(error, IOError) and "corrupt packet" in str(error)
+    # The encoder stops writing once an error is recorded
+    assert len(writer) <= 7
+
+def test_encoder_error_reaches_the_caller():
+    with pytest.raises(IOError, match="disk full"):
+        _run(FramePipeline(FakeCapture(range(50)), ListWriter(fail_at=4), queue_size=2))
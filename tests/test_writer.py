@@ -0,0 +1,67 @@
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.db.models import Base, Detection, DetectionObject
+from backend.db.writer import DetectionWriter
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+def _detection(filename="a.jpg"):
+    return Detection(filename=filename, class_names=[], confidences=[], bboxes=[], task="detect")
+
+def _count(session_factory):
+    with session_factory() as session:
+        return session.execute(select(func.count()).select_from(Detection)).scalar()
+
+def test_flushes_when_the_batch_is_full(session_factory):
+    writer = DetectionWriter(session_factory, batch_size=3, flush_interval_ms=10_000)
+    futures = [writer.submit(_detection()) for _ in range(3)]
+    for future in futures:
+        future.result(timeout=5)
+    assert _count(session_factory) == 3
+    assert writer.stats()["flushes"] == 1
+    writer.shutdown()
+
+def test_flushes_after_the_interval(session_factory):
+    writer = DetectionWriter(session_factory, batch_size=100, flush_interval_ms=50)
+    started = time.perf_counter()
+    writer.submit(_detection()).result(timeout=5)
+    assert time.perf_counter() - started >= 0.05
+    assert _count(session_factory) == 1
+    writer.shutdown()
+
+def test_shutdown_flushes_pending_records(session_factory):
+    writer = DetectionWriter(session_factory, batch_size=100, flush_interval_ms=10_000)
+    futures = [writer.submit(_detection()) for _ in range(2)]
+    started = time.perf_counter()
+    writer.shutdown()
+    assert time.perf_counter() - started < 5
+    assert all(future.done() and future.exception() is None for future in futures)
+    assert _count(session_factory) == 2
+
+def test_bad_record_only_fails_its_own_submitter(session_factory):
+    writer = DetectionWriter(session_factory, batch_size=3, flush_interval_ms=10_000)
+    detection_id = uuid.uuid4()
+    bad = [Detection(id=detection_id, filename="bad.jpg", class_names=[], confidences=[], bboxes=[]),
+           DetectionObject(detection_id=detection_id, class_name=None)]
+    futures = [writer.submit(_detection("a.jpg")), writer.submit(bad), writer.submit(_detection("b.jpg"))]
+
+    assert futures[0].result(timeout=5) is None
+    with pytest.raises(IntegrityError):
+        futures[1].result(timeout=5)
+    assert futures[2].result(timeout=5) is None
+    with session_factory() as session:
+        assert sorted(session.execute(select(Detection.filename)).scalars()) == ["a.jpg", "b.jpg"]
+    assert writer.stats()["records"] == 2
+    assert writer.stats()["errors"] == 1
+    writer.shutdown()